@@ -0,0 +1,177 @@
+# attribute_catalog.py
+
+from collections import defaultdict
+
+import numpy as np
+
+# Gruppe für Attribute ohne ExifTool-Präfix (Export ohne -G)
+NO_GROUP = ""
+
+# Ab diesem Anteil der Trigramme des Suchbegriffs gilt ein Name als
+# unscharfer Treffer (Tippfehler, vertauschte Buchstaben)
+FUZZY_MIN_SCORE = 0.5
+
+# Rangstufen: exakt, Wortanfang, Teilstring, unscharf
+_EXACT, _PREFIX, _SUBSTRING, _FUZZY = range(4)
+
+# -------------------------------
+# Katalog aufbauen
+# -------------------------------
+
+def split_group(attr: str):
+    """
+    "EXIF:Make" -> ("EXIF", "Make"); ohne Präfix -> (NO_GROUP, attr).
+    Bei mehrstufigen Präfixen ("XMP:XMP-dc:Subject") zählt die erste Stufe.
+    """
+    if ":" in attr:
+        group, _, _ = attr.partition(":")
+        return group, attr.rpartition(":")[2]
+    return NO_GROUP, attr
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_catalog(types, stats) -> dict:
+    """
+    Einmal vorberechnete Attributliste für die Auswahl: Gruppe, Typ,
+    Füllstand je Attribut, beide Sortierreihenfolgen und ein Trigramm-Index
+    (Trigramm -> Attributnummern) für die unscharfe Suche.
+    """
+    names = sorted(types)
+    groups, lowered, tags = [], [], []
+    postings = defaultdict(list)
+
+    for i, attr in enumerate(names):
+        group, tag = split_group(attr)
+        groups.append(group)
+        tags.append(tag.lower())
+        lowered.append(attr.lower())
+        # auch die Trigramme am Anfang des Tag-Namens (nach der Gruppe)
+        for tri in _trigrams(attr.lower()) | _trigrams(tag.lower()):
+            postings[tri].append(i)
+
+    counts = np.array([stats.get(a, {}).get("count", 0) for a in names], dtype=np.int64)
+    percents = np.array([stats.get(a, {}).get("percent", 0.0) for a in names], dtype=np.float64)
+
+    return {
+        "names": names,
+        "position": {a: i for i, a in enumerate(names)},
+        "lowered": lowered,
+        "tags": tags,
+        "groups": groups,
+        "types": [types[a] for a in names],
+        "counts": counts,
+        "percents": percents,
+        "trigrams": {tri: np.array(ids, dtype=np.int32) for tri, ids in postings.items()},
+        # Rang je Attribut in der jeweiligen Sortierung (kleiner = weiter vorn)
+        "order": {
+            "alphabetisch": np.arange(len(names)),
+            "häufigkeit": np.argsort(np.argsort(-percents, kind="stable"), kind="stable"),
+        },
+        "group_names": sorted(set(groups)),
+    }
+
+
+def get_catalog(holder, types, stats) -> dict:
+    """
+    Katalog aus holder (Registry-Eintrag oder DuckDB-Katalog) holen, beim
+    ersten Zugriff aufbauen. replace_dataset verwirft ihn mit dem Bestand.
+    """
+    catalog = holder.get("attribute_catalog")
+    if catalog is None:
+        catalog = build_catalog(types, stats)
+        holder["attribute_catalog"] = catalog
+    return catalog
+
+# -------------------------------
+# Suche
+# -------------------------------
+
+def _token_ranks(catalog, token: str):
+    """
+    (stufe, ähnlichkeit) je Attribut für einen Suchbegriff; stufe -1 = kein Treffer.
+    """
+    n = len(catalog["names"])
+    tier = np.full(n, -1, dtype=np.int8)
+    score = np.zeros(n, dtype=np.float64)
+
+    # Teilstrings; bei ab 3 Zeichen nur Kandidaten mit allen Trigrammen prüfen
+    q_tris = _trigrams(token)
+    inner = {t for t in q_tris if " " not in t}
+    if inner:
+        hits = np.bincount(
+            np.concatenate([catalog["trigrams"].get(t, np.empty(0, np.int32)) for t in inner]),
+            minlength=n
+        )
+        candidates = np.flatnonzero(hits == len(inner))
+    else:
+        candidates = range(n)
+
+    lowered, tags = catalog["lowered"], catalog["tags"]
+    for i in candidates:
+        if token not in lowered[i]:
+            continue
+        if tags[i] == token or lowered[i] == token:
+            tier[i] = _EXACT
+        elif tags[i].startswith(token) or lowered[i].startswith(token):
+            tier[i] = _PREFIX
+        else:
+            tier[i] = _SUBSTRING
+        score[i] = 1.0
+
+    # unscharf: Anteil der Trigramme des Suchbegriffs, die im Namen vorkommen
+    if len(token) >= 3:
+        shared = np.bincount(
+            np.concatenate([catalog["trigrams"].get(t, np.empty(0, np.int32)) for t in q_tris]),
+            minlength=n
+        )
+        similarity = shared / len(q_tris)
+        fuzzy = (tier < 0) & (similarity >= FUZZY_MIN_SCORE)
+        tier[fuzzy] = _FUZZY
+        score[fuzzy] = similarity[fuzzy]
+
+    return tier, score
+
+
+def search(catalog, query: str = "", sort_mode: str = "alphabetisch", group=None, exclude=()):
+    """
+    Attributnamen passend zur Suche, bestes Ergebnis zuerst. Mehrere Wörter
+    müssen alle passen. Reihenfolge: exakte Treffer, Wortanfang, Teilstring,
+    unscharfe Treffer (nach Ähnlichkeit); innerhalb einer Stufe nach sort_mode.
+    """
+    names = catalog["names"]
+    n = len(names)
+    keep = np.ones(n, dtype=bool)
+    tier = np.zeros(n, dtype=np.int8)
+    score = np.zeros(n, dtype=np.float64)
+
+    for token in query.lower().split():
+        t_tier, t_score = _token_ranks(catalog, token)
+        keep &= t_tier >= 0
+        tier = np.maximum(tier, t_tier)
+        score += t_score
+
+    if group is not None:
+        keep &= np.array([g == group for g in catalog["groups"]])
+    if exclude:
+        position = catalog["position"]
+        keep[[position[a] for a in exclude if a in position]] = False
+
+    ids = np.flatnonzero(keep)
+    order = catalog["order"].get(sort_mode, catalog["order"]["alphabetisch"])
+    ranked = ids[np.lexsort((order[ids], -score[ids], tier[ids]))]
+    return [names[i] for i in ranked]
+
+
+def describe(catalog, attr: str) -> str:
+    """
+    Beschriftung eines Attributs in der Auswahlliste.
+    """
+    i = catalog["position"][attr]
+    return (
+        f"{attr} ({catalog['types'][i]} / {int(catalog['counts'][i]):,} / "
+        f"{catalog['percents'][i]:.1f}%)"
+    )
@@ -1,37 +1,54 @@
 # attribute_types.py
 
-from datetime import datetime
-from typing import Dict
-# attribute_types.py
-
-# attribute_types.py
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
-from datetime import datetime
-import re
 
-KNOWN_DATETIME_FORMATS = [
+import value_parsers as vp
+
+# (strptime-Format, Regex) – die Regexe prüfen auch die Wertebereiche,
+# damit z.B. "0000:00:00 00:00:00" wie bei strptime nicht als Datum gilt.
+_D = r"(?:19|20)\d{2}"
+_MO = r"(?:0[1-9]|1[0-2])"
+_DAY = r"(?:0[1-9]|[12]\d|3[01])"
+_T = r"(?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d"
+_F = r"\.\d+"
+_Z = r"(?:Z|[+\-]\d{2}:?\d{2})"
+
+DATETIME_PATTERNS: List[Tuple[str, str]] = [
     # ExifTool ohne Subsekunden
-    "%Y:%m:%d %H:%M:%S",
-    "%Y:%m:%d %H:%M:%S%z",
+    ("%Y:%m:%d %H:%M:%S", rf"{_D}:{_MO}:{_DAY} {_T}"),
+    ("%Y:%m:%d %H:%M:%S%z", rf"{_D}:{_MO}:{_DAY} {_T}{_Z}"),
 
     # ExifTool mit Subsekunden
-    "%Y:%m:%d %H:%M:%S.%f",
-    "%Y:%m:%d %H:%M:%S.%f%z",
+    ("%Y:%m:%d %H:%M:%S.%f", rf"{_D}:{_MO}:{_DAY} {_T}{_F}"),
+    ("%Y:%m:%d %H:%M:%S.%f%z", rf"{_D}:{_MO}:{_DAY} {_T}{_F}{_Z}"),
 
     # ISO-ähnlich
-    "%Y-%m-%d %H:%M:%S",
-    "%Y-%m-%d %H:%M:%S.%f",
-    "%Y-%m-%d %H:%M:%S%z",
-    "%Y-%m-%d %H:%M:%S.%f%z",
+    ("%Y-%m-%d %H:%M:%S", rf"{_D}-{_MO}-{_DAY} {_T}"),
+    ("%Y-%m-%d %H:%M:%S.%f", rf"{_D}-{_MO}-{_DAY} {_T}{_F}"),
+    ("%Y-%m-%d %H:%M:%S%z", rf"{_D}-{_MO}-{_DAY} {_T}{_Z}"),
+    ("%Y-%m-%d %H:%M:%S.%f%z", rf"{_D}-{_MO}-{_DAY} {_T}{_F}{_Z}"),
 
     # Datum-only
-    "%Y-%m-%d",
-    "%Y:%m:%d",
+    ("%Y-%m-%d", rf"{_D}-{_MO}-{_DAY}"),
+    ("%Y:%m:%d", rf"{_D}:{_MO}:{_DAY}"),
 ]
 
+KNOWN_DATETIME_FORMATS = [fmt for fmt, _ in DATETIME_PATTERNS]
+
+_COMPILED_PATTERNS = [(fmt, re.compile(rx)) for fmt, rx in DATETIME_PATTERNS]
+
 YEAR_REGEX = re.compile(r"\b(19|20)\d{2}\b")
 
+# Ab so vielen Spalten lohnt sich der Prozess-Pool
+PARALLEL_MIN_COLUMNS = 300
+COLUMNS_PER_TASK = 100
+
 
 def is_datetime_value(value) -> bool:
     if value is None or not isinstance(value, str):
@@ -46,34 +63,127 @@ def is_datetime_value(value) -> bool:
         return False
 
     # bekannte Formate
-    for fmt in KNOWN_DATETIME_FORMATS:
-        try:
-            datetime.strptime(v, fmt)
-            return True
-        except Exception:
-            pass
+    if any(rx.fullmatch(v) for _, rx in _COMPILED_PATTERNS):
+        return True
 
     # pandas-Fallback
+    return not pd.isna(pd.to_datetime(v, errors="coerce", format="mixed"))
+
+# -------------------------------
+# Stichprobe klassifizieren
+# -------------------------------
+
+def classify_datetime_sample(sample: pd.Series) -> Tuple[float, Optional[str]]:
+    """
+    Anteil der Datumswerte in der Stichprobe und das häufigste erkannte
+    Format. Alle Formate werden per String-Operation auf die ganze
+    Stichprobe angewandt statt Wert für Wert per strptime.
+    """
+    if sample.empty:
+        return 0.0, None
+
+    # Nicht-Strings werden hier zu NaN und zählen nicht als Treffer
     try:
-        pd.to_datetime(v, errors="raise", infer_datetime_format=True)
-        return True
-    except Exception:
-        return False
+        text = pd.Series(sample, dtype=object).str.strip()
+    except AttributeError:  # gar keine Strings in der Stichprobe
+        return 0.0, None
+
+    hits = pd.Series(False, index=text.index)
+    best_fmt, best_count = None, 0
+
+    for fmt, rx in DATETIME_PATTERNS:
+        matched = text.str.fullmatch(rx).fillna(False).astype(bool) & ~hits
+        count = int(matched.sum())
+        if count:
+            hits |= matched
+            if count > best_count:
+                best_fmt, best_count = fmt, count
+
+    # pandas-Fallback nur für den Rest, der überhaupt ein Jahr enthält
+    rest = text[~hits & text.str.contains(r"\b(?:19|20)\d{2}\b", na=False)]
+    if not rest.empty:
+        parsed = pd.to_datetime(rest, errors="coerce", format="mixed")
+        fallback = int(parsed.notna().sum())
+        if fallback:
+            hits.loc[parsed.index[parsed.notna()]] = True
+            if fallback > best_count:
+                best_fmt = None
+
+    return float(hits.sum()) / len(sample), best_fmt
+
+
+def classify_sample(
+    sample: pd.Series,
+    numeric_candidate: bool,
+    datetime_threshold: float = 0.7,
+    gps_threshold: float = 0.9,
+) -> dict:
+    """
+    Liefert {"type", "confidence", "format"} für eine Stichprobe.
+    numeric_candidate: Spalte hat einen Zahlen-Dtype und genug
+    verschiedene Werte (wird auf der ganzen Spalte bestimmt).
+    """
+    if sample.empty:
+        return {"type": "categorical", "confidence": 1.0, "format": None}
+
+    # --- Zeit prüfen (mit Schwelle) ---
+    ratio, fmt = classify_datetime_sample(sample)
+    if ratio >= datetime_threshold:
+        return {"type": "datetime", "confidence": ratio, "format": fmt}
+
+    # --- Koordinatenpaare (GPSPosition, GPSCoordinates) ---
+    gps_ratio = vp.coordinate_ratio(sample)
+    if gps_ratio >= gps_threshold:
+        return {"type": "gps", "confidence": gps_ratio, "format": None}
+
+    # --- Numerisch ---
+    if numeric_candidate:
+        return {"type": "numeric", "confidence": 1.0, "format": None}
+
+    return {"type": "categorical", "confidence": 1.0 - ratio, "format": None}
+
+
+def _classify_jobs(jobs) -> List[Tuple[str, dict]]:
+    # Läuft auch im Worker-Prozess, muss daher auf Modulebene stehen
+    results = []
+    for col, values, numeric_candidate in jobs:
+        try:
+            details = classify_sample(pd.Series(values, dtype=object), numeric_candidate)
+        except Exception:
+            details = {"type": "categorical", "confidence": 0.0, "format": None}
+        results.append((col, details))
+    return results
+
+
+def classify_samples(jobs, workers=None) -> Dict[str, dict]:
+    """
+    jobs: Liste von (spalte, stichprobe, numeric_candidate).
+    Bei vielen Spalten werden sie blockweise auf einen Prozess-Pool verteilt.
+    """
+    if workers is None:
+        workers = 1 if len(jobs) < PARALLEL_MIN_COLUMNS else min(os.cpu_count() or 1, 8)
+
+    if workers <= 1:
+        return dict(_classify_jobs(jobs))
+
+    chunks = [jobs[i:i + COLUMNS_PER_TASK] for i in range(0, len(jobs), COLUMNS_PER_TASK)]
+    details = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in pool.map(_classify_jobs, chunks):
+            details.update(results)
+    return details
 
 # -------------------------------
 # Attribut-Typ bestimmen
 # -------------------------------
 
-def infer_attribute_type(
+def _sample_job(
+    col,
     series: pd.Series,
     sample_size: int = 200,
     min_numeric_unique: int = 10,
-    datetime_threshold: float = 0.7,  # ← neu
-) -> str:
-
+):
     non_null = series.dropna()
-    if non_null.empty:
-        return "categorical"
 
     sample = (
         non_null.sample(sample_size, random_state=42)
@@ -81,39 +191,111 @@ def infer_attribute_type(
         else non_null
     )
 
-    # --- Zeit prüfen (mit Schwelle) ---
-    datetime_hits = sum(is_datetime_value(v) for v in sample)
-    if datetime_hits / len(sample) >= datetime_threshold:
-        return "datetime"
+    numeric_candidate = (
+        pd.api.types.is_numeric_dtype(non_null)
+        and non_null.nunique() > min_numeric_unique
+    )
+    return col, sample.tolist(), bool(numeric_candidate)
 
-    # --- Numerisch ---
-    if pd.api.types.is_numeric_dtype(non_null):
-        if non_null.nunique() > min_numeric_unique:
-            return "numeric"
 
-    return "categorical"
+def infer_attribute_type(
+    series: pd.Series,
+    sample_size: int = 200,
+    min_numeric_unique: int = 10,
+    datetime_threshold: float = 0.7,  # ← neu
+) -> str:
+    _, sample, numeric_candidate = _sample_job(
+        None, series, sample_size, min_numeric_unique
+    )
+    return classify_sample(
+        pd.Series(sample, dtype=object), numeric_candidate, datetime_threshold
+    )["type"]
 
 
 # -------------------------------
 # Alle Attribute klassifizieren
 # -------------------------------
 
+def infer_all_attribute_details(
+    df: pd.DataFrame,
+    sample_size: int = 200,
+    columns=None,
+    workers=None
+) -> Dict[str, dict]:
+    """
+    Liefert dict: {attributname: {"type", "confidence", "format"}}
+    """
+    jobs = []
+    for col in (df.columns if columns is None else columns):
+        try:
+            jobs.append(_sample_job(col, df[col], sample_size))
+        except Exception:
+            jobs.append((col, [], False))
+
+    return classify_samples(jobs, workers)
+
+
 def infer_all_attribute_types(
     df: pd.DataFrame,
-    sample_size: int = 200
+    sample_size: int = 200,
+    columns=None
 ) -> Dict[str, str]:
     """
     Liefert dict: {attributname: typ}
     """
-    types = {}
+    details = infer_all_attribute_details(df, sample_size, columns)
+    return {col: d["type"] for col, d in details.items()}
+
+
+def _sample_series(values) -> pd.Series:
+    """
+    Stichprobe als Series; reine Zahlenspalten (ijson liefert Decimal)
+    werden wie in compact_column numerisch, damit der Typ dem der voll
+    geladenen Spalte entspricht.
+    """
+    series = pd.Series(values)
+    if series.dtype == object:
+        kinds = set(map(type, series.dropna()))
+        if kinds and kinds <= {int, float, Decimal}:
+            series = pd.to_numeric(series, errors="coerce")
+    return series
+
 
-    for col in df.columns:
+def infer_details_from_samples(
+    samples: Dict[str, list],
+    min_numeric_unique: int = 10,
+    workers=None
+) -> Dict[str, dict]:
+    """
+    Wie infer_all_attribute_details, aber auf den Stichproben aus
+    scan_attribute_catalog statt auf vollständigen Spalten.
+    """
+    jobs = []
+    for col, values in samples.items():
         try:
-            types[col] = infer_attribute_type(
-                df[col],
-                sample_size=sample_size
+            _, sample, numeric_candidate = _sample_job(
+                col, _sample_series(values), len(values), min_numeric_unique
             )
         except Exception:
-            types[col] = "categorical"
+            sample, numeric_candidate = [], False
+        jobs.append((col, sample, numeric_candidate))
+
+    return classify_samples(jobs, workers)
+
 
-    return types
+def infer_types_from_samples(
+    samples: Dict[str, list]
+) -> Dict[str, str]:
+    details = infer_details_from_samples(samples)
+    return {col: d["type"] for col, d in details.items()}
+
+
+def datetime_formats(details: Dict[str, dict]) -> Dict[str, str]:
+    """
+    Erkannte Formate der Datums-Attribute, für das spätere exakte Parsen.
+    """
+    return {
+        col: d["format"]
+        for col, d in details.items()
+        if d["type"] == "datetime" and d["format"]
+    }
@@ -0,0 +1,268 @@
+# benchmark.py
+#
+# Misst den Datenpfad (Laden, Umwandeln, Typbestimmung, Füllstände,
+# Datumszerlegung, Filter, Facettenzählung) auf künstlichen Katalogen
+# verschiedener Größe und speichert das Ergebnis als JSON, damit Läufe
+# vergleichbar sind.
+#
+#   python benchmark.py                                 # 10k und 100k Zeilen
+#   python benchmark.py --rows 10000 1000000 -o nachher.json
+#   python benchmark.py --compare vorher.json nachher.json
+#
+# Die Kataloge werden mit synthetic_catalog.py erzeugt und in --data-dir
+# wiederverwendet. Zeit: bester von --repeat Läufen. Speicher: Spitze der
+# Python-Allokationen (tracemalloc) in einem eigenen Lauf, da tracemalloc
+# die Zeitmessung verfälscht; Arbeitsprozesse des Loaders sind darin
+# nicht enthalten.
+#
+# --compare liefert Exit-Code 1, wenn ein Schritt um mehr als --threshold
+# Prozent langsamer geworden ist.
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import filter_engine as fe
+import geo_index as geo
+import metadata_core as core
+import synthetic_catalog as sc
+import value_parsers as vp
+from attribute_types import infer_all_attribute_types
+
+DEFAULT_ROWS = [10_000, 100_000]
+DEFAULT_DATA_DIR = Path(os.environ.get("METAEXPLORER_BENCH_DIR", Path.home() / ".cache" / "metaexplorer" / "bench"))
+
+ROOT = Path(__file__).resolve().parent
+
+# -------------------------------
+# Messung
+# -------------------------------
+
+def measure(fn, repeat: int = 3, memory: bool = True):
+    """
+    Liefert (ergebnis, {"seconds", "peak_mb"}) für fn().
+    """
+    times = []
+    result = None
+    for _ in range(max(1, repeat)):
+        result = None  # vorheriges Ergebnis freigeben
+        gc.collect()
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+
+    peak_mb = None
+    if memory:
+        result = None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        finally:
+            tracemalloc.stop()
+
+    return result, {"seconds": round(min(times), 4), "peak_mb": None if peak_mb is None else round(peak_mb, 1)}
+
+
+def catalog_file(data_dir: Path, rows: int, seed: int) -> Path:
+    path = Path(data_dir) / f"synthetic_{rows}_{seed}.json"
+    if not path.exists():
+        print(f"Erzeuge {path.name}…", file=sys.stderr)
+        sc.write_catalog(path, rows, seed)
+    return path
+
+# -------------------------------
+# Schritte
+# -------------------------------
+
+def _first_filter_values(df, col, k):
+    counts = df[col].value_counts()
+    return counts.index[:k].tolist()
+
+
+def run_scale(path: Path, repeat: int = 3, memory: bool = True) -> dict:
+    """
+    Misst alle Schritte für einen Katalog. Jeder Schritt arbeitet auf dem
+    Ergebnis des vorigen, wie beim Laden in der App.
+    """
+    steps = {}
+
+    raw, steps["load"] = measure(lambda: core.load_metadata(path), repeat, memory)
+    rows = len(raw)
+
+    (df, _), steps["parse_values"] = measure(lambda: vp.parse_formatted_columns(raw.copy()), repeat, memory)
+    (df, _), steps["compact"] = measure(lambda: core.compact_dataframe(df.copy()), repeat, memory)
+    del raw
+
+    types, steps["infer_types"] = measure(
+        lambda: infer_all_attribute_types(df, columns=core.attribute_columns(df)), repeat, memory
+    )
+    _, steps["stats"] = measure(lambda: core.compute_attribute_stats(df), repeat, memory)
+
+    _, steps["datetime_parse"] = measure(
+        lambda: core.parse_exif_datetime_series(df["DateTimeOriginal"]), repeat, memory
+    )
+    comps, steps["datetime_components"] = measure(
+        lambda: core.parse_datetime_components(df["DateTimeOriginal"]), repeat, memory
+    )
+
+    # Filterzustände wie in der Oberfläche
+    makes = _first_filter_values(df, "Make", 2)
+    years = comps["unique"]["year"][:3]
+    single = {"Make": makes}
+    cross = {
+        "Make": makes,
+        "DateTimeOriginal": {"year": years, "month": [], "weekday": [], "hour": []},
+        "ISO": (100.0, 800.0),
+    }
+    # Typen für Filter passend erzwingen, falls die Erkennung abweicht
+    ftypes = dict(types, Make="categorical", DateTimeOriginal="datetime", ISO="numeric")
+
+    _, steps["filter_single"] = measure(
+        lambda: core.filter_mask(df, single, ftypes, "Alle Medien", {}), repeat, memory
+    )
+
+    dt_store = core.new_datetime_store()
+    core.datetime_components(dt_store, df, "DateTimeOriginal")
+
+    _, steps["cross_filter_cold"] = measure(
+        lambda: fe.cross_filter_masks({}, df, cross, ftypes, "Nur Bilder", dt_store), repeat, memory
+    )
+
+    # Rerun nach einer Widget-Änderung: gleicher Masken-Cache, ein Filter anders
+    cache = {}
+    fe.cross_filter_masks(cache, df, cross, ftypes, "Nur Bilder", dt_store)
+    changed = dict(cross, ISO=(200.0, 1600.0))
+    _, steps["cross_filter_rerun"] = measure(
+        lambda: fe.cross_filter_masks(cache, df, changed, ftypes, "Nur Bilder", dt_store), repeat, memory
+    )
+
+    # Trefferzahlen aller Filter-Widgets unter ihrem Kontext (kalter Cache)
+    _, contexts = fe.cross_filter_masks(cache, df, changed, ftypes, "Nur Bilder", dt_store)
+    _, steps["facet_counts"] = measure(
+        lambda: [fe.facet_counts({}, df, attr, changed, ftypes, "Nur Bilder", contexts[attr], dt_store, {})
+                 for attr in changed],
+        repeat, memory
+    )
+
+    # Umkreissuche über den Gitter-Index (synthetische Orte liegen in Europa)
+    if types.get("GPSPosition") == "gps":
+        geo_indexes = {}
+        _, steps["geo_index_build"] = measure(lambda: geo.build_geo_index(df["GPSPosition"]), repeat, memory)
+        geo.get_geo_index(geo_indexes, df, "GPSPosition")
+        around = geo.radius_filter(48.137, 11.575, 50)
+        _, steps["geo_filter"] = measure(
+            lambda: fe.attribute_mask({}, df, "GPSPosition", around, "gps", indexes=geo_indexes), repeat, memory
+        )
+
+    return {
+        "rows": rows,
+        "columns": len(df.columns),
+        "file_mb": round(path.stat().st_size / 1024 ** 2, 1),
+        "df_mb": round(df.memory_usage(index=False, deep=True).sum() / 1024 ** 2, 1),
+        "steps": steps,
+    }
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+# -------------------------------
+# Ausgabe / Vergleich
+# -------------------------------
+
+def print_results(results):
+    for rows, r in results["scales"].items():
+        print(f"\n{int(rows):,} Zeilen, {r['columns']} Spalten "
+              f"(JSON {r['file_mb']} MB, DataFrame {r['df_mb']} MB)")
+        for step, m in r["steps"].items():
+            peak = f"{m['peak_mb']:>9.1f} MB" if m["peak_mb"] is not None else ""
+            print(f"  {step:<22} {m['seconds'] * 1000:>10.1f} ms {peak}")
+
+
+def compare(old: dict, new: dict, threshold: float = 10.0):
+    """
+    Vergleicht zwei Ergebnisdateien; liefert (zeilen, verschlechtert).
+    """
+    lines, regressed = [], False
+    for rows, r_new in new["scales"].items():
+        r_old = old["scales"].get(rows)
+        if r_old is None:
+            continue
+        lines.append(f"\n{int(rows):,} Zeilen")
+        for step, m_new in r_new["steps"].items():
+            m_old = r_old["steps"].get(step)
+            if m_old is None or not m_old["seconds"]:
+                continue
+            change = 100.0 * (m_new["seconds"] / m_old["seconds"] - 1)
+            flag = ""
+            if change > threshold:
+                flag = "  LANGSAMER"
+                regressed = True
+            elif change < -threshold:
+                flag = "  schneller"
+            lines.append(
+                f"  {step:<22} {m_old['seconds'] * 1000:>9.1f} → {m_new['seconds'] * 1000:>9.1f} ms "
+                f"({change:+6.1f} %){flag}"
+            )
+    return lines, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark des metaExplorer-Datenpfads")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="ohne tracemalloc-Lauf")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument("-o", "--output", type=Path, help="Ergebnis als JSON speichern")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("VORHER", "NACHHER"))
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="ab so viel Prozent gilt ein Schritt als langsamer")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        old, new = (json.loads(p.read_text(encoding="utf-8")) for p in args.compare)
+        lines, regressed = compare(old, new, args.threshold)
+        print("\n".join(lines))
+        return 1 if regressed else 0
+
+    results = {"environment": environment(), "repeat": args.repeat, "scales": {}}
+    for rows in args.rows:
+        path = catalog_file(args.data_dir, rows, args.seed)
+        results["scales"][str(rows)] = run_scale(path, args.repeat, not args.no_memory)
+
+    print_results(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# bitmap_index.py
+
+import numpy as np
+import pandas as pd
+
+import perf_spans as perf
+
+# Gepackte Bitmaps (1 Bit pro Zeile und Wert) nur bis zu diesem Speicherbedarf
+# pro Attribut; darüber wird über die Wert-Codes gearbeitet.
+BITMAP_BUDGET_BYTES = 32 * 1024 * 1024
+
+# -------------------------------
+# Index aufbauen
+# -------------------------------
+
+def _sorted_order(values):
+    try:
+        return sorted(range(len(values)), key=values.__getitem__)
+    except TypeError:  # gemischte Typen (z.B. 1 und "1/200")
+        return sorted(range(len(values)), key=lambda i: str(values[i]))
+
+
+def build_value_index(series: pd.Series):
+    """
+    Invertierter Index Wert -> Zeilen für ein kategoriales Attribut.
+
+    Liefert ein dict mit den sortierten Werten, einem int32-Code je Zeile
+    (-1 = leer) und – wenn es ins Budget passt – einer gepackten Bitmap je
+    Wert. None, wenn die Spalte nicht indexierbar ist (z.B. Listen).
+    """
+    try:
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            uniques = series.cat.categories.tolist()
+        else:
+            codes, uniques = pd.factorize(series)
+            uniques = uniques.tolist()
+    except TypeError:
+        return None
+
+    # Codes so umnummerieren, dass sie der sortierten Werteliste entsprechen
+    order = _sorted_order(uniques)
+    rank = np.empty(len(uniques) + 1, dtype=np.int32)
+    rank[order] = np.arange(len(uniques), dtype=np.int32)
+    rank[-1] = -1
+    codes = rank[codes]
+
+    values = [uniques[i] for i in order]
+    n = len(series)
+
+    bits = None
+    if len(values) * ((n + 7) // 8) <= BITMAP_BUDGET_BYTES:
+        bits = np.empty((len(values), (n + 7) // 8), dtype=np.uint8)
+        for code in range(len(values)):
+            bits[code] = np.packbits(codes == code)
+
+    try:
+        lookup = {v: i for i, v in enumerate(values)}
+    except TypeError:
+        return None
+
+    return {"n": n, "values": values, "lookup": lookup, "codes": codes, "bits": bits}
+
+
+def get_value_index(indexes, df, attr):
+    """
+    Index aus dem Cache holen, beim ersten Zugriff einmalig aufbauen.
+    Nicht indexierbare Attribute werden als None gemerkt.
+    """
+    if attr in indexes:
+        index = indexes[attr]
+        if index is None or index["n"] == len(df):
+            return index
+
+    with perf.span("index.build", rows=len(df), attr=attr):
+        index = build_value_index(df[attr])
+    indexes[attr] = index
+    return index
+
+# -------------------------------
+# Abfragen
+# -------------------------------
+
+def _selected_codes(index, selected):
+    lookup = index["lookup"]
+    return np.array(
+        sorted({lookup[v] for v in selected if v in lookup}), dtype=np.int64
+    )
+
+
+def index_mask(index, selected) -> np.ndarray:
+    """
+    Zeilenmaske für 'Wert ist einer der ausgewählten' (wie isin).
+    """
+    codes = _selected_codes(index, selected)
+    n = index["n"]
+
+    if codes.size == 0:
+        return np.zeros(n, dtype=bool)
+
+    if index["bits"] is not None:
+        ored = np.bitwise_or.reduce(index["bits"][codes], axis=0)
+        return np.unpackbits(ored, count=n).astype(bool)
+
+    lut = np.zeros(len(index["values"]) + 1, dtype=bool)
+    lut[codes] = True
+    return lut[index["codes"]]
+
+
+def available_values(index, context_mask=None):
+    """
+    Werte, die unter der Kontextmaske noch vorkommen, in sortierter Reihenfolge.
+    """
+    values = index["values"]
+    if context_mask is None:
+        return list(values)
+
+    if index["bits"] is not None:
+        ctx = np.packbits(context_mask)
+        hits = np.bitwise_and(index["bits"], ctx).any(axis=1)
+    else:
+        codes = index["codes"][context_mask]
+        hits = np.bincount(codes[codes >= 0], minlength=len(values)) > 0
+
+    return [values[i] for i in np.flatnonzero(hits)]
+
+
+def value_counts(index, context_mask=None) -> np.ndarray:
+    """
+    Trefferzahl je Wert (in der Reihenfolge von index["values"]) unter der
+    Kontextmaske – ein bincount über die Wert-Codes.
+    """
+    codes = index["codes"]
+    if context_mask is not None:
+        codes = codes[context_mask]
+    return np.bincount(codes[codes >= 0], minlength=len(index["values"]))
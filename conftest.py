@@ -0,0 +1,81 @@
+# conftest.py
+#
+# Gemeinsame Testhilfen: kleine ExifTool-JSONs und eine per AppTest
+# gesteuerte Oberfläche.
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+
+
+def make_records(n: int, extra=None):
+    """
+    n Datensätze wie "exiftool -json"; extra(i) kann je Zeile weitere
+    Attribute liefern.
+    """
+    makes = ["Canon", "Nikon", "Apple"]
+    records = []
+    for i in range(n):
+        rec = {
+            "SourceFile": f"./{2020 + i % 3}/IMG_{i:05d}.{'mp4' if i % 10 == 0 else 'jpg'}",
+            "FileName": f"IMG_{i:05d}.{'mp4' if i % 10 == 0 else 'jpg'}",
+            "Make": makes[i % 3],
+            "ISO": [100, 200, 400, 800, 1600, 3200, 6400, 50, 64, 125, 250][i % 11],
+            "DateTimeOriginal": f"{2020 + i % 3}:{1 + i % 12:02d}:{1 + i % 28:02d} {i % 24:02d}:00:00",
+        }
+        if extra is not None:
+            rec.update(extra(i))
+        records.append(rec)
+    return records
+
+
+@pytest.fixture
+def write_meta(tmp_path):
+    def write(records, name="meta.json"):
+        path = tmp_path / name
+        path.write_text(json.dumps(records), encoding="utf-8")
+        return path
+    return write
+
+
+@pytest.fixture
+def open_app():
+    """
+    Startet die App, liest meta_dir ein und liefert das AppTest-Objekt.
+    """
+    st_testing = pytest.importorskip("streamlit.testing.v1")
+
+    def start(meta_dir, lazy=False, cache=True):
+        at = st_testing.AppTest.from_file(str(ROOT / "streamlit_app.py"), default_timeout=120)
+        at.run()
+        at.text_input[0].set_value(str(meta_dir)).run()
+        next(c for c in at.checkbox if c.label == "Cache verwenden").set_value(cache)
+        next(c for c in at.checkbox if c.label == "Nur benötigte Attribute laden").set_value(lazy)
+        next(b for b in at.button if "einlesen" in b.label).click().run()
+        assert not at.exception, [e.value for e in at.exception]
+        return at
+
+    return start
+
+
+def apply_attributes(at, names):
+    """
+    Wählt Attribute über die Suche aus und drückt "Anwenden".
+    """
+    for name in names:
+        next(t for t in at.text_input if t.label.startswith("Suche")).set_value(name).run()
+        next(c for c in at.checkbox if c.key == f"attr_check_{name}").check().run()
+    next(t for t in at.text_input if t.label.startswith("Suche")).set_value("").run()
+    next(b for b in at.button if b.label.strip("🚀 ").strip() == "Anwenden").click().run()
+    return at
+
+
+def apply_filters(at):
+    next(b for b in at.button if "Medienbestand" in b.label).click().run()
+    return int(at.metric[0].value.replace(",", "").replace(".", ""))
+
@@ -0,0 +1,245 @@
+# dataset_registry.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+import metadata_cache as mc
+import ui_auxiliary as uia
+
+# Gemeinsamer Speicherrahmen aller Sitzungen im Streamlit-Prozess
+MEMORY_BUDGET_BYTES = int(os.environ.get("METAEXPLORER_MEMORY_BUDGET_MB", "4096")) * 1024 ** 2
+MAX_DATASETS = int(os.environ.get("METAEXPLORER_MAX_DATASETS", "4"))
+
+# -------------------------------
+# Registry (einmal pro Prozess)
+# -------------------------------
+
+@st.cache_resource(show_spinner=False)
+def _registry():
+    """
+    Prozessweite Registry: alle Browser-Tabs und Nutzer lesen dieselben
+    DataFrames, statt jeweils eine eigene Kopie zu laden.
+    """
+    return {
+        "lock": threading.RLock(),
+        "entries": OrderedDict(),
+        "loading": {},
+    }
+
+
+def _file_key(meta_file: Path) -> tuple:
+    st_ = os.stat(meta_file)
+    return str(Path(meta_file).resolve()), st_.st_size, st_.st_mtime_ns
+
+
+def dataset_key(meta_file, lazy: bool = False) -> tuple:
+    """
+    Schlüssel aus Datei(en), Version und Modus. meta_file darf auch eine
+    Liste sein (mehrere JSONs als ein Bestand).
+    """
+    mode = "lazy" if lazy else "full"
+    if isinstance(meta_file, (list, tuple)):
+        files = tuple(_file_key(f) for f in sorted(Path(f) for f in meta_file))
+        return ("multi", files, mode)
+    return _file_key(meta_file) + (mode,)
+
+
+def _entry_nbytes(df) -> int:
+    report = df.attrs.get("memory_report")
+    if report and report.get("after"):
+        return int(report["after"])
+    return int(df.memory_usage(index=False, deep=True).sum())
+
+
+def _evict(registry, keep=None):
+    """
+    Verdrängt die am längsten nicht benutzten Datensätze, bis Anzahl und
+    Speicherbedarf im Rahmen sind. Der gerade benutzte bleibt immer.
+    """
+    entries = registry["entries"]
+
+    def over_limit():
+        total = sum(e["nbytes"] for e in entries.values())
+        return len(entries) > MAX_DATASETS or total > MEMORY_BUDGET_BYTES
+
+    for key in [k for k in entries if k != keep]:
+        if not over_limit():
+            break
+        entries.pop(key)
+
+# -------------------------------
+# Zugriff
+# -------------------------------
+
+def lookup(key):
+    registry = _registry()
+    with registry["lock"]:
+        entry = registry["entries"].get(key)
+        if entry is not None:
+            registry["entries"].move_to_end(key)
+            entry["last_used"] = time.time()
+        return entry
+
+
+def get_dataset(meta_file, use_cache: bool = True, lazy: bool = False, progress=None):
+    """
+    Liefert den gemeinsamen Datensatz zu (Datei, Version, Modus) und lädt
+    ihn nur, wenn noch keine Sitzung das getan hat. Das Ergebnis ist
+    schreibgeschützt zu behandeln; nachgeladene Spalten laufen über
+    add_columns.
+    """
+    multi = isinstance(meta_file, (list, tuple))
+    meta_file = sorted(Path(f) for f in meta_file) if multi else Path(meta_file)
+    lazy = lazy and not multi  # zweiphasiges Laden nur für eine Datei
+    key = dataset_key(meta_file, lazy)
+    registry = _registry()
+
+    entry = lookup(key)
+    if entry is not None:
+        return entry
+
+    # Pro Schlüssel nur ein Ladevorgang, parallele Sitzungen warten darauf
+    with registry["lock"]:
+        load_lock = registry["loading"].setdefault(key, threading.Lock())
+
+    with load_lock:
+        entry = lookup(key)
+        if entry is not None:
+            return entry
+
+        if multi:
+            df, types, stats, from_cache = mc.load_metadata_files_cached(
+                meta_file, use_cache=use_cache, progress=progress
+            )
+        elif lazy:
+            df, types, stats, from_cache = mc.load_catalog_cached(
+                meta_file, use_cache=use_cache, progress=progress
+            )
+        else:
+            df, types, stats, from_cache = mc.load_metadata_cached(
+                meta_file, use_cache=use_cache, progress=progress
+            )
+
+        entry = {
+            "key": key,
+            "meta_file": meta_file,
+            "use_cache": use_cache,
+            "lazy": lazy,
+            "multi": multi,
+            "df": df,
+            "types": types,
+            "stats": stats,
+            "from_cache": from_cache,
+            # abgeleitete, für alle Sitzungen gleiche Strukturen
+            "datetime_store": uia.new_datetime_store(df.attrs.get("datetime_formats")),
+            "value_indexes": {},
+            "attribute_catalog": None,
+            "lock": threading.RLock(),
+            "nbytes": _entry_nbytes(df),
+            "last_used": time.time(),
+            # wird bei jeder Änderung des Datenbestands erhöht
+            "version": 0,
+        }
+
+        with registry["lock"]:
+            registry["entries"][key] = entry
+            registry["loading"].pop(key, None)
+            _evict(registry, keep=key)
+
+    return entry
+
+
+def add_columns(entry, columns_df):
+    """
+    Nachgeladene Spalten (zweiphasiger Modus) in den gemeinsamen Datensatz
+    übernehmen, damit auch andere Sitzungen sie nicht erneut laden.
+
+    Der geteilte Frame wird nie verändert: es entsteht ein neuer (ein
+    concat), der den alten unter der Sperre ersetzt. Sitzungen, die gerade
+    den alten lesen, bleiben unberührt. Die Zeilen ändern sich nicht, die
+    Werte- und Datums-Indizes bleiben daher gültig.
+    """
+    registry = _registry()
+    with entry["lock"]:
+        df = entry["df"]
+        new = [c for c in columns_df.columns if c not in df.columns]
+        if not new:
+            return
+        extra = pd.DataFrame({c: columns_df[c].to_numpy() for c in new}, index=df.index)
+        out = pd.concat([df, extra], axis=1)
+        out.attrs.update(df.attrs)
+
+        with registry["lock"]:
+            entry["df"] = out
+            entry["nbytes"] += int(extra.memory_usage(index=False, deep=True).sum())
+            entry["version"] += 1
+            _evict(registry, keep=entry["key"])
+
+
+def ensure_columns(entry, columns):
+    """
+    Fehlende Spalten (zweiphasiger Modus) nachladen und übernehmen;
+    liefert die nachgeladenen Namen.
+    """
+    df = entry["df"]
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        extra = mc.load_columns_cached(
+            entry["meta_file"],
+            missing,
+            use_cache=entry["use_cache"],
+            parsers=df.attrs.get("value_parsers")
+        )
+        add_columns(entry, extra[missing])
+    return missing
+
+
+def replace_dataset(entry, df, types, stats):
+    """
+    Ersetzt den Datenbestand eines Eintrags (z.B. nach einem Delta-Abgleich).
+    Abgeleitete Strukturen werden verworfen; Sitzungen erkennen die
+    Änderung an der Version.
+    """
+    with entry["lock"]:
+        entry["df"] = df
+        entry["types"] = types
+        entry["stats"] = stats
+        entry["datetime_store"] = uia.new_datetime_store(df.attrs.get("datetime_formats"))
+        entry["value_indexes"] = {}
+        entry["attribute_catalog"] = None
+        entry["nbytes"] = _entry_nbytes(df)
+        entry["version"] += 1
+
+    registry = _registry()
+    with registry["lock"]:
+        _evict(registry, keep=entry["key"])
+
+
+def list_datasets():
+    registry = _registry()
+    with registry["lock"]:
+        return [
+            {
+                "Datei": (
+                    f"{len(e['meta_file'])} Dateien" if e["multi"]
+                    else Path(e["key"][0]).name
+                ),
+                "Modus": e["key"][-1],
+                "Zeilen": len(e["df"]),
+                "Spalten": len(e["df"].columns),
+                "Speicher": uia.format_bytes(e["nbytes"]),
+            }
+            for e in reversed(registry["entries"].values())
+        ]
+
+
+def memory_in_use() -> int:
+    registry = _registry()
+    with registry["lock"]:
+        return sum(e["nbytes"] for e in registry["entries"].values())
@@ -0,0 +1,451 @@
+# duckdb_backend.py
+
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:  # ohne duckdb bleibt alles im pandas-Backend
+    duckdb = None
+
+import filter_engine as fe
+import geo_index as geo
+import metadata_cache as mc
+import metadata_core as core
+
+# Ab so vielen Zeilen wird nicht mehr in den Speicher geladen, sondern
+# direkt auf dem Parquet-Cache abgefragt
+OUT_OF_CORE_MIN_ROWS = int(os.environ.get("METAEXPLORER_OUT_OF_CORE_ROWS", "2000000"))
+
+PAGE_SIZE = 500
+# Höchstzahl der Auswahlwerte eines Widgets (die Filterwerte selbst sind
+# davon nicht betroffen)
+MAX_FACET_VALUES = 2000
+
+# gleiche Zerlegung wie metadata_core._EXIF_DATETIME_RE (RE2 ohne Gruppennamen)
+_DATETIME_RE = (
+    r"^\s*(\d{4})[:\-](\d{2})[:\-](\d{2})"
+    r"(?:[ T](\d{2}):(\d{2})(?::(\d{2}))?(?:\.\d+)?)?"
+    r"\s*(Z|[+\-]\d{2}:?\d{2})?\s*$"
+)
+_DATETIME_GROUPS = ["year", "month", "day", "hour", "minute", "second", "tz"]
+
+# Koordinatenpaar wie value_parsers.parse_coordinates (Höhe dahinter erlaubt)
+_DMS_RE = r"([+\-]?\d+(?:\.\d+)?)(?:\s*deg)?(?:\s*(\d+(?:\.\d+)?)')?(?:\s*(\d+(?:\.\d+)?)\")?\s*([NSEW])?"
+_COORD_RE = rf"^\s*{_DMS_RE}\s*[,\s]\s*{_DMS_RE}"
+_COORD_GROUPS = ["lat_deg", "lat_min", "lat_sec", "lat_ref", "lon_deg", "lon_min", "lon_sec", "lon_ref"]
+
+# SQL-Ausdruck je Datumskomponente, passend zu pandas (weekday: Montag = 0)
+_PART_SQL = {
+    "year": "year({ts})",
+    "month": "month({ts})",
+    "weekday": "isodow({ts}) - 1",
+    "hour": "hour({ts})",
+}
+
+
+def backend_available() -> bool:
+    return duckdb is not None and mc.cache_available()
+
+# -------------------------------
+# Katalog
+# -------------------------------
+
+def catalog_source(meta_file):
+    """
+    Gültiger Parquet-Cache zu einem JSON (oder einer Liste von JSONs):
+    (pfad, cache_metadaten) oder None.
+    """
+    if isinstance(meta_file, (list, tuple)):
+        meta_files = sorted(Path(f) for f in meta_file)
+        path = mc.catalog_cache_path(meta_files)
+        meta = mc.read_cache_meta(meta_files[0], path)
+        valid = meta is not None and mc.is_catalog_cache_valid(meta_files, meta)
+    else:
+        path = mc.cache_path(Path(meta_file))
+        meta = mc.read_cache_meta(Path(meta_file))
+        valid = meta is not None and mc.is_cache_valid(Path(meta_file), meta)
+    return (path, meta) if valid else None
+
+
+def should_use(meta_file) -> bool:
+    """
+    Automatische Wahl: nur mit duckdb, gültigem Cache und großem Bestand.
+    """
+    if not backend_available():
+        return False
+    source = catalog_source(meta_file)
+    return source is not None and source[1].get("rows", 0) >= OUT_OF_CORE_MIN_ROWS
+
+
+def open_catalog(path, meta) -> dict:
+    """
+    Beschreibung eines Parquet-Katalogs; es werden keine Zeilen gelesen.
+    """
+    columns = set(mc.pq.read_schema(path).names)
+    return {
+        "path": str(path),
+        "rows": meta.get("rows", 0),
+        "types": meta["types"],
+        "stats": meta["stats"],
+        "json_columns": set(meta.get("json_columns", [])),
+        "columns": columns,
+    }
+
+
+def _connect():
+    # eigene In-Memory-Verbindung je Abfrage: Streamlit-Sitzungen laufen in
+    # verschiedenen Threads
+    return duckdb.connect()
+
+# -------------------------------
+# Filter -> SQL
+# -------------------------------
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _ts_sql(col: str) -> str:
+    """
+    Zeitstempel (UTC) aus einem ExifTool-Text, wie _parse_datetime_values.
+    """
+    p = f"regexp_extract(CAST({_quote(col)} AS VARCHAR), '{_DATETIME_RE}', {_DATETIME_GROUPS!r})"
+    tz = f"replace({p}.tz, ':', '')"
+    offset = (
+        f"CASE WHEN {p}.tz IN ('', 'Z') THEN 0 "
+        f"ELSE (CASE WHEN {tz}[1] = '-' THEN -1 ELSE 1 END) * "
+        f"(CAST({tz}[2:3] AS INTEGER) * 60 + CAST({tz}[4:5] AS INTEGER)) END"
+    )
+    return (
+        f"CASE WHEN {p}.year = '' THEN NULL ELSE try(make_timestamp("
+        f"CAST({p}.year AS BIGINT), CAST({p}.month AS BIGINT), CAST({p}.day AS BIGINT), "
+        f"coalesce(CAST(nullif({p}.hour, '') AS BIGINT), 0), "
+        f"coalesce(CAST(nullif({p}.minute, '') AS BIGINT), 0), "
+        f"coalesce(CAST(nullif({p}.second, '') AS DOUBLE), 0)"
+        f") - to_minutes({offset})) END"
+    )
+
+
+def _coords_sql(col: str):
+    """
+    (breite, länge) als DOUBLE aus einem Koordinatentext; NULL, wenn er
+    nicht passt oder außerhalb von ±90/±180 liegt.
+    """
+    regex = _COORD_RE.replace("'", "''")
+    p = f"regexp_extract(CAST({_quote(col)} AS VARCHAR), '{regex}', {_COORD_GROUPS!r})"
+
+    def value(prefix, limit):
+        v = (
+            f"((CAST(nullif({p}.{prefix}_deg, '') AS DOUBLE) "
+            f"+ coalesce(CAST(nullif({p}.{prefix}_min, '') AS DOUBLE), 0) / 60 "
+            f"+ coalesce(CAST(nullif({p}.{prefix}_sec, '') AS DOUBLE), 0) / 3600) "
+            f"* CASE WHEN {p}.{prefix}_ref IN ('S', 'W') THEN -1 ELSE 1 END)"
+        )
+        return f"(CASE WHEN abs({v}) <= {limit} THEN {v} END)"
+
+    return value("lat", 90), value("lon", 180)
+
+
+def _geo_sql(col: str, f):
+    """
+    WHERE-Teil eines GPS-Filters (Rechteck oder Umkreis) und Parameter.
+    """
+    lat, lon = _coords_sql(col)
+    boxes, params = [], []
+    for south, west, north, east in geo.boxes(f):
+        boxes.append(f"({lat} BETWEEN ? AND ? AND {lon} BETWEEN ? AND ?)")
+        params.extend([south, north, west, east])
+    sql = "(" + " OR ".join(boxes) + ")"
+
+    if "center" in f:
+        c_lat, c_lon = f["center"]
+        sql += (
+            f" AND 2 * {geo.EARTH_RADIUS_KM} * asin(sqrt(least(1, "
+            f"pow(sin(radians({lat} - ?) / 2), 2) "
+            f"+ cos(radians(?)) * cos(radians({lat})) * pow(sin(radians({lon} - ?) / 2), 2)"
+            f"))) <= ?"
+        )
+        params.extend([c_lat, c_lat, c_lon, f["radius_km"]])
+    return sql, params
+
+
+def _source_file_sql(catalog) -> str:
+    if "SourceFile" in catalog["columns"]:
+        return _quote("SourceFile")
+    return f"{_quote(core.SOURCE_DIR_COL)} || {_quote(core.SOURCE_NAME_COL)}"
+
+
+def _source_name_sql(catalog) -> str:
+    if core.SOURCE_NAME_COL in catalog["columns"]:
+        return _quote(core.SOURCE_NAME_COL)
+    return _quote("SourceFile")
+
+
+def _encode_value(catalog, attr, value):
+    # gemischte Spalten liegen als JSON-Text im Parquet
+    if attr in catalog["json_columns"]:
+        return json.dumps(value, ensure_ascii=False, default=mc._json_default)
+    return value
+
+
+def _json_elements_sql(col) -> str:
+    """
+    Elemente einer JSON-Liste als JSON-Texte (leer für Einzelwerte).
+    """
+    return (
+        f"CAST(from_json(CASE WHEN json_type({col}) = 'ARRAY' THEN {col} ELSE '[]' END, "
+        f"'[\"json\"]') AS VARCHAR[])"
+    )
+
+
+def compile_filters(catalog, filters, types, media_filter, exclude_attr=None):
+    """
+    Übersetzt den Filterzustand (wie bei core.filter_mask) in eine
+    WHERE-Bedingung. Liefert (sql, parameter); leere Filter sind passiv.
+    """
+    conditions, params = [], []
+
+    for attr, f in filters.items():
+        if attr == exclude_attr or not f:
+            continue
+        col = _quote(attr)
+        attr_type = types[attr]
+
+        if attr_type == "datetime":
+            for part in core.DATETIME_PARTS:
+                if f.get(part):
+                    expr = _PART_SQL[part].format(ts=_ts_sql(attr))
+                    conditions.append(f"{expr} IN ({', '.join('?' * len(f[part]))})")
+                    params.extend(int(v) for v in f[part])
+
+        elif attr_type == "numeric":
+            conditions.append(f"{col} BETWEEN ? AND ?")
+            params.extend([float(f[0]), float(f[1])])
+
+        elif attr_type == "gps":
+            sql, geo_params = _geo_sql(attr, f)
+            conditions.append(sql)
+            params.extend(geo_params)
+
+        elif isinstance(f, list):
+            values = [_encode_value(catalog, attr, v) for v in f]
+            marks = ", ".join("?" * len(values))
+            if attr in catalog["json_columns"]:
+                # Listen passen über eines ihrer Elemente (wie core.categorical_mask)
+                conditions.append(
+                    f"({col} IN ({marks}) OR list_has_any({_json_elements_sql(col)}, [{marks}]))"
+                )
+                params.extend(values + values)
+            else:
+                conditions.append(f"{col} IN ({marks})")
+                params.extend(values)
+
+    if media_filter in ("Nur Bilder", "Nur Videos"):
+        exts = core.IMAGE_EXTS if media_filter == "Nur Bilder" else core.VIDEO_EXTS
+        name = f"lower({_source_name_sql(catalog)})"
+        conditions.append("(" + " OR ".join(f"suffix({name}, ?)" for _ in exts) + ")")
+        params.extend(sorted(exts))
+
+    return (" AND ".join(conditions) if conditions else "TRUE"), params
+
+
+def _from_sql(catalog) -> str:
+    path = catalog["path"].replace("'", "''")
+    return f"read_parquet('{path}', file_row_number = true)"
+
+# -------------------------------
+# Abfragen
+# -------------------------------
+
+def count_matches(catalog, filters, types, media_filter) -> int:
+    where, params = compile_filters(catalog, filters, types, media_filter)
+    with _connect() as con:
+        return con.execute(
+            f"SELECT count(*) FROM {_from_sql(catalog)} WHERE {where}", params
+        ).fetchone()[0]
+
+
+def query_source_files(catalog, filters, types, media_filter, page: int = 0, page_size: int = PAGE_SIZE):
+    """
+    Eine Seite der passenden SourceFile-Pfade in Katalog-Reihenfolge.
+    """
+    where, params = compile_filters(catalog, filters, types, media_filter)
+    sql = (
+        f"SELECT {_source_file_sql(catalog)} AS SourceFile FROM {_from_sql(catalog)} "
+        f"WHERE {where} ORDER BY file_row_number LIMIT ? OFFSET ?"
+    )
+    with _connect() as con:
+        rows = con.execute(sql, params + [page_size, page * page_size]).fetchall()
+    return [r[0] for r in rows]
+
+
+def iter_source_files(catalog, filters, types, media_filter, chunk_size: int = 100_000):
+    """
+    Alle passenden Pfade blockweise (für Export, Slideshow, Explorer).
+    """
+    where, params = compile_filters(catalog, filters, types, media_filter)
+    sql = (
+        f"SELECT {_source_file_sql(catalog)} FROM {_from_sql(catalog)} "
+        f"WHERE {where} ORDER BY file_row_number"
+    )
+    with _connect() as con:
+        cursor = con.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield [r[0] for r in rows]
+
+
+# Arrow-Typname -> nullable pandas-Typ für die Export-Blöcke
+_NULLABLE_TYPES = {
+    "int8": pd.Int8Dtype(), "int16": pd.Int16Dtype(),
+    "int32": pd.Int32Dtype(), "int64": pd.Int64Dtype(),
+    "uint8": pd.UInt8Dtype(), "uint16": pd.UInt16Dtype(),
+    "uint32": pd.UInt32Dtype(), "uint64": pd.UInt64Dtype(),
+    "bool": pd.BooleanDtype(),
+}
+
+
+def iter_frames(catalog, filters, types, media_filter, columns=(), chunk_size: int = 50_000):
+    """
+    Passende Zeilen als DataFrame-Blöcke (SourceFile + columns), für den
+    Export im gleichen Format wie export.iter_frames.
+    """
+    columns = [c for c in columns if c != "SourceFile" and c in catalog["columns"]]
+    where, params = compile_filters(catalog, filters, types, media_filter)
+    select = ", ".join([f"{_source_file_sql(catalog)} AS SourceFile"] + [_quote(c) for c in columns])
+    sql = f"SELECT {select} FROM {_from_sql(catalog)} WHERE {where} ORDER BY file_row_number"
+
+    with _connect() as con:
+        reader = con.execute(sql, params).fetch_record_batch(chunk_size)
+        for batch in reader:
+            # nullable Typen: sonst hinge int/bool vom NULL-Anteil des Blocks ab
+            frame = batch.to_pandas(types_mapper=lambda t: _NULLABLE_TYPES.get(str(t)))
+            for col in columns:
+                if col in catalog["json_columns"]:
+                    frame[col] = mc._decode_json_column(frame[col])
+            yield frame
+
+
+def _numeric_bounds(con, src, col):
+    lo, hi = con.execute(f"SELECT min({col}), max({col}) FROM {src}").fetchone()
+    return None if lo is None else (float(lo), float(hi))
+
+
+def facet_counts(catalog, attr, filters, types, media_filter, bins: int = fe.HISTOGRAM_BINS):
+    """
+    Trefferzahlen je Auswahlwert unter allen anderen Filtern, in derselben
+    Form wie fe.facet_counts: categorical -> {wert: anzahl} (sortiert),
+    datetime -> {komponente: {wert: anzahl}}, numeric -> Histogramm über
+    den ganzen Wertebereich, gps -> {"count", "bounds"}. Je Attribut genau
+    eine Abfrage.
+    """
+    attr_type = types[attr]
+    col = _quote(attr)
+    src = _from_sql(catalog)
+    where, params = compile_filters(catalog, filters, types, media_filter, exclude_attr=attr)
+
+    with _connect() as con:
+        if attr_type == "numeric":
+            bounds = _numeric_bounds(con, src, col)
+            if bounds is None:
+                return None
+            lo, hi = bounds
+            width = (hi - lo) or 1.0
+            rows = con.execute(
+                f"SELECT least(CAST(floor(({col} - ?) / ? * ?) AS INTEGER), ?) AS b, count(*) "
+                f"FROM {src} WHERE {where} AND {col} IS NOT NULL GROUP BY b",
+                [lo, width, bins, bins - 1] + params
+            ).fetchall()
+            counts = [0] * bins
+            for b, n in rows:
+                counts[b] += n
+            edges = [lo + width * i / bins for i in range(bins + 1)]
+            return {"counts": counts, "edges": edges, "range": bounds}
+
+        if attr_type == "gps":
+            lat, lon = _coords_sql(attr)
+            count, south, west, north, east = con.execute(
+                f"SELECT count(lat), min(lat), min(lon), max(lat), max(lon) "
+                f"FROM (SELECT {lat} AS lat, {lon} AS lon FROM {src} WHERE {where})",
+                params
+            ).fetchone()
+            return {"count": count, "bounds": None if not count else (south, west, north, east)}
+
+        if attr_type == "datetime":
+            # alle vier Komponenten in einem Durchgang (GROUPING SETS)
+            ts = _ts_sql(attr)
+            parts = core.DATETIME_PARTS
+            select = ", ".join(f"{_PART_SQL[p].format(ts='ts')} AS {p}" for p in parts)
+            rows = con.execute(
+                f"SELECT {', '.join(f'grouping({p})' for p in parts)}, {', '.join(parts)}, count(*) "
+                f"FROM (SELECT {select} FROM (SELECT {ts} AS ts FROM {src} WHERE {where})) "
+                f"GROUP BY GROUPING SETS ({', '.join(f'({p})' for p in parts)})",
+                params
+            ).fetchall()
+            result = {p: {} for p in parts}
+            k = len(parts)
+            for row in rows:
+                i = list(row[:k]).index(0)
+                value = row[k + i]
+                if value is not None:
+                    result[parts[i]][int(value)] = row[-1]
+            return {p: dict(sorted(c.items())) for p, c in result.items()}
+
+    return value_counts(catalog, attr, filters, types, media_filter)[0]
+
+
+def value_counts(catalog, attr, filters, types, media_filter, limit=MAX_FACET_VALUES):
+    """
+    ({wert: anzahl} sortiert, gekürzt) eines kategorialen Attributs unter
+    allen anderen Filtern. limit=None liefert alle Werte; sonst die ersten
+    limit Werte und gekürzt=True, wenn es mehr gibt.
+    """
+    col = _quote(attr)
+    where, params = compile_filters(catalog, filters, types, media_filter, exclude_attr=attr)
+    limit_sql = "" if limit is None else f" LIMIT {int(limit) + 1}"
+    source = f"(SELECT {col} AS v FROM {_from_sql(catalog)} WHERE {where})"
+    if attr in catalog["json_columns"]:
+        # Listen zählen je Element einmal pro Zeile (wie core.option_counts)
+        source = (
+            f"(SELECT DISTINCT file_row_number, unnest(CASE WHEN json_type({col}) = 'ARRAY' "
+            f"THEN {_json_elements_sql(col)} ELSE [{col}] END) AS v "
+            f"FROM {_from_sql(catalog)} WHERE {where})"
+        )
+
+    with _connect() as con:
+        rows = con.execute(
+            f"SELECT v, count(*) FROM {source} WHERE v IS NOT NULL "
+            f"GROUP BY v ORDER BY v{limit_sql}",
+            params
+        ).fetchall()
+
+    truncated = limit is not None and len(rows) > limit
+    if truncated:
+        rows = rows[:limit]
+    if attr in catalog["json_columns"]:
+        rows = [(json.loads(v), n) for v, n in rows]
+        rows = [(v, n) for v, n in rows if v is not None and not isinstance(v, (list, dict))]
+    return dict(rows), truncated
+
+
+def facet_options(catalog, attr, filters, types, media_filter, limit=MAX_FACET_VALUES):
+    """
+    Auswahlwerte eines Attributs unter allen anderen Filtern (Kreuzfilter):
+    categorical -> sortierte Werte (höchstens limit, None = alle),
+    datetime -> {komponente: werte}, numeric -> (min, max) über den ganzen
+    Bestand.
+    """
+    if types[attr] == "numeric":
+        with _connect() as con:
+            return _numeric_bounds(con, _from_sql(catalog), _quote(attr))
+
+    if types[attr] == "datetime":
+        counts = facet_counts(catalog, attr, filters, types, media_filter)
+        return {part: list(c) for part, c in counts.items()}
+    return list(value_counts(catalog, attr, filters, types, media_filter, limit)[0])
@@ -0,0 +1,344 @@
+# export.py
+
+import errno
+import json
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # ohne pyarrow kein Parquet-Export
+    pa = None
+    pq = None
+
+import metadata_core as core
+import video_duration as vd
+
+# Format -> Dateiendung
+FORMATS = {
+    "csv": ".csv",
+    "jsonl": ".jsonl",
+    "parquet": ".parquet",
+    "m3u": ".m3u",
+}
+
+# Zeilen je Block beim Schreiben
+CHUNK_SIZE = 50_000
+
+# Kopierjob
+COPY_WORKERS = 4
+COPY_BUFFER = 1024 * 1024
+PART_SUFFIX = ".part"
+
+# -------------------------------
+# Blöcke erzeugen
+# -------------------------------
+
+def _dense(series: pd.Series) -> pd.Series:
+    if isinstance(series.dtype, pd.SparseDtype):
+        return series.sparse.to_dense()
+    return series
+
+
+def iter_frames(df, rows=None, columns=(), chunk_size: int = CHUNK_SIZE):
+    """
+    DataFrame-Blöcke mit SourceFile und den gewünschten Spalten.
+    rows: Zeilenpositionen oder boolesche Maske (None = alle).
+    """
+    if rows is None:
+        rows = np.arange(len(df))
+    rows = np.asarray(rows)
+    if rows.dtype == bool:
+        rows = np.flatnonzero(rows)
+    columns = [c for c in columns if c != "SourceFile" and c in df.columns]
+    # nur die benötigten Spalten blockweise herauslösen, nie den ganzen Frame
+    source = [c for c in ("SourceFile", core.SOURCE_DIR_COL, core.SOURCE_NAME_COL) if c in df.columns]
+    df = df[source + [c for c in columns if c not in source]]
+
+    for start in range(0, len(rows), chunk_size):
+        part = df.iloc[rows[start:start + chunk_size]]
+        frame = pd.DataFrame({"SourceFile": core.source_files(part).astype(str).to_numpy()})
+        for col in columns:
+            # .array behält den Spaltentyp (Int16 mit <NA>, category, ...):
+            # gleiche Typen in allen Blöcken, sonst kippt z.B. das Parquet-Schema
+            frame[col] = _dense(part[col]).array
+        yield frame
+
+
+def export_columns(df_columns, selected, fmt: str):
+    """
+    Spalten für den Export; für M3U kommen die Dauer-Spalten dazu.
+    """
+    columns = [c for c in selected if c != "SourceFile"]
+    if fmt == "m3u":
+        columns += [c for c in vd.DURATION_COLUMNS if c in df_columns and c not in columns]
+    return columns
+
+# -------------------------------
+# Schreiben
+# -------------------------------
+
+def _write_csv(frames, f):
+    n = 0
+    for frame in frames:
+        frame.to_csv(f, header=n == 0, index=False)
+        n += len(frame)
+    if n == 0:
+        f.write("SourceFile\n")
+    return n
+
+
+def _write_jsonl(frames, f):
+    n = 0
+    for frame in frames:
+        records = frame.astype(object).where(frame.notna(), None).to_dict("records")
+        f.writelines(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records)
+        n += len(frame)
+    return n
+
+
+def _write_m3u(frames, f):
+    f.write("#EXTM3U\n")
+    n = 0
+    for frame in frames:
+        durations = vd.durations_from_df(frame)
+        for path in frame["SourceFile"]:
+            seconds = durations.get(path)
+            length = int(round(seconds)) if seconds else -1
+            f.write(f"#EXTINF:{length},{Path(path).stem}\n{path}\n")
+        n += len(frame)
+    return n
+
+
+def _parquet_column(series: pd.Series):
+    # gemischte/verschachtelte Werte wie im Cache als JSON-Text, damit das
+    # Schema über alle Blöcke gleich bleibt
+    if series.dtype == object:
+        series = series.map(
+            lambda v: v if isinstance(v, str) or v is None
+            else None if not isinstance(v, (list, dict, tuple)) and pd.isna(v)
+            else json.dumps(v, ensure_ascii=False, default=str)
+        )
+        return pa.array(series, type=pa.string(), from_pandas=True)
+    return pa.array(series, from_pandas=True)
+
+
+def _write_parquet(frames, path):
+    if pa is None:
+        raise RuntimeError("Parquet-Export benötigt pyarrow")
+
+    writer, n = None, 0
+    try:
+        for frame in frames:
+            table = pa.Table.from_arrays(
+                [_parquet_column(frame[c]) for c in frame.columns],
+                names=[str(c) for c in frame.columns]
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            else:
+                try:
+                    table = table.cast(writer.schema)
+                except pa.ArrowException as e:
+                    raise RuntimeError(f"Parquet-Export: Spaltentypen wechseln zwischen den Blöcken ({e})") from e
+            writer.write_table(table)
+            n += len(frame)
+        if writer is None:
+            pq.write_table(pa.table({"SourceFile": pa.array([], type=pa.string())}), path)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n
+
+
+def write_export(frames, path, fmt: str = None, progress=None) -> int:
+    """
+    Schreibt DataFrame-Blöcke (iter_frames oder DuckDB) als CSV, JSONL,
+    Parquet oder M3U. Geschrieben wird in eine temporäre Datei, die erst
+    am Ende umbenannt wird. progress(zeilen) nach jedem Block.
+    Liefert die Anzahl Zeilen.
+    """
+    path = Path(path)
+    fmt = fmt or format_for_path(path)
+
+    def counted(frames):
+        done = 0
+        for frame in frames:
+            yield frame
+            done += len(frame)
+            if progress is not None:
+                progress(done)
+
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        if fmt == "parquet":
+            n = _write_parquet(counted(frames), tmp)
+        else:
+            writer = {"csv": _write_csv, "jsonl": _write_jsonl, "m3u": _write_m3u}[fmt]
+            with open(tmp, "w", newline="", encoding="utf-8") as f:
+                n = writer(counted(frames), f)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return n
+
+
+def write_stream(frames, out, fmt: str) -> int:
+    """
+    Wie write_export, aber in einen offenen Textstrom (z. B. stdout).
+    """
+    if fmt == "parquet":
+        raise ValueError("Parquet kann nicht in einen Textstrom geschrieben werden")
+    return {"csv": _write_csv, "jsonl": _write_jsonl, "m3u": _write_m3u}[fmt](frames, out)
+
+
+def format_for_path(path, default: str = "csv") -> str:
+    suffix = Path(path).suffix.lower() if path else ""
+    if suffix == ".ndjson":
+        return "jsonl"
+    return next((fmt for fmt, ext in FORMATS.items() if ext == suffix), default)
+
+# -------------------------------
+# Dateien kopieren / verlinken
+# -------------------------------
+
+def new_copy_stats():
+    return {"copied": 0, "linked": 0, "skipped": 0, "missing": 0, "failed": 0,
+            "bytes": 0, "seconds": 0.0, "errors": []}
+
+
+def target_path(source, target_dir, base_dir=None) -> Path:
+    """
+    Ziel einer Datei im Zielordner: relativ zu base_dir, wenn die Datei
+    darunter liegt, sonst flach mit dem Dateinamen.
+    """
+    source = Path(source)
+    if base_dir is not None:
+        try:
+            return Path(target_dir) / source.resolve().relative_to(Path(base_dir).resolve())
+        except ValueError:
+            pass
+    return Path(target_dir) / source.name
+
+
+def _up_to_date(src_stat, dst: Path, mode: str) -> bool:
+    try:
+        dst_stat = dst.stat()
+    except OSError:
+        return False
+    if mode == "hardlink" and (dst_stat.st_ino, dst_stat.st_dev) == (src_stat.st_ino, src_stat.st_dev):
+        return True
+    # die Kopie übernimmt per copystat die Änderungszeit
+    return (dst_stat.st_size == src_stat.st_size
+            and int(dst_stat.st_mtime) >= int(src_stat.st_mtime))
+
+
+def _copy_file(src: Path, dst: Path):
+    # über eine .part-Datei, damit ein Abbruch keine halbe Kopie hinterlässt
+    part = dst.with_name(dst.name + PART_SUFFIX)
+    with open(src, "rb") as fin, open(part, "wb") as fout:
+        shutil.copyfileobj(fin, fout, COPY_BUFFER)
+    shutil.copystat(src, part)
+    os.replace(part, dst)
+
+
+def transfer_file(source, dst: Path, mode: str = "copy"):
+    """
+    Kopiert oder verlinkt eine Datei. Liefert (ergebnis, bytes) mit
+    ergebnis in copied/linked/skipped/missing.
+    """
+    src = Path(source)
+    try:
+        src_stat = src.stat()
+    except FileNotFoundError:
+        return "missing", 0
+
+    if _up_to_date(src_stat, dst, mode):
+        return "skipped", 0
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if mode == "hardlink":
+        dst.unlink(missing_ok=True)
+        try:
+            os.link(src, dst)
+            return "linked", 0
+        except OSError as e:
+            # anderes Laufwerk/Dateisystem -> kopieren
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+
+    _copy_file(src, dst)
+    return "copied", src_stat.st_size
+
+
+def copy_files(
+    paths,
+    target_dir,
+    mode: str = "copy",
+    base_dir=None,
+    workers: int = COPY_WORKERS,
+    stats=None,
+    progress=None
+):
+    """
+    Kopiert (mode="copy") oder verlinkt (mode="hardlink") alle Dateien in
+    den Zielordner. Aktuelle Ziele werden übersprungen, ein abgebrochener
+    Lauf setzt beim erneuten Aufruf einfach fort. Höchstens 2 × workers
+    Aufträge sind gleichzeitig offen, paths darf ein Generator sein.
+    progress(stats) nach jeder Datei. Liefert die Statistik.
+    """
+    stats = stats if stats is not None else new_copy_stats()
+    workers = max(1, int(workers))
+    paths = iter(paths)
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export") as pool:
+        pending = deque()
+
+        def fill():
+            while len(pending) < 2 * workers:
+                path = next(paths, None)
+                if path is None:
+                    return
+                dst = target_path(path, target_dir, base_dir)
+                pending.append((path, pool.submit(transfer_file, path, dst, mode)))
+
+        fill()
+        while pending:
+            path, future = pending.popleft()
+            try:
+                result, nbytes = future.result()
+                stats[result] += 1
+                stats["bytes"] += nbytes
+            except OSError as e:
+                stats["failed"] += 1
+                if len(stats["errors"]) < 20:
+                    stats["errors"].append(f"{path}: {e}")
+            fill()
+
+            stats["seconds"] = time.perf_counter() - started
+            if progress is not None:
+                progress(stats)
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def format_copy_stats(stats) -> str:
+    seconds = max(stats["seconds"], 1e-9)
+    done = stats["copied"] + stats["linked"]
+    return (
+        f"{done:,} übertragen, {stats['skipped']:,} aktuell, "
+        f"{stats['missing']:,} fehlen, {stats['failed']:,} Fehler – "
+        f"{core.format_bytes(stats['bytes'])} in {stats['seconds']:.1f} s "
+        f"({core.format_bytes(stats['bytes'] / seconds)}/s, {done / seconds:.0f} Dateien/s)"
+    )
@@ -0,0 +1,255 @@
+# filter_engine.py
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import bitmap_index as bi
+import geo_index as geo
+import metadata_core as core
+import perf_spans as perf
+
+# Pro Attribut werden die Masken der letzten Filterwerte behalten,
+# damit Hin- und Herschalten im Widget nicht neu rechnet.
+MASKS_PER_ATTRIBUTE = 4
+
+# Auswahl des GPS-Filters im Widget (Schlüssel "<attr>_geo_mode")
+GEO_OFF, GEO_BBOX, GEO_RADIUS = "Aus", "Rechteck", "Umkreis"
+GEO_MODES = [GEO_OFF, GEO_BBOX, GEO_RADIUS]
+
+# Facettenzählungen der letzten Filterzustände (über alle Attribute)
+FACETS_CACHED = 64
+HISTOGRAM_BINS = 30
+
+# -------------------------------
+# Filterzustand
+# -------------------------------
+
+def freeze_filter(f):
+    """
+    Macht einen Filterwert (Liste, Tupel, Dict der Datumskomponenten)
+    hashbar, damit er als Cache-Schlüssel taugt.
+    """
+    if isinstance(f, dict):
+        return tuple((k, freeze_filter(v)) for k, v in sorted(f.items()))
+    if isinstance(f, (list, tuple)):
+        return tuple(freeze_filter(v) for v in f)
+    return f
+
+
+def filters_from_state(state, attributes, types):
+    """
+    Liest die aktuellen Widget-Werte aus dem Session-State. So sehen alle
+    Attribute schon beim Rendern denselben, aktuellen Filterzustand.
+    """
+    filters = {}
+
+    for attr in attributes:
+        attr_type = types[attr]
+        if attr_type == "datetime":
+            filters[attr] = {
+                part: list(state.get(f"{attr}_{part}", []))
+                for part in core.DATETIME_PARTS
+            }
+        elif attr_type == "gps":
+            filters[attr] = _geo_filter_from_state(state, attr)
+        elif attr_type == "numeric":
+            # Slider noch nicht gerendert -> passiver Filter
+            value = state.get(f"{attr}_range")
+            valid = isinstance(value, (list, tuple)) and len(value) == 2
+            filters[attr] = tuple(value) if valid else None
+        else:
+            filters[attr] = list(state.get(f"{attr}_cat", []))
+
+    return filters
+
+
+def _geo_filter_from_state(state, attr):
+    mode = state.get(f"{attr}_geo_mode", GEO_OFF)
+    fields = {
+        GEO_BBOX: ("south", "west", "north", "east"),
+        GEO_RADIUS: ("lat", "lon", "radius"),
+    }.get(mode)
+    if fields is None:
+        return None
+    values = [state.get(f"{attr}_geo_{field}") for field in fields]
+    if any(v is None for v in values):  # Eingaben noch nicht gerendert
+        return None
+    return geo.bbox_filter(*values) if mode == GEO_BBOX else geo.radius_filter(*values)
+
+# -------------------------------
+# Masken-Cache
+# -------------------------------
+
+def attribute_mask(cache, df, attr, f, attr_type, dt_store=None, indexes=None):
+    """
+    Memoisierte Maske für (Attribut, Filterwert); None = Filter passiv.
+    Kategoriale und GPS-Filter laufen über den Werte- bzw. Gitter-Index,
+    sofern ein Index-Cache übergeben wird.
+    """
+    key = freeze_filter(f)
+    per_attr = cache.setdefault(attr, OrderedDict())
+
+    if key in per_attr:
+        per_attr.move_to_end(key)
+        return per_attr[key]
+
+    index = None
+    if indexes is not None and attr_type == "categorical" and f:
+        index = bi.get_value_index(indexes, df, attr)
+
+    if index is not None:
+        mask = bi.index_mask(index, f)
+    elif indexes is not None and attr_type == "gps" and f:
+        mask = geo.index_mask(geo.get_geo_index(indexes, df, attr), f)
+    else:
+        mask = core.attribute_filter_mask(df, attr, f, attr_type, dt_store)
+    per_attr[key] = mask
+    while len(per_attr) > MASKS_PER_ATTRIBUTE:
+        per_attr.popitem(last=False)
+    return mask
+
+
+def media_mask(cache, df, media_filter):
+    per_media = cache.setdefault(("__media__",), {})
+    if media_filter not in per_media:
+        per_media[media_filter] = core.media_filter_mask(df, media_filter)
+    return per_media[media_filter]
+
+
+def _and(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a & b
+
+# -------------------------------
+# Kreuzfilter
+# -------------------------------
+
+@perf.traced("filter.cross", rows=lambda args, kwargs: len(args[1]))
+def cross_filter_masks(cache, df, filters, types, media_filter, dt_store=None, indexes=None):
+    """
+    Liefert (gesamt_maske, {attribut: kontext_maske}).
+
+    Die Kontextmaske eines Attributs ist das UND aller anderen Filter
+    (plus Medienfilter). Sie ergibt sich aus Präfix- und Suffix-Produkten
+    der gecachten Einzelmasken, also mit O(k) Bitoperationen statt k
+    vollständigen Neuberechnungen.
+    """
+    attrs = list(filters)
+    masks = [
+        attribute_mask(cache, df, attr, filters[attr], types[attr], dt_store, indexes)
+        for attr in attrs
+    ]
+
+    prefix = [media_mask(cache, df, media_filter)]
+    for m in masks:
+        prefix.append(_and(prefix[-1], m))
+
+    suffix = [None]
+    for m in reversed(masks):
+        suffix.append(_and(suffix[-1], m))
+    suffix.reverse()
+
+    all_rows = np.ones(len(df), dtype=bool)
+
+    contexts = {}
+    for i, attr in enumerate(attrs):
+        ctx = _and(prefix[i], suffix[i + 1])
+        contexts[attr] = all_rows if ctx is None else ctx
+
+    total = prefix[-1]
+    return (all_rows if total is None else total), contexts
+
+# -------------------------------
+# Facettenzählung
+# -------------------------------
+
+def _numeric_values(series) -> np.ndarray:
+    try:
+        return series.to_numpy(dtype="float64", na_value=np.nan)
+    except (TypeError, ValueError):
+        return pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def numeric_histogram(series, context_mask=None, bins: int = HISTOGRAM_BINS):
+    """
+    Histogramm unter der Kontextmaske über den Wertebereich des ganzen
+    Bestands: {"counts": [...], "edges": [...], "range": (min, max)}.
+    """
+    values = _numeric_values(series)
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return None
+    lo, hi = float(values[valid].min()), float(values[valid].max())
+    if context_mask is not None:
+        valid &= context_mask
+    counts, edges = np.histogram(values[valid], bins=bins, range=(lo, hi) if hi > lo else (lo, lo + 1))
+    return {"counts": counts.tolist(), "edges": edges.tolist(), "range": (lo, hi)}
+
+
+def _count_facets(df, attr, attr_type, context_mask, dt_store=None, indexes=None):
+    if attr_type == "datetime":
+        comps = core.datetime_components(dt_store if dt_store is not None else {}, df, attr)
+        return {part: core.component_counts(comps[part], context_mask) for part in core.DATETIME_PARTS}
+
+    if attr_type == "numeric":
+        return numeric_histogram(df[attr], context_mask)
+
+    if attr_type == "gps":
+        index = geo.get_geo_index(indexes, df, attr) if indexes is not None else geo.build_geo_index(df[attr])
+        count, box = geo.bounds(index, context_mask)
+        return {"count": count, "bounds": box}
+
+    index = bi.get_value_index(indexes, df, attr) if indexes is not None else None
+    if index is not None:
+        counts = bi.value_counts(index, context_mask)
+        values = index["values"]
+        return {values[i]: int(counts[i]) for i in np.flatnonzero(counts)}
+
+    # ohne Index (z.B. Listen): Zählung über die Einzelwerte
+    return core.option_counts(df[attr], context_mask)
+
+
+def cached_facet(cache, attr, filters, media_filter, compute):
+    """
+    Facettenzählung eines Attributs aus dem Cache; compute() läuft nur, wenn
+    sich einer der übrigen Filter oder der Medienfilter geändert hat. Dient
+    auch den SQL-Zählungen im DuckDB-Modus.
+    """
+    others = {a: f for a, f in filters.items() if a != attr}
+    key = (attr, freeze_filter(others), media_filter)
+    per_facet = cache.setdefault(("__facets__",), OrderedDict())
+
+    if key in per_facet:
+        per_facet.move_to_end(key)
+        return per_facet[key]
+
+    counts = compute()
+    per_facet[key] = counts
+    while len(per_facet) > FACETS_CACHED:
+        per_facet.popitem(last=False)
+    return counts
+
+
+def facet_counts(cache, df, attr, filters, types, media_filter, context_mask,
+                 dt_store=None, indexes=None):
+    """
+    Trefferzahlen je Auswahlwert eines Attributs unter allen anderen Filtern:
+    categorical -> {wert: anzahl}, datetime -> {komponente: {wert: anzahl}},
+    numeric -> Histogramm (siehe numeric_histogram), gps -> {"count", "bounds"}
+    (Dateien mit Koordinaten und ihr umschließendes Rechteck).
+    None = keine numerischen Werte.
+
+    context_mask ist die Kontextmaske aus cross_filter_masks. Das Ergebnis
+    hängt nur von den übrigen Filtern ab und bleibt gecacht, bis sich einer
+    davon (oder der Medienfilter) ändert.
+    """
+    def count():
+        with perf.span("facets.count", rows=len(df), attr=attr):
+            return _count_facets(df, attr, types[attr], context_mask, dt_store, indexes)
+
+    return cached_facet(cache, attr, filters, media_filter, count)
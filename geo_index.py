@@ -0,0 +1,184 @@
+# geo_index.py
+
+import numpy as np
+import pandas as pd
+
+import perf_spans as perf
+import value_parsers as vp
+
+# Kantenlänge der Gitterzellen in Grad (~5 km Nord-Süd)
+GRID_DEG = 0.05
+_GRID_ROWS = int(round(180 / GRID_DEG))
+_GRID_COLS = int(round(360 / GRID_DEG))
+
+EARTH_RADIUS_KM = 6371.0088
+
+# -------------------------------
+# Filterwerte
+# -------------------------------
+# Ein GPS-Filter ist {"bbox": (süd, west, nord, ost)} oder
+# {"center": (breite, länge), "radius_km": r}; None/leer = passiv.
+# west > ost heißt: das Rechteck überquert die Datumsgrenze.
+
+def bbox_filter(south, west, north, east) -> dict:
+    return {"bbox": (float(south), float(west), float(north), float(east))}
+
+
+def radius_filter(lat, lon, radius_km) -> dict:
+    return {"center": (float(lat), float(lon)), "radius_km": float(radius_km)}
+
+
+def boxes(f):
+    """
+    Umschließende Rechtecke (süd, west, nord, ost) eines Filters, an der
+    Datumsgrenze in zwei Teile zerlegt.
+    """
+    if "bbox" in f:
+        south, west, north, east = f["bbox"]
+    else:
+        lat, lon = f["center"]
+        dlat = np.degrees(f["radius_km"] / EARTH_RADIUS_KM)
+        south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+        cos_lat = min(np.cos(np.radians(south)), np.cos(np.radians(north)))
+        if south <= -90.0 or north >= 90.0 or cos_lat <= 0 or dlat / cos_lat >= 180.0:
+            west, east = -180.0, 180.0  # Pol im Umkreis -> alle Längen
+        else:
+            dlon = dlat / cos_lat
+            west = (lon - dlon + 180.0) % 360.0 - 180.0
+            east = (lon + dlon + 180.0) % 360.0 - 180.0
+
+    if west > east:
+        return [(south, west, north, 180.0), (south, -180.0, north, east)]
+    return [(south, west, north, east)]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _matches(lat, lon, f) -> np.ndarray:
+    """
+    Exakte Prüfung für Koordinaten-Arrays (NaN = kein Treffer).
+    """
+    hit = np.zeros(len(lat), dtype=bool)
+    for south, west, north, east in boxes(f):
+        hit |= (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+    if "center" in f:
+        c_lat, c_lon = f["center"]
+        hit[hit] = haversine_km(c_lat, c_lon, lat[hit], lon[hit]) <= f["radius_km"]
+    return hit
+
+
+def coordinate_mask(series: pd.Series, f) -> np.ndarray:
+    """
+    Maske ohne Index (einmalige Abfrage): Koordinaten parsen und prüfen.
+    """
+    lat, lon = vp.coordinate_values(series)
+    return _matches(lat, lon, f)
+
+# -------------------------------
+# Gitter-Index
+# -------------------------------
+
+def _cell_rows(lat):
+    return np.clip(((np.asarray(lat) + 90.0) / GRID_DEG).astype(np.int64), 0, _GRID_ROWS - 1)
+
+
+def _cell_cols(lon):
+    return np.clip(((np.asarray(lon) + 180.0) / GRID_DEG).astype(np.int64), 0, _GRID_COLS - 1)
+
+
+def build_geo_index(series: pd.Series):
+    """
+    Räumlicher Index für eine Koordinatenspalte: die einmal geparsten
+    Koordinaten und die Zeilen sortiert nach Gitterzelle. Eine Zellzeile
+    eines Rechtecks ist damit ein zusammenhängender Abschnitt, den
+    searchsorted findet.
+    """
+    lat, lon = vp.coordinate_values(series)
+    rows = np.flatnonzero(~np.isnan(lat) & ~np.isnan(lon))
+    cells = _cell_rows(lat[rows]) * _GRID_COLS + _cell_cols(lon[rows])
+    order = np.argsort(cells, kind="stable")
+
+    return {
+        "n": len(series),
+        "lat": lat,
+        "lon": lon,
+        "cells": cells[order],
+        "rows": rows[order].astype(np.int64),
+    }
+
+
+def get_geo_index(indexes, df, attr):
+    """
+    Index aus dem Cache holen (gleicher Cache wie die Werte-Indizes, GPS-
+    Attribute sind nie kategorial), beim ersten Zugriff einmalig aufbauen.
+    """
+    index = indexes.get(attr)
+    if index is not None and index["n"] == len(df) and "cells" in index:
+        return index
+
+    with perf.span("index.geo_build", rows=len(df), attr=attr):
+        index = build_geo_index(df[attr])
+    indexes[attr] = index
+    return index
+
+
+def candidates(index, f) -> np.ndarray:
+    """
+    Zeilen in den Gitterzellen, die die Rechtecke des Filters berühren.
+    """
+    cells, rows = index["cells"], index["rows"]
+    parts = []
+    for south, west, north, east in boxes(f):
+        r = np.arange(_cell_rows(south), _cell_rows(north) + 1)
+        lo = np.searchsorted(cells, r * _GRID_COLS + _cell_cols(west), side="left")
+        hi = np.searchsorted(cells, r * _GRID_COLS + _cell_cols(east), side="right")
+        parts.extend(rows[a:b] for a, b in zip(lo, hi) if b > a)
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+
+def index_mask(index, f) -> np.ndarray:
+    """
+    Zeilenmaske eines GPS-Filters über den Index: nur die Kandidaten der
+    berührten Zellen werden exakt geprüft.
+    """
+    mask = np.zeros(index["n"], dtype=bool)
+    rows = candidates(index, f)
+    if rows.size:
+        mask[rows[_matches(index["lat"][rows], index["lon"][rows], f)]] = True
+    return mask
+
+
+def bounds(index, context_mask=None):
+    """
+    (anzahl, (süd, west, nord, ost)) der Koordinaten unter der Kontextmaske;
+    Rechteck None, wenn keine vorhanden sind.
+    """
+    valid = ~np.isnan(index["lat"])
+    if context_mask is not None:
+        valid &= context_mask
+    count = int(valid.sum())
+    if not count:
+        return 0, None
+    lat, lon = index["lat"][valid], index["lon"][valid]
+    return count, (float(lat.min()), float(lon.min()), float(lat.max()), float(lon.max()))
+
+
+def sample_points(index, mask=None, limit: int = 2000):
+    """
+    Höchstens limit Koordinaten (gleichmäßig über die Zeilen verteilt) für
+    die Kartenansicht: (breiten, längen).
+    """
+    valid = ~np.isnan(index["lat"])
+    if mask is not None:
+        valid &= mask
+    rows = np.flatnonzero(valid)
+    if rows.size > limit:
+        rows = rows[np.linspace(0, rows.size - 1, limit).astype(np.int64)]
+    return index["lat"][rows], index["lon"][rows]
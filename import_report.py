@@ -0,0 +1,145 @@
+# import_report.py
+#
+# Misst die Importzeit der Projektmodule mit "python -X importtime", jeweils
+# in einem frischen Prozess, und vergleicht sie mit einem Budget.
+#
+#   python import_report.py                 # Bericht
+#   python import_report.py --top 15        # die teuersten Einzelimporte
+#   python import_report.py --json out.json # Ergebnis zusätzlich als JSON
+#
+# Exit-Code 1, wenn ein Budget überschritten wird oder ein Modul eine
+# Abhängigkeit lädt, die es nicht laden soll.
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Budget je Modul in Millisekunden (kumulativ, inkl. pandas/numpy)
+MODULE_BUDGETS_MS = {
+    "perf_spans": 100,
+    "attribute_catalog": 300,
+    "metadata_core": 1000,
+    "ui_auxiliary": 1000,
+    "attribute_types": 1000,
+    "value_parsers": 1000,
+    "bitmap_index": 1000,
+    "geo_index": 1000,
+    "filter_engine": 1100,
+    "metadata_cache": 1300,
+    "video_duration": 1100,
+    "slideshow": 1100,
+    "export": 1300,
+    "dataset_registry": 2500,
+}
+
+# Diese Module dürfen beim bloßen Import nicht mitgeladen werden
+HEAVY_MODULES = ("streamlit", "moviepy", "imageio", "PIL")
+FORBIDDEN = {
+    "perf_spans": HEAVY_MODULES + ("pandas", "numpy"),
+    "attribute_catalog": HEAVY_MODULES + ("pandas",),
+    "metadata_core": HEAVY_MODULES,
+    "ui_auxiliary": HEAVY_MODULES,
+    "attribute_types": HEAVY_MODULES,
+    "value_parsers": HEAVY_MODULES,
+    "bitmap_index": HEAVY_MODULES,
+    "geo_index": HEAVY_MODULES,
+    "filter_engine": HEAVY_MODULES,
+    "metadata_cache": HEAVY_MODULES,
+    "video_duration": HEAVY_MODULES,
+    "slideshow": HEAVY_MODULES,
+    "export": HEAVY_MODULES,
+}
+
+ROOT = Path(__file__).resolve().parent
+
+
+def measure(module: str):
+    """
+    Liefert (kumulativ_ms, [(name, self_ms, kumulativ_ms), ...]) für einen
+    Import von module in einem neuen Interpreter.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        try:
+            entries.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+        except ValueError:
+            continue  # Kopfzeile
+
+    total = next((c for n, _, c in entries if n == module), 0.0)
+    return total, entries
+
+
+def report(modules, repeat: int = 3, top: int = 0):
+    results = {}
+    failed = False
+
+    for module in modules:
+        runs = [measure(module) for _ in range(repeat)]
+        # schnellster Lauf, damit Störungen durch andere Prozesse wenig zählen
+        total, entries = min(runs, key=lambda r: r[0])
+        loaded = {n.split(".")[0] for n, _, _ in entries}
+
+        budget = MODULE_BUDGETS_MS.get(module)
+        forbidden = sorted(m for m in FORBIDDEN.get(module, ()) if m in loaded)
+        ok = (budget is None or total <= budget) and not forbidden
+        failed |= not ok
+
+        results[module] = {
+            "ms": round(total, 1),
+            "budget_ms": budget,
+            "forbidden": forbidden,
+            "ok": ok,
+            "top": [
+                {"module": n, "self_ms": round(s, 1), "cumulative_ms": round(c, 1)}
+                for n, s, c in sorted(entries, key=lambda e: e[1], reverse=True)[:top]
+            ],
+        }
+
+    return results, failed
+
+
+def print_report(results):
+    print(f"{'Modul':<20} {'Zeit':>9} {'Budget':>9}  Status")
+    for module, r in results.items():
+        budget = f"{r['budget_ms']} ms" if r["budget_ms"] else "-"
+        status = "ok" if r["ok"] else "ÜBERSCHRITTEN"
+        if r["forbidden"]:
+            status += f" (lädt {', '.join(r['forbidden'])})"
+        print(f"{module:<20} {r['ms']:>6.0f} ms {budget:>9}  {status}")
+
+        for t in r["top"]:
+            print(f"    {t['module']:<40} {t['self_ms']:>7.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importzeiten der metaExplorer-Module messen")
+    parser.add_argument("modules", nargs="*", default=list(MODULE_BUDGETS_MS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=0,
+                        help="die N teuersten Einzelimporte (self) je Modul anzeigen")
+    parser.add_argument("--json", type=Path, help="Ergebnis zusätzlich als JSON speichern")
+    args = parser.parse_args(argv)
+
+    results, failed = report(args.modules, args.repeat, args.top)
+    print_report(results)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
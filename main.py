@@ -1,16 +1,327 @@
-# This is a sample Python script.
+# main.py
+#
+# Kommandozeile ohne Streamlit: Metadaten laden (mit Cache), einen Filter
+# wie in der Oberfläche anwenden und die passenden SourceFile-Pfade
+# exportieren (CSV, JSONL, Parquet, M3U) oder kopieren – z. B. für
+# nächtliche Exporte per cron.
+#
+#   python main.py /fotos/meta.json --filter filter.json -o liste.csv
+#   python main.py a.json b.json --filter filter.yaml --media images --format jsonl
+#   python main.py meta.json -f filter.json -c Make Model -o auswahl.parquet
+#   python main.py meta.json -f filter.json --copy-to /backup/auswahl --workers 8
+#
+# Filterdatei (JSON oder YAML), gleiche Form wie st.session_state.filters:
+#
+#   {
+#     "media": "images",
+#     "filters": {
+#       "Make": ["Canon", "NIKON CORPORATION"],
+#       "ISO": [100, 400],
+#       "DateTimeOriginal": {"year": [2023], "month": [6, 7, 8]},
+#       "GPSPosition": {"center": [48.137, 11.575], "radius_km": 25}
+#     }
+#   }
+#
+# GPS-Attribute: {"center": [breite, länge], "radius_km": r} oder
+# {"bbox": [süd, west, nord, ost]}.
+#
+# Ein Objekt ohne "filters" gilt direkt als Filterzustand.
+#
+# Exit-Codes:
+#   0  ok
+#   2  Aufruf- oder Filterfehler
+#   3  Metadaten nicht lesbar
+#   4  Ausgabe nicht schreibbar
+#   5  Dateien konnten nicht kopiert werden
+#   6  keine Treffer (nur mit --fail-empty)
+#
+# 1 bleibt unbehandelten Fehlern (Python-Traceback) vorbehalten.
 
-# Press Umschalt+F10 to execute it or replace it with your code.
-# Press Double Shift to search everywhere for classes, files, tool windows, actions, and settings.
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
 
+import numpy as np
 
-def print_hi(name):
-    # Use a breakpoint in the code line below to debug your script.
-    print(f'Hi, {name}')  # Press Strg+F8 to toggle the breakpoint.
+import duckdb_backend as db
+import export
+import geo_index as geo
+import metadata_cache as mc
+import metadata_core as core
 
+EXIT_OK = 0
+EXIT_USAGE = 2
+EXIT_LOAD = 3
+EXIT_OUTPUT = 4
+EXIT_COPY = 5
+EXIT_EMPTY = 6
 
-# Press the green button in the gutter to run the script.
-if __name__ == '__main__':
-    print_hi('PyCharm')
+# Kurzformen für --media und die Filterdatei
+MEDIA_FILTERS = {
+    "all": "Alle Medien",
+    "images": "Nur Bilder",
+    "videos": "Nur Videos",
+}
 
-# See PyCharm help at https://www.jetbrains.com/help/pycharm/
+# So viele Pfade werden je Block erzeugt und geschrieben
+CHUNK_SIZE = 50_000
+
+
+class SpecError(ValueError):
+    pass
+
+# -------------------------------
+# Filterdatei
+# -------------------------------
+
+def read_spec(path: Path) -> dict:
+    text = Path(path).read_text(encoding="utf-8")
+    if Path(path).suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise SpecError("YAML-Filter benötigen PyYAML (pip install pyyaml)")
+        spec = yaml.safe_load(text)
+    else:
+        spec = json.loads(text)
+
+    if spec is None:
+        return {}
+    if not isinstance(spec, dict):
+        raise SpecError("Die Filterdatei muss ein Objekt enthalten")
+    return spec
+
+
+def media_label(value) -> str:
+    if value is None:
+        return MEDIA_FILTERS["all"]
+    if value in MEDIA_FILTERS.values():
+        return value
+    if value in MEDIA_FILTERS:
+        return MEDIA_FILTERS[value]
+    raise SpecError(f"Unbekannter Medienfilter: {value!r}")
+
+
+def normalize_filters(raw: dict, types: dict) -> dict:
+    """
+    Prüft den Filterzustand gegen die Attributtypen und bringt ihn in die
+    Form, die core.filter_mask erwartet.
+    """
+    if not isinstance(raw, dict):
+        raise SpecError("'filters' muss ein Objekt sein")
+
+    filters = {}
+    for attr, f in raw.items():
+        if attr not in types:
+            raise SpecError(f"Unbekanntes Attribut: {attr}")
+        attr_type = types[attr]
+
+        if attr_type == "datetime":
+            if not isinstance(f, dict):
+                raise SpecError(f"{attr}: erwartet {{komponente: [werte]}}")
+            unknown = set(f) - set(core.DATETIME_PARTS)
+            if unknown:
+                raise SpecError(f"{attr}: unbekannte Komponenten {sorted(unknown)}")
+            filters[attr] = {
+                part: [_number(attr, v, int) for v in _as_list(f.get(part))]
+                for part in core.DATETIME_PARTS
+            }
+
+        elif attr_type == "numeric":
+            if not isinstance(f, (list, tuple)) or len(f) != 2:
+                raise SpecError(f"{attr}: erwartet [min, max]")
+            filters[attr] = (_number(attr, f[0], float), _number(attr, f[1], float))
+
+        elif attr_type == "gps":
+            filters[attr] = _normalize_geo(attr, f)
+
+        else:
+            filters[attr] = list(f) if isinstance(f, (list, tuple)) else [f]
+
+    return filters
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _number(attr, value, convert):
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        raise SpecError(f"{attr}: ungültiger Wert {value!r}") from None
+
+
+def _normalize_geo(attr, f):
+    try:
+        if isinstance(f, dict) and "bbox" in f and len(f["bbox"]) == 4:
+            return geo.bbox_filter(*f["bbox"])
+        if isinstance(f, dict) and "center" in f and len(f["center"]) == 2 and "radius_km" in f:
+            return geo.radius_filter(*f["center"], f["radius_km"])
+    except (TypeError, ValueError):
+        pass
+    raise SpecError(f"{attr}: erwartet {{\"bbox\": [süd, west, nord, ost]}} "
+                    f"oder {{\"center\": [breite, länge], \"radius_km\": r}}")
+
+# -------------------------------
+# Treffer
+# -------------------------------
+
+def open_matches(meta_files, filters_raw, media_filter, backend="auto", use_cache=True):
+    """
+    Lädt den Bestand und liefert (typen, spalten, frames). frames(columns)
+    erzeugt die Treffer blockweise als DataFrames (SourceFile + columns)
+    und kann mehrfach aufgerufen werden.
+    backend: "pandas", "duckdb" oder "auto" (DuckDB ab der
+    Out-of-Core-Schwelle, wenn ein gültiger Cache vorliegt).
+    """
+    target = meta_files if len(meta_files) > 1 else meta_files[0]
+
+    use_db = backend == "duckdb" or (backend == "auto" and use_cache and db.should_use(target))
+    if use_db:
+        source = db.catalog_source(target) if db.backend_available() else None
+        if source is None:
+            # Cache erst aufbauen, danach direkt auf Parquet abfragen
+            mc.load_metadata_files_cached(meta_files, use_cache=True)
+            source = db.catalog_source(target) if db.backend_available() else None
+        if source is None:
+            raise SpecError("DuckDB-Backend nicht verfügbar (duckdb/pyarrow fehlen)")
+        catalog = db.open_catalog(*source)
+        types = catalog["types"]
+        filters = normalize_filters(filters_raw, types)
+
+        def frames(columns=()):
+            return db.iter_frames(catalog, filters, types, media_filter, columns, CHUNK_SIZE)
+        return types, catalog["columns"], frames
+
+    df, types, _, _ = mc.load_metadata_files_cached(meta_files, use_cache=use_cache)
+    filters = normalize_filters(filters_raw, types)
+    # nur die Maske bilden, nie eine gefilterte Kopie
+    dt_store = core.new_datetime_store(df.attrs.get("datetime_formats"))
+    rows = np.flatnonzero(core.filter_mask(df, filters, types, media_filter, dt_store))
+
+    def frames(columns=()):
+        return export.iter_frames(df, rows, columns, CHUNK_SIZE)
+    return types, set(df.columns), frames
+
+
+def iter_paths(frames):
+    for frame in frames:
+        yield from frame["SourceFile"]
+
+# -------------------------------
+# Aufruf
+# -------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="metaExplorer ohne Oberfläche: filtern, exportieren, Dateien kopieren"
+    )
+    parser.add_argument("meta_files", nargs="+", type=Path, help="ExifTool-JSON(s)")
+    parser.add_argument("-f", "--filter", type=Path, help="Filterdatei (JSON oder YAML)")
+    parser.add_argument("-m", "--media", choices=sorted(MEDIA_FILTERS),
+                        help="Medienfilter (überschreibt die Filterdatei)")
+    parser.add_argument("-o", "--output", type=Path, help="Zieldatei (Standard: stdout)")
+    parser.add_argument("--format", choices=sorted(export.FORMATS),
+                        help="Ausgabeformat (Standard: nach Endung, sonst csv)")
+    parser.add_argument("-c", "--columns", nargs="+", default=[],
+                        help="zusätzliche Spalten neben SourceFile")
+    parser.add_argument("--copy-to", type=Path, help="passende Dateien in diesen Ordner kopieren")
+    parser.add_argument("--link", action="store_true",
+                        help="mit --copy-to: Hardlinks statt Kopien (sonst Kopie)")
+    parser.add_argument("--workers", type=int, default=export.COPY_WORKERS,
+                        help="gleichzeitige Kopiervorgänge")
+    parser.add_argument("--backend", choices=["auto", "pandas", "duckdb"], default="auto")
+    parser.add_argument("--no-cache", action="store_true", help="Parquet-Cache nicht verwenden")
+    parser.add_argument("--fail-empty", action="store_true",
+                        help=f"Exit-Code {EXIT_EMPTY}, wenn nichts passt")
+    parser.add_argument("-q", "--quiet", action="store_true", help="keine Zusammenfassung auf stderr")
+    args = parser.parse_args(argv)
+
+    def log(msg):
+        if not args.quiet:
+            print(msg, file=sys.stderr)
+
+    try:
+        spec = read_spec(args.filter) if args.filter else {}
+        if "filters" in spec:
+            filters_raw = spec["filters"] or {}
+        else:
+            filters_raw = {k: v for k, v in spec.items() if k != "media"}
+        media_filter = media_label(args.media or spec.get("media"))
+    except (OSError, ValueError) as e:
+        log(f"Fehler in der Filterdatei: {e}")
+        return EXIT_USAGE
+
+    fmt = args.format or export.format_for_path(args.output)
+    if fmt == "parquet" and not args.output:
+        log("Parquet braucht eine Zieldatei (-o)")
+        return EXIT_USAGE
+
+    missing = [str(f) for f in args.meta_files if not f.is_file()]
+    if missing:
+        log(f"Metadatendatei nicht gefunden: {', '.join(missing)}")
+        return EXIT_LOAD
+
+    try:
+        _, available, frames = open_matches(
+            args.meta_files, filters_raw, media_filter,
+            backend=args.backend, use_cache=not args.no_cache
+        )
+    except SpecError as e:
+        log(f"Fehler im Filter: {e}")
+        return EXIT_USAGE
+    except Exception as e:
+        log(f"Metadaten konnten nicht gelesen werden: {e}")
+        return EXIT_LOAD
+
+    unknown = [c for c in args.columns if c not in available and c != "SourceFile"]
+    if unknown:
+        log(f"Unbekannte Spalten: {', '.join(unknown)}")
+        return EXIT_USAGE
+    columns = export.export_columns(available, args.columns, fmt)
+
+    # Liste nach stdout nur, wenn nicht ausschließlich kopiert wird
+    n = None
+    if args.output or not args.copy_to:
+        try:
+            if args.output:
+                # erst vollständig schreiben, dann umbenennen: kein halber Export für cron
+                n = export.write_export(frames(columns), args.output, fmt)
+            else:
+                n = export.write_stream(frames(columns), sys.stdout, fmt)
+                sys.stdout.flush()
+        except BrokenPipeError:
+            # Leser (z. B. head) hat vorzeitig beendet
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return EXIT_OK
+        except (OSError, RuntimeError) as e:
+            log(f"Ausgabe nicht schreibbar: {e}")
+            return EXIT_OUTPUT
+        log(f"{n:,} Treffer ({media_filter})")
+
+    if args.copy_to:
+        stats = export.copy_files(
+            iter_paths(frames()), args.copy_to,
+            mode="hardlink" if args.link else "copy",
+            base_dir=Path(os.path.commonpath([f.resolve().parent for f in args.meta_files])),
+            workers=args.workers
+        )
+        log(export.format_copy_stats(stats))
+        for error in stats["errors"]:
+            log(f"  {error}")
+        if stats["failed"]:
+            return EXIT_COPY
+        if n is None:
+            n = sum(stats[k] for k in ("copied", "linked", "skipped", "missing"))
+
+    if n == 0 and args.fail_empty:
+        return EXIT_EMPTY
+    return EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(main())
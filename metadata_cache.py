@@ -0,0 +1,449 @@
+# metadata_cache.py
+
+import hashlib
+import json
+import os
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # ohne pyarrow wird einfach nicht gecacht
+    pa = None
+    pq = None
+
+import metadata_core as core
+import perf_spans as perf
+import value_parsers as vp
+from attribute_types import datetime_formats, infer_all_attribute_details, infer_details_from_samples
+
+# 2: Attributtyp "gps" für Koordinatenpaare
+CACHE_VERSION = 2
+CACHE_SUFFIX = ".metaexplorer.parquet"
+# Gemeinsamer Cache mehrerer JSONs eines Verzeichnisses
+CATALOG_CACHE_PREFIX = ".metaexplorer_catalog_"
+
+_META_KEY = b"metaexplorer"
+_HASH_CHUNK = 1 << 20
+
+# -------------------------------
+# Cache-Schlüssel
+# -------------------------------
+
+def cache_available() -> bool:
+    return pq is not None
+
+
+def cache_path(meta_file: Path) -> Path:
+    """
+    Sidecar-Datei direkt neben dem JSON, z.B. 'fotos.json.metaexplorer.parquet'.
+    """
+    return meta_file.with_name(meta_file.name + CACHE_SUFFIX)
+
+
+def catalog_cache_path(meta_files) -> Path:
+    """
+    Cache für eine Auswahl mehrerer JSONs, abhängig von den Dateinamen.
+    """
+    meta_files = sorted(Path(f) for f in meta_files)
+    names = "|".join(f.name for f in meta_files)
+    digest = hashlib.blake2b(names.encode("utf-8"), digest_size=8).hexdigest()
+    return meta_files[0].parent / f"{CATALOG_CACHE_PREFIX}{digest}.parquet"
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_key(meta_file: Path, content_hash: Optional[str] = None) -> dict:
+    st = os.stat(meta_file)
+    return {
+        "path": str(Path(meta_file).resolve()),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "hash": content_hash or file_hash(meta_file),
+    }
+
+
+def is_cache_valid(meta_file: Path, meta: dict) -> bool:
+    if meta.get("version") != CACHE_VERSION:
+        return False
+    return is_source_valid(meta_file, meta.get("source", {}))
+
+
+def is_catalog_cache_valid(meta_files, meta: dict) -> bool:
+    if meta.get("version") != CACHE_VERSION:
+        return False
+    stored = meta.get("sources", [])
+    return len(stored) == len(meta_files) and all(
+        is_source_valid(f, s) for f, s in zip(meta_files, stored)
+    )
+
+
+def is_source_valid(meta_file: Path, stored: dict) -> bool:
+    if stored.get("path") != str(Path(meta_file).resolve()):
+        return False
+
+    st = os.stat(meta_file)
+    if st.st_size != stored.get("size"):
+        return False
+
+    # Schneller Pfad: unverändert seit dem Schreiben des Caches
+    if st.st_mtime_ns == stored.get("mtime_ns"):
+        return True
+
+    # Nur der Zeitstempel hat sich geändert (z.B. Kopie vom NAS) -> Inhalt prüfen
+    return file_hash(meta_file) == stored.get("hash")
+
+# -------------------------------
+# Spalten-Kodierung
+# -------------------------------
+
+def _to_arrow_column(series: pd.Series):
+    """
+    ExifTool liefert gemischte Typen in einer Spalte (z.B. 1 und "1/200")
+    oder Listen (Keywords). Solche Spalten werden als JSON-Text abgelegt.
+    Rückgabe: (arrow_array, json_kodiert)
+    """
+    if isinstance(series.dtype, pd.SparseDtype):
+        series = series.sparse.to_dense()
+
+    try:
+        arr = pa.array(series, from_pandas=True)
+        if not (pa.types.is_nested(arr.type) or pa.types.is_binary(arr.type)):
+            return arr, False
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        pass
+
+    encoded = series.map(
+        lambda v: None if _is_missing(v) else json.dumps(v, ensure_ascii=False, default=_json_default)
+    )
+    return pa.array(encoded, type=pa.string(), from_pandas=True), True
+
+
+def _is_missing(value) -> bool:
+    if isinstance(value, (list, dict, tuple)):
+        return False
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def _json_default(value):
+    # ijson liefert Gleitkommazahlen als Decimal
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _decode_json_column(series: pd.Series) -> pd.Series:
+    return series.map(lambda v: json.loads(v) if isinstance(v, str) else v).astype(object)
+
+# -------------------------------
+# Lesen / Schreiben
+# -------------------------------
+
+def read_cache_meta(meta_file: Path, path: Optional[Path] = None) -> Optional[dict]:
+    path = path or cache_path(meta_file)
+    if pq is None or not path.exists():
+        return None
+    try:
+        raw = (pq.read_schema(path).metadata or {}).get(_META_KEY)
+        return json.loads(raw) if raw else None
+    except Exception:
+        return None
+
+
+def cached_content_hash(meta_file: Path) -> Optional[str]:
+    """
+    Inhalts-Hash des JSONs aus einem gültigen Cache (spart beim erneuten
+    Schreiben das Hashen der ganzen Datei); None ohne gültigen Cache.
+    """
+    meta = read_cache_meta(meta_file)
+    if meta is None or not is_cache_valid(meta_file, meta):
+        return None
+    return meta.get("source", {}).get("hash")
+
+
+def load_cache(meta_file: Path) -> Optional[Tuple[pd.DataFrame, Dict[str, str], dict]]:
+    """
+    Liefert (df, attribute_types, attribute_stats) oder None, wenn kein
+    gültiger Cache existiert.
+    """
+    meta = read_cache_meta(meta_file)
+    if meta is None or not is_cache_valid(meta_file, meta):
+        return None
+
+    try:
+        df = pq.read_table(cache_path(meta_file)).to_pandas()
+    except Exception:
+        return None
+
+    _restore_columns(df, meta)
+    _restore_attrs(df, meta)
+    return df, meta["types"], meta["stats"]
+
+
+def _restore_attrs(df: pd.DataFrame, meta: dict):
+    df.attrs["memory_report"] = meta.get("memory")
+    df.attrs["datetime_formats"] = meta.get("formats", {})
+    df.attrs["value_parsers"] = meta.get("parsers", {})
+    df.attrs["applied_deltas"] = meta.get("deltas", [])
+
+
+def _restore_columns(df: pd.DataFrame, meta: dict):
+    for col in meta.get("json_columns", []):
+        if col in df.columns:
+            df[col] = _decode_json_column(df[col])
+
+    # nullable Int und Sparse kennt Parquet nicht direkt
+    for col, dtype in meta.get("dtypes", {}).items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+
+
+def save_cache(
+    meta_file: Path,
+    df: pd.DataFrame,
+    types: Dict[str, str],
+    stats: dict,
+    content_hash: Optional[str] = None,
+) -> Optional[Path]:
+    if pq is None:
+        return None
+    return _write_cache(cache_path(meta_file), df, types, stats,
+                        {"source": source_key(meta_file, content_hash)})
+
+
+def _write_cache(path: Path, df: pd.DataFrame, types, stats, sources: dict) -> Optional[Path]:
+
+    arrays, json_columns = [], []
+    for col in df.columns:
+        arr, encoded = _to_arrow_column(df[col])
+        arrays.append(arr)
+        if encoded:
+            json_columns.append(col)
+
+    dtypes = {
+        col: str(df[col].dtype)
+        for col in df.columns
+        if isinstance(df[col].dtype, (pd.SparseDtype, pd.api.extensions.ExtensionDtype))
+        and not isinstance(df[col].dtype, (pd.CategoricalDtype, pd.StringDtype))
+    }
+
+    meta = {
+        "version": CACHE_VERSION,
+        **sources,
+        "rows": len(df),
+        "types": types,
+        "stats": stats,
+        "json_columns": json_columns,
+        "dtypes": dtypes,
+        "memory": df.attrs.get("memory_report"),
+        "formats": df.attrs.get("datetime_formats", {}),
+        "parsers": df.attrs.get("value_parsers", {}),
+        # inkrementell eingespielte Delta-JSONs (siehe metadata_delta)
+        "deltas": df.attrs.get("applied_deltas", []),
+    }
+
+    table = pa.Table.from_arrays(arrays, names=[str(c) for c in df.columns])
+    table = table.replace_schema_metadata({_META_KEY: json.dumps(meta, ensure_ascii=False)})
+
+    # atomar schreiben, damit ein abgebrochener Lauf keinen halben Cache hinterlässt
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        return None
+    return path
+
+# -------------------------------
+# Laden mit Cache
+# -------------------------------
+
+def load_metadata_cached(meta_file: Path, use_cache: bool = True, progress=None):
+    """
+    Liefert (df, attribute_types, attribute_stats, aus_cache).
+    Der Cache wird nur neu aufgebaut, wenn sich das JSON geändert hat.
+    """
+    meta_file = Path(meta_file)
+
+    if use_cache:
+        with perf.span("load.cache_read") as rec:
+            cached = load_cache(meta_file)
+            rec["rows"] = len(cached[0]) if cached is not None else None
+        if cached is not None:
+            df, types, stats = cached
+            return df, types, stats, True
+
+    # Hash vor dem Parsen bilden, damit der Schlüssel zum gelesenen Inhalt passt
+    content_hash = file_hash(meta_file) if cache_available() else None
+
+    with perf.span("load.json") as rec:
+        df = core.load_metadata(meta_file, progress=progress)
+        rec["rows"] = len(df)
+    df, types, stats = _prepare_loaded(df)
+
+    if cache_available():
+        with perf.span("load.cache_write", rows=len(df)):
+            save_cache(meta_file, df, types, stats, content_hash=content_hash)
+
+    return df, types, stats, False
+
+
+def _prepare_loaded(df: pd.DataFrame):
+    """
+    Gemeinsame Nachbearbeitung nach dem Einlesen: formatierte Werte
+    umwandeln, kompaktieren, Typen und Füllstände bestimmen.
+    """
+    rows = len(df)
+    with perf.span("prepare.parse_values", rows=rows):
+        df, parsers = vp.parse_formatted_columns(df)
+    with perf.span("prepare.compact", rows=rows):
+        df, report = core.compact_dataframe(df)
+    df.attrs["memory_report"] = report
+    df.attrs["value_parsers"] = parsers
+
+    with perf.span("prepare.infer_types", rows=rows):
+        details = infer_all_attribute_details(df, columns=core.attribute_columns(df))
+    types = {col: d["type"] for col, d in details.items()}
+    df.attrs["datetime_formats"] = datetime_formats(details)
+    with perf.span("prepare.stats", rows=rows):
+        stats = core.compute_attribute_stats(df)
+    return df, types, stats
+
+
+def load_metadata_files_cached(meta_files, use_cache: bool = True, progress=None):
+    """
+    Wie load_metadata_cached, aber für mehrere JSONs als ein Bestand
+    (parallel eingelesen, Herkunft in der Spalte MetaFile).
+    """
+    meta_files = sorted(Path(f) for f in meta_files)
+    if len(meta_files) == 1:
+        return load_metadata_cached(meta_files[0], use_cache=use_cache, progress=progress)
+
+    path = catalog_cache_path(meta_files)
+    if use_cache:
+        meta = read_cache_meta(meta_files[0], path)
+        if meta is not None and is_catalog_cache_valid(meta_files, meta):
+            try:
+                with perf.span("load.cache_read", rows=meta.get("rows")):
+                    df = pq.read_table(path).to_pandas()
+                    _restore_columns(df, meta)
+                _restore_attrs(df, meta)
+                return df, meta["types"], meta["stats"], True
+            except Exception:
+                pass
+
+    hashes = [file_hash(f) for f in meta_files] if cache_available() else None
+
+    with perf.span("load.json", files=len(meta_files)) as rec:
+        df = core.load_metadata_files(meta_files, progress=progress)
+        rec["rows"] = len(df)
+    df, types, stats = _prepare_loaded(df)
+
+    if cache_available():
+        sources = [source_key(f, h) for f, h in zip(meta_files, hashes)]
+        with perf.span("load.cache_write", rows=len(df)):
+            _write_cache(path, df, types, stats, {"sources": sources})
+
+    return df, types, stats, False
+
+# -------------------------------
+# Zweiphasiges Laden (nur benötigte Attribute)
+# -------------------------------
+
+def load_catalog_cached(meta_file: Path, use_cache: bool = True, progress=None):
+    """
+    Phase 1: liefert (df_nur_SourceFile, attribute_types, attribute_stats, aus_cache).
+    Mit gültigem Cache wird nur die SourceFile-Spalte gelesen, sonst das
+    JSON einmal ohne Zeilenaufbau durchlaufen.
+    """
+    meta_file = Path(meta_file)
+
+    if use_cache:
+        meta = read_cache_meta(meta_file)
+        if meta is not None and is_cache_valid(meta_file, meta):
+            path = cache_path(meta_file)
+            names = pq.read_schema(path).names
+            source_cols = [c for c in ("SourceFile",) + core.INTERNAL_COLUMNS if c in names]
+            df = pq.read_table(path, columns=source_cols).to_pandas()
+            _restore_attrs(df, meta)
+            return df, meta["types"], meta["stats"], True
+
+    catalog = core.scan_attribute_catalog(meta_file, progress=progress)
+    parsers = _apply_parsers_to_catalog(catalog)
+
+    df = core.split_sourcefile(pd.DataFrame({"SourceFile": catalog["source_files"]}))
+    details = infer_details_from_samples(catalog["samples"])
+    types = {col: d["type"] for col, d in details.items()}
+    df.attrs["datetime_formats"] = datetime_formats(details)
+    df.attrs["value_parsers"] = parsers
+    stats = core.catalog_attribute_stats(catalog)
+    return df, types, stats, False
+
+
+def _apply_parsers_to_catalog(catalog) -> dict:
+    """
+    Formatierte Attribute wie beim vollständigen Laden behandeln:
+    Stichprobe als Zahlen, Originaltext als eigenes '(Text)'-Attribut.
+    """
+    parsers = vp.detect_parsers_from_samples(catalog["samples"])
+
+    for col, kind in parsers.items():
+        text_col = col + vp.TEXT_SUFFIX
+        sample = pd.Series(catalog["samples"][col], dtype=object)
+        catalog["samples"][text_col] = catalog["samples"][col]
+        catalog["samples"][col] = vp.parse_values(sample, kind).dropna().tolist()
+        catalog["counts"][text_col] = catalog["counts"][col]
+
+    return parsers
+
+
+def load_columns_cached(
+    meta_file: Path,
+    columns,
+    use_cache: bool = True,
+    parsers=None,
+) -> pd.DataFrame:
+    """
+    Phase 2: lädt nur die angefragten Attribute, zeilengleich zu Phase 1.
+    parsers: {attribut: parser} aus Phase 1 für formatierte Werte.
+    """
+    meta_file = Path(meta_file)
+    columns = list(columns)
+    parsers = parsers or {}
+
+    if use_cache:
+        meta = read_cache_meta(meta_file)
+        if meta is not None and is_cache_valid(meta_file, meta):
+            df = pq.read_table(cache_path(meta_file), columns=columns).to_pandas()
+            _restore_columns(df, meta)
+            return df
+
+    def raw_name(col):
+        if col.endswith(vp.TEXT_SUFFIX) and col[:-len(vp.TEXT_SUFFIX)] in parsers:
+            return col[:-len(vp.TEXT_SUFFIX)]
+        return col
+
+    raw_columns = list(dict.fromkeys(raw_name(c) for c in columns))
+    raw = core.load_metadata(meta_file, columns=raw_columns)
+
+    df = pd.DataFrame(index=raw.index)
+    for col in columns:
+        values = raw[raw_name(col)]
+        if col in parsers:
+            values = vp.parse_values(values, parsers[col])
+        df[col] = core.compact_column(values)
+    return df
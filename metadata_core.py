@@ -0,0 +1,748 @@
+# metadata_core.py
+#
+# Reine Datenfunktionen (Laden, Kompaktieren, Datumswerte, Filter) ohne
+# Streamlit, moviepy oder PIL – auch aus Skripten schnell importierbar.
+
+import pandas as pd
+import numpy as np
+import os
+import random
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+
+import geo_index as geo
+import perf_spans as perf
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp"}
+VIDEO_EXTS = {".mp4", ".mov", ".avi", ".mkv", ".webm"}
+
+DEFAULT_BATCH_SIZE = 20_000
+# Unterhalb dieser Dateigröße lohnt sich der Prozess-Pool nicht
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+
+# SourceFile wird kompakt als Verzeichnis-Kategorie + Dateiname gehalten
+SOURCE_DIR_COL = "_SourceDir"
+SOURCE_NAME_COL = "_SourceName"
+INTERNAL_COLUMNS = (SOURCE_DIR_COL, SOURCE_NAME_COL)
+
+# Herkunft beim Laden mehrerer JSON-Dateien (filterbares Attribut)
+META_FILE_COL = "MetaFile"
+
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+SPARSE_MIN_NULL_RATIO = 0.9
+
+# ---------- Hilfsfunktionen ----------
+
+@lru_cache(maxsize=None)
+def _ijson_backend():
+    # erst beim ersten Einlesen laden
+    import ijson
+    try:
+        return ijson.get_backend("yajl2_c")
+    except Exception:  # C-Backend nicht verfügbar -> ijson-Standard
+        return ijson
+
+def normalize_sourcefile(meta_file: Path, sourcefile: str) -> str:
+    base_dir = meta_file.parent
+    if sourcefile.startswith("./"):
+        return str(base_dir / sourcefile[2:])
+    return str(base_dir / sourcefile)
+
+def extract_directory_levels(sourcefile: str):
+    p = Path(sourcefile)
+    parts = p.parts[:-1]  # ohne Dateiname
+
+    parts = [p for p in parts if p not in (".", "")]
+
+    level_dirs = []
+    year_found = False
+
+    for d in parts:
+        if d.isdigit() and len(d) == 4:
+            year_found = True
+            continue
+        if year_found:
+            level_dirs.append(d)
+
+    return {
+        f"Level{i+1}-Verzeichnis": name
+        for i, name in enumerate(level_dirs)
+    }
+
+def iter_metadata_batches(meta_file: Path, batch_size=DEFAULT_BATCH_SIZE, max_items=None):
+    """
+    Liest das ExifTool-JSON als Strom und liefert (items, gelesene_bytes)
+    in Blöcken von höchstens batch_size Einträgen.
+    """
+    batch = []
+    count = 0
+
+    with open(meta_file, "rb") as f:
+        for item in _ijson_backend().items(f, "item"):
+            batch.append(item)
+            count += 1
+
+            if len(batch) >= batch_size:
+                yield batch, f.tell()
+                batch = []
+
+            if max_items and count >= max_items:
+                break
+
+        if batch:
+            yield batch, f.tell()
+
+def prepare_batch(meta_file: Path, items, columns=None):
+    """
+    Normalisiert einen Block Rohdaten und baut daraus einen DataFrame-Teil.
+    Mit columns werden nur diese Attribute (plus SourceFile) übernommen.
+    Läuft auch im Worker-Prozess, muss daher auf Modulebene stehen.
+    """
+    rows = []
+    keep = None if columns is None else set(columns)
+
+    for item in items:
+        src = item.get("SourceFile")
+        if not src:
+            continue
+
+        item.update(extract_directory_levels(src))
+        if keep is not None:
+            item = {k: v for k, v in item.items() if k in keep}
+        item["SourceFile"] = normalize_sourcefile(meta_file, src)
+        rows.append(item)
+
+    return pd.DataFrame(rows)
+
+def _default_workers(meta_file: Path) -> int:
+    if os.path.getsize(meta_file) < PARALLEL_MIN_BYTES:
+        return 1
+    return min(os.cpu_count() or 1, 8)
+
+def load_metadata(
+    meta_file: Path,
+    max_items=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+    workers=None,
+    progress=None,
+    columns=None,
+):
+    """
+    Lädt das ExifTool-JSON blockweise. Jeder Block wird (ggf. in einem
+    Prozess-Pool) zu einem spaltenorientierten Teil-DataFrame; es werden nie
+    mehr als 2 * workers Blöcke gleichzeitig gehalten.
+
+    progress(records, bytes_read, elapsed_s) wird nach jedem Block aufgerufen.
+    columns beschränkt das Ergebnis auf SourceFile und die genannten Attribute.
+    """
+    meta_file = Path(meta_file)
+    if workers is None:
+        workers = _default_workers(meta_file)
+
+    chunks = []
+    records = 0
+    start = time.perf_counter()
+
+    def collect(chunk, bytes_read):
+        nonlocal records
+        chunks.append(chunk)
+        records += len(chunk)
+        if progress:
+            progress(records, bytes_read, time.perf_counter() - start)
+
+    batches = iter_metadata_batches(meta_file, batch_size, max_items)
+
+    if workers <= 1:
+        for items, bytes_read in batches:
+            collect(prepare_batch(meta_file, items, columns), bytes_read)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for items, bytes_read in batches:
+                pending.append((pool.submit(prepare_batch, meta_file, items, columns), bytes_read))
+                if len(pending) >= 2 * workers:
+                    future, done_bytes = pending.popleft()
+                    collect(future.result(), done_bytes)
+            while pending:
+                future, done_bytes = pending.popleft()
+                collect(future.result(), done_bytes)
+
+    if not chunks:
+        df = pd.DataFrame()
+    elif len(chunks) == 1:
+        df = chunks[0]
+    else:
+        df = pd.concat(chunks, ignore_index=True, sort=False)
+
+    if columns is not None:
+        # angefragte, aber nie belegte Attribute trotzdem als leere Spalte liefern
+        df = df.reindex(columns=["SourceFile"] + [c for c in columns if c != "SourceFile"])
+
+    return df
+
+def load_metadata_files(meta_files, workers=None, progress=None):
+    """
+    Lädt mehrere ExifTool-JSONs (z.B. eines pro Jahr/Kamera) als einen
+    Bestand. Jede Datei wird in einem eigenen Worker-Prozess gelesen, ihre
+    SourceFile-Pfade relativ zum eigenen Verzeichnis normalisiert. Die Teile
+    werden einmal am Ende zusammengefügt; die Herkunft landet als
+    Categorical in META_FILE_COL.
+
+    progress(records, bytes_read, elapsed_s) wird je fertiger Datei aufgerufen.
+    """
+    meta_files = [Path(f) for f in meta_files]
+    if workers is None:
+        workers = min(len(meta_files), os.cpu_count() or 1, 8)
+
+    parts = [None] * len(meta_files)
+    records = 0
+    bytes_read = 0
+    start = time.perf_counter()
+
+    def collect(i, part):
+        nonlocal records, bytes_read
+        parts[i] = part
+        records += len(part)
+        bytes_read += os.path.getsize(meta_files[i])
+        if progress:
+            progress(records, bytes_read, time.perf_counter() - start)
+
+    if workers <= 1:
+        for i, meta_file in enumerate(meta_files):
+            collect(i, load_metadata(meta_file, workers=1))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(load_metadata, meta_file, workers=1): i
+                for i, meta_file in enumerate(meta_files)
+            }
+            for future in as_completed(futures):
+                collect(futures[future], future.result())
+
+    lengths = [len(p) for p in parts]
+    non_empty = [p for p in parts if len(p)]
+    df = pd.concat(non_empty, ignore_index=True, sort=False) if non_empty else pd.DataFrame()
+    parts.clear()  # Teile sofort freigeben
+
+    # Herkunft als Codes statt als Text je Zeile
+    names = [f.name for f in meta_files]
+    if len(set(names)) < len(names):
+        names = [str(f) for f in meta_files]
+    codes = np.repeat(np.arange(len(meta_files), dtype=np.int16), lengths)
+    origin = pd.Series(pd.Categorical.from_codes(codes, categories=names), name=META_FILE_COL)
+    # per concat: der zusammengesetzte Frame besteht aus vielen Blöcken
+    return pd.concat([df, origin], axis=1)
+
+def scan_attribute_catalog(
+    meta_file: Path,
+    sample_size=200,
+    batch_size=DEFAULT_BATCH_SIZE,
+    progress=None,
+):
+    """
+    Schneller erster Durchlauf ohne DataFrame: sammelt je Attribut die Anzahl
+    belegter Werte und eine Zufallsstichprobe (Reservoir) für die
+    Typbestimmung, dazu die normalisierten SourceFile-Pfade.
+    """
+    meta_file = Path(meta_file)
+    rng = random.Random(42)
+    counts = {}
+    samples = {}
+    paths = []
+    start = time.perf_counter()
+
+    for items, bytes_read in iter_metadata_batches(meta_file, batch_size):
+        for item in items:
+            src = item.get("SourceFile")
+            if not src:
+                continue
+
+            item.update(extract_directory_levels(src))
+            paths.append(normalize_sourcefile(meta_file, src))
+
+            for key, value in item.items():
+                if value is None or key == "SourceFile":
+                    continue
+                n = counts.get(key, 0) + 1
+                counts[key] = n
+
+                sample = samples.setdefault(key, [])
+                if len(sample) < sample_size:
+                    sample.append(value)
+                else:
+                    j = rng.randrange(n)
+                    if j < sample_size:
+                        sample[j] = value
+
+        if progress:
+            progress(len(paths), bytes_read, time.perf_counter() - start)
+
+    return {
+        "rows": len(paths),
+        "counts": counts,
+        "samples": samples,
+        "source_files": paths,
+    }
+
+def catalog_attribute_stats(catalog):
+    total = catalog["rows"]
+    return {
+        col: {
+            "count": cnt,
+            "percent": 100.0 * cnt / total if total else 0.0
+        }
+        for col, cnt in catalog["counts"].items()
+    }
+
+# ---------- Kompakte Speicherung ----------
+
+def split_sourcefile(df):
+    """
+    Ersetzt SourceFile durch Verzeichnis (Kategorie) + Dateiname, damit die
+    vielen gleichen Verzeichnispfade nur einmal im Speicher liegen.
+    """
+    if "SourceFile" not in df.columns:
+        return df
+
+    parts = df["SourceFile"].astype(str).str.extract(r"^(.*[\\/])?([^\\/]*)$")
+    source = pd.DataFrame(
+        {SOURCE_DIR_COL: parts[0].fillna("").astype("category"), SOURCE_NAME_COL: parts[1]},
+        index=df.index
+    )
+    # per concat statt insert: breite Frames bestehen aus vielen Blöcken
+    out = pd.concat([source, df.drop(columns="SourceFile")], axis=1)
+    out.attrs.update(df.attrs)
+    return out
+
+def source_files(df) -> pd.Series:
+    if "SourceFile" in df.columns:
+        return df["SourceFile"]
+    paths = df[SOURCE_DIR_COL].astype(str) + df[SOURCE_NAME_COL].astype(str)
+    return paths.rename("SourceFile")
+
+def source_names(df) -> pd.Series:
+    if SOURCE_NAME_COL in df.columns:
+        return df[SOURCE_NAME_COL]
+    return df["SourceFile"]
+
+def attribute_columns(df):
+    return [c for c in df.columns if c not in INTERNAL_COLUMNS]
+
+def _smallest_numeric(values: pd.Series) -> pd.Series:
+    non_null = values.dropna()
+    if non_null.empty:
+        return values
+
+    if (non_null % 1 == 0).all():
+        lo, hi = non_null.min(), non_null.max()
+        for dtype in ("int8", "int16", "int32", "int64"):
+            info = np.iinfo(dtype)
+            if info.min <= lo and hi <= info.max:
+                # Lücken -> nullable Int (Maske statt float64 mit NaN)
+                return values.astype(dtype.capitalize() if len(non_null) < len(values) else dtype)
+
+    as_f32 = values.astype("float32")
+    if np.array_equal(as_f32.to_numpy("float64"), values.to_numpy("float64"), equal_nan=True):
+        return as_f32
+    return values.astype("float64")
+
+def compact_column(series: pd.Series) -> pd.Series:
+    """
+    Wählt für eine Spalte die kleinste passende Darstellung:
+    Zahlen -> kleinster int/float-Typ (fast leer: Sparse),
+    Texte mit wenigen Ausprägungen -> Categorical.
+    Gemischte Spalten (z.B. Text und Listen) bleiben unverändert.
+    """
+    if isinstance(series.dtype, (pd.CategoricalDtype, pd.SparseDtype)):
+        return series
+    if pd.api.types.is_bool_dtype(series):
+        return series
+
+    non_null = series.dropna()
+    if non_null.empty:
+        return series
+
+    if pd.api.types.is_numeric_dtype(series):
+        kinds = {float}
+    else:
+        kinds = set(map(type, non_null))
+
+    if kinds <= {int, float, Decimal}:
+        compact = _smallest_numeric(pd.to_numeric(series))
+        null_ratio = 1 - len(non_null) / len(series)
+        if null_ratio >= SPARSE_MIN_NULL_RATIO:
+            exact_f32 = compact.dtype == "float32" or (
+                compact.dtype.kind in "iu" and compact.dtype.itemsize <= 2
+            )
+            dense = compact.astype("float32" if exact_f32 else "float64")
+            return dense.astype(pd.SparseDtype(dense.dtype))
+        return compact
+
+    if kinds == {str} and non_null.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(series):
+        return series.astype("category")
+
+    return series
+
+def compact_dataframe(df):
+    """
+    Kompaktiert alle Spalten nach dem Laden.
+    Liefert (df, {"before": bytes, "after": bytes}).
+    """
+    before = int(df.memory_usage(index=False, deep=True).sum())
+
+    df = split_sourcefile(df.copy(deep=False))
+    for col in attribute_columns(df):
+        df[col] = compact_column(df[col])
+
+    after = int(df.memory_usage(index=False, deep=True).sum())
+    return df, {"before": before, "after": after}
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:,.0f} {unit}"
+        n /= 1024
+    return f"{n:,.1f} TB"
+
+def format_load_progress(records, bytes_read, elapsed):
+    rate = records / elapsed if elapsed > 0 else 0
+    return (
+        f"{records:,} Datensätze · {bytes_read / 1024 ** 2:,.0f} MB gelesen · "
+        f"{rate:,.0f} Datensätze/s"
+    )
+
+def compute_attribute_stats(df):
+    total = len(df)
+    stats = {}
+    for col in attribute_columns(df):
+        cnt = df[col].notna().sum()
+        stats[col] = {
+            "count": int(cnt),
+            "percent": 100.0 * cnt / total if total else 0.0
+        }
+    return stats
+
+def filter_attributes(attributes, query):
+    if not query:
+        return attributes
+    q = query.lower()
+    return [a for a in attributes if q in a.lower()]
+
+# ExifTool-Format (YYYY:MM:DD HH:MM:SS[.sss][+hh:mm]) und ISO-ähnliche Varianten
+_EXIF_DATETIME_RE = (
+    r"^\s*(?P<year>\d{4})[:\-](?P<month>\d{2})[:\-](?P<day>\d{2})"
+    r"(?:[ T](?P<hour>\d{2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?(?:\.\d+)?)?"
+    r"\s*(?P<tz>Z|[+\-]\d{2}:?\d{2})?\s*$"
+)
+
+DATETIME_PARTS = ("year", "month", "weekday", "hour")
+_PART_DTYPES = {"year": np.int16, "month": np.int8, "weekday": np.int8, "hour": np.int8}
+
+
+def _factorize_values(series: pd.Series):
+    """
+    Liefert (codes, eindeutige Werte als Text); fehlende Werte haben Code -1.
+    Bei Categoricals werden nur die Kategorien geparst.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        uniques = series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    return codes, pd.Series(uniques, dtype=object).astype(str)
+
+
+def _parse_datetime_values(values: pd.Series) -> pd.DatetimeIndex:
+    """
+    Parst Text-Zeitstempel vektorisiert nach UTC. Werte ohne Offset gelten
+    als UTC, Werte mit Offset werden umgerechnet (wie pd.to_datetime(utc=True)).
+    """
+    parts = values.str.extract(_EXIF_DATETIME_RE)
+    nums = parts[["year", "month", "day", "hour", "minute", "second"]].apply(
+        pd.to_numeric, errors="coerce"
+    )
+    nums[["hour", "minute", "second"]] = nums[["hour", "minute", "second"]].fillna(0)
+
+    dt = pd.to_datetime(nums, errors="coerce", utc=True)
+
+    tz = parts["tz"].fillna("+00:00").str.replace("Z", "+00:00").str.replace(":", "")
+    sign = np.where(tz.str[0] == "-", -1, 1)
+    offset = sign * (
+        pd.to_numeric(tz.str[1:3], errors="coerce").fillna(0) * 60
+        + pd.to_numeric(tz.str[3:5], errors="coerce").fillna(0)
+    )
+    dt = dt - pd.to_timedelta(offset, unit="m")
+
+    # Seltene Sonderformate: pandas-Parser nur für die nicht erkannten Werte
+    unmatched = parts["year"].isna().to_numpy()
+    if unmatched.any():
+        dt[unmatched] = pd.to_datetime(
+            values[unmatched], errors="coerce", utc=True, format="mixed"
+        )
+
+    return pd.DatetimeIndex(dt)
+
+
+def parse_exif_datetime_series(series: pd.Series) -> pd.Series:
+    codes, uniques = _factorize_values(series)
+    parsed = _parse_datetime_values(uniques)
+
+    valid = codes >= 0
+    return pd.Series(parsed.take(codes[valid]), index=series.index[valid])
+
+
+def _parse_datetime_values_with_format(values: pd.Series, fmt) -> pd.DatetimeIndex:
+    """
+    Exaktes Parsen mit dem bei der Typbestimmung erkannten Format;
+    nur Werte, die nicht passen, laufen über den allgemeinen Parser.
+    """
+    parsed = pd.to_datetime(values, format=fmt, errors="coerce", utc=True)
+    missing = parsed.isna().to_numpy() & values.notna().to_numpy()
+    if missing.any():
+        parsed[missing] = _parse_datetime_values(values[missing])
+    return pd.DatetimeIndex(parsed)
+
+
+def parse_datetime_components(series: pd.Series, fmt=None) -> dict:
+    """
+    Zerlegt eine Datums-Spalte einmalig in kompakte Komponenten-Arrays
+    (year int16, month/weekday/hour int8; -1 = kein gültiger Wert) und
+    die Menge der vorkommenden Werte je Komponente.
+    fmt: strptime-Format aus der Typbestimmung (optional).
+    """
+    codes, uniques = _factorize_values(series)
+    if fmt:
+        parsed = _parse_datetime_values_with_format(uniques, fmt)
+    else:
+        parsed = _parse_datetime_values(uniques)
+
+    comps = {"unique": {}}
+    for part in DATETIME_PARTS:
+        per_value = getattr(parsed, part).to_numpy(dtype="float64", na_value=np.nan)
+        # letzter Eintrag für Code -1 (fehlender Wert)
+        per_value = np.append(np.nan_to_num(per_value, nan=-1), -1)
+        arr = per_value.astype(_PART_DTYPES[part])[codes]
+        comps[part] = arr
+        comps["unique"][part] = present_values(arr)
+
+    return comps
+
+
+def present_values(arr, mask=None):
+    """
+    Sortierte Liste der vorkommenden Komponentenwerte (optional nur unter mask).
+    """
+    if mask is not None:
+        arr = arr[mask]
+    arr = arr[arr >= 0]
+    if arr.size == 0:
+        return []
+    lo = int(arr.min())
+    counts = np.bincount(arr.astype(np.int64) - lo)
+    return [int(v) + lo for v in np.flatnonzero(counts)]
+
+
+def component_counts(arr, mask=None) -> dict:
+    """
+    Häufigkeit je Komponentenwert {wert: anzahl} (optional nur unter mask),
+    mit einem bincount statt einer Zählung pro Wert.
+    """
+    if mask is not None:
+        arr = arr[mask]
+    arr = arr[arr >= 0]
+    if arr.size == 0:
+        return {}
+    lo = int(arr.min())
+    counts = np.bincount(arr.astype(np.int64) - lo)
+    return {int(v) + lo: int(counts[v]) for v in np.flatnonzero(counts)}
+
+
+def new_datetime_store(formats=None):
+    """
+    Leerer Komponenten-Store; formats = {attribut: strptime-Format}
+    aus der Typbestimmung, damit später exakt geparst werden kann.
+    """
+    return {attr: {"format": fmt} for attr, fmt in (formats or {}).items() if fmt}
+
+
+def _has_components(comps, n):
+    return comps is not None and "year" in comps and len(comps["year"]) == n
+
+
+def datetime_components(store, df, attr):
+    """
+    Komponenten aus dem Store holen, beim ersten Zugriff einmalig parsen.
+    """
+    comps = store.get(attr)
+    if not _has_components(comps, len(df)):
+        fmt = comps.get("format") if comps else None
+        with perf.span("datetime.components", rows=len(df), attr=attr):
+            comps = parse_datetime_components(df[attr], fmt)
+        comps["format"] = fmt
+        store[attr] = comps
+    return comps
+
+
+def get_datetime_components(series, store=None, attr=None, mask=None):
+    """
+    Vorkommende Jahr/Monat/Wochentag/Stunde-Werte. Mit Store werden die
+    vorberechneten Komponenten genutzt (optional eingeschränkt auf mask).
+    """
+    if store is not None and attr is not None:
+        comps = store.get(attr)
+        if _has_components(comps, len(series)):
+            if mask is None:
+                return comps["unique"]
+            return {part: present_values(comps[part], mask) for part in DATETIME_PARTS}
+
+    comps = parse_datetime_components(series)
+    if mask is None:
+        return comps["unique"]
+    return {part: present_values(comps[part], mask) for part in DATETIME_PARTS}
+
+# -------------------------------
+# Kategoriale Werte (auch Listen)
+# -------------------------------
+# Listenwerte (z.B. Keywords) werden elementweise angeboten und gefiltert:
+# eine Zeile passt, wenn eines ihrer Elemente gewählt ist.
+
+def _is_list(value) -> bool:
+    return isinstance(value, (list, tuple))
+
+
+def _option_elements(series: pd.Series) -> pd.Series:
+    """
+    Hashbare Einzelwerte einer Spalte, Listen aufgelöst (Index = Zeile).
+    """
+    values = series.dropna()
+    if values.dtype == object:
+        values = values.explode().dropna()
+        values = values[~values.map(lambda v: isinstance(v, (list, tuple, dict)))]
+    return values
+
+
+def sorted_values(values) -> list:
+    try:
+        return sorted(values)
+    except TypeError:  # gemischte Typen (z.B. 1 und "1/200")
+        return sorted(values, key=str)
+
+
+def option_values(series: pd.Series) -> list:
+    """
+    Sortierte Auswahlwerte einer kategorialen Spalte; Listen tragen ihre
+    Elemente bei.
+    """
+    return sorted_values(pd.unique(_option_elements(series)).tolist())
+
+
+def option_counts(series: pd.Series, mask=None) -> dict:
+    """
+    {wert: anzahl zeilen} der Auswahlwerte (optional nur unter mask); eine
+    Liste zählt jedes ihrer Elemente einmal.
+    """
+    series = series.reset_index(drop=True)
+    if mask is not None:
+        series = series[mask]
+    elements = _option_elements(series)
+    if len(elements) > series.count():  # Listen -> je Zeile und Wert einmal
+        pairs = pd.DataFrame({"row": elements.index, "value": elements.to_numpy()})
+        elements = pairs.drop_duplicates()["value"]
+    counts = elements.value_counts(sort=False)
+    return {v: int(c) for v, c in counts.items() if c}
+
+
+def categorical_mask(series: pd.Series, selected) -> np.ndarray:
+    """
+    Zeilen, deren Wert (oder eines ihrer Listenelemente) gewählt ist.
+    """
+    series = series.reset_index(drop=True)
+    mask = series.isin(selected).to_numpy(dtype=bool, copy=True)
+    if series.dtype == object:
+        lists = series.map(_is_list).to_numpy(dtype=bool)
+        if lists.any():
+            hits = series[lists].explode().isin(selected).groupby(level=0).any()
+            mask[hits.index[hits.to_numpy(dtype=bool)]] = True
+    return mask
+
+
+def attribute_filter_mask(df, attr, f, attr_type, dt_store=None):
+    """
+    Maske eines einzelnen Attributfilters oder None, wenn der Filter passiv ist.
+    """
+    if not f:  # Wenn der Filter leer ist (z.B. nach Clear All), überspringen = Passiv
+        return None
+
+    if attr_type == "datetime":
+        comps = datetime_components({} if dt_store is None else dt_store, df, attr)
+
+        # Nur Komponenten filtern, in denen tatsächlich Werte gewählt wurden
+        mask = None
+        for part in DATETIME_PARTS:
+            if f.get(part):
+                part_mask = np.isin(comps[part], f[part])
+                mask = part_mask if mask is None else mask & part_mask
+        return mask
+
+    if attr_type == "numeric":
+        return df[attr].between(f[0], f[1]).to_numpy(dtype=bool, na_value=False)
+
+    if attr_type == "gps":
+        return geo.coordinate_mask(df[attr], f)
+
+    # categorical
+    if isinstance(f, list) and len(f) > 0:
+        return categorical_mask(df[attr], f)
+    return None
+
+
+def media_filter_mask(df, media_filter):
+    # Globaler Medienfilter; None = alle Medien
+    if media_filter == "Alle Medien":
+        return None
+
+    names = source_names(df).astype(str).str.lower()
+    if media_filter == "Nur Bilder":
+        return names.str.endswith(tuple(IMAGE_EXTS)).to_numpy(dtype=bool)
+    if media_filter == "Nur Videos":
+        return names.str.endswith(tuple(VIDEO_EXTS)).to_numpy(dtype=bool)
+    return None
+
+
+def filter_mask(df, filters, types, media_filter, dt_store=None, exclude_attr=None):
+    """
+    Boolesche Maske (NumPy) aller aktiven Filter; exclude_attr bleibt außen vor.
+    """
+    with perf.span("filter.mask", rows=len(df)):
+        return _filter_mask(df, filters, types, media_filter, dt_store, exclude_attr)
+
+
+def _filter_mask(df, filters, types, media_filter, dt_store, exclude_attr):
+    mask = np.ones(len(df), dtype=bool)
+
+    for attr, f in filters.items():
+        if attr == exclude_attr:
+            continue
+        attr_mask = attribute_filter_mask(df, attr, f, types[attr], dt_store)
+        if attr_mask is not None:
+            mask &= attr_mask
+
+    media_mask = media_filter_mask(df, media_filter)
+    if media_mask is not None:
+        mask &= media_mask
+
+    return mask
+
+
+def apply_filters(df, filters, types, media_filter, dt_store=None):
+    return df[filter_mask(df, filters, types, media_filter, dt_store)]
+
+
+def apply_filters_except(df, filters, types, media_filter, exclude_attr=None, dt_store=None):
+    # Nutzt die gleiche Logik wie apply_filters, schließt aber ein Attribut aus
+    return df[filter_mask(df, filters, types, media_filter, dt_store, exclude_attr)]
@@ -0,0 +1,325 @@
+# metadata_delta.py
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import metadata_cache as mc
+import metadata_core as core
+import value_parsers as vp
+from attribute_types import datetime_formats, infer_all_attribute_details
+
+# Eintrag im Delta-JSON, der eine Datei als gelöscht markiert:
+#   {"SourceFile": "./2024/img.jpg", "_Deleted": true}
+DELETE_KEY = "_Deleted"
+
+# Im Snapshot-Modus gelten Zeilen mit gleichen Werten hier als unverändert
+CHANGE_COLUMNS = ("FileModifyDate", "FileSize")
+
+# -------------------------------
+# Schlüssel
+# -------------------------------
+
+def normalize_key(paths: pd.Series) -> pd.Series:
+    """
+    Vergleichsschlüssel für SourceFile: normalisierte Trenner und './',
+    unter Windows zusätzlich ohne Groß-/Kleinschreibung.
+    """
+    keys = paths.astype(str).map(os.path.normpath)
+    if os.name == "nt":
+        keys = keys.str.lower()
+    return keys
+
+
+def _deleted_mask(delta: pd.DataFrame) -> np.ndarray:
+    if DELETE_KEY not in delta.columns:
+        return np.zeros(len(delta), dtype=bool)
+    flags = delta[DELETE_KEY]
+    return flags.map(lambda v: v is True or str(v).lower() in ("1", "true", "yes")).to_numpy(dtype=bool)
+
+
+def _unchanged_mask(df, base_pos, delta) -> np.ndarray:
+    # nur Zeilen, die es schon gibt, und nur wenn die Spalten überall vorhanden sind
+    cols = [c for c in CHANGE_COLUMNS if c in df.columns and c in delta.columns]
+    if not cols:
+        return np.zeros(len(delta), dtype=bool)
+
+    exists = base_pos >= 0
+    same = exists.copy()
+    for col in cols:
+        # umgewandelte Spalten über den Originaltext vergleichen
+        base_col = col + vp.TEXT_SUFFIX if col + vp.TEXT_SUFFIX in df.columns else col
+        old = np.full(len(delta), None, dtype=object)
+        old[exists] = df[base_col].iloc[base_pos[exists]].astype(object).to_numpy()
+        new = delta[col].astype(object).to_numpy()
+        same &= pd.Series(old).astype(str).to_numpy() == pd.Series(new).astype(str).to_numpy()
+    return same
+
+# -------------------------------
+# Zusammenführen
+# -------------------------------
+
+def _densify(series: pd.Series) -> pd.Series:
+    if isinstance(series.dtype, pd.SparseDtype):
+        return series.sparse.to_dense()
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype(object)
+    return series
+
+
+def _numeric(series: pd.Series) -> bool:
+    # nur über den Dtype, ohne die Spalte zu durchlaufen
+    dtype = series.dtype
+    if isinstance(dtype, pd.SparseDtype):
+        dtype = dtype.subtype
+    elif isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    return pd.api.types.is_numeric_dtype(dtype)
+
+
+def _nullable_dtype(dtype):
+    if isinstance(dtype, np.dtype) and dtype.kind in "iu":
+        name = dtype.name
+        return pd.api.types.pandas_dtype("U" + name[1:].capitalize() if dtype.kind == "u" else name.capitalize())
+    if isinstance(dtype, np.dtype) and dtype.kind == "b":
+        return pd.BooleanDtype()
+    return dtype
+
+
+def _all_text(values: pd.Series) -> bool:
+    return bool(values.astype(object).map(lambda v: isinstance(v, str)).all())
+
+
+def _merge_categorical(base_part: pd.Series, delta_part: pd.Series):
+    """
+    Kategorien vereinigen und Codes aneinanderhängen, statt die ganze
+    Spalte als object neu zu kompaktieren. None, wenn das Delta andere
+    Werte als Texte enthält.
+    """
+    values = delta_part.dropna().astype(object)
+    if not _all_text(values):
+        return None
+
+    categories = base_part.cat.categories
+    new = pd.Index(pd.unique(values)).difference(categories)
+    if len(new):
+        categories = categories.append(new)
+    codes = np.concatenate([
+        base_part.cat.codes.to_numpy(dtype=np.int32),
+        categories.get_indexer(delta_part.astype(object)).astype(np.int32),
+    ])
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories))
+
+
+def _merge_column(base_part: pd.Series, delta_part, n_delta: int, touched: bool) -> pd.Series:
+    if not touched:
+        # Lücken im gleichen Dtype, damit Categorical/Sparse/float32 erhalten
+        # bleiben; Ganzzahlen werden nullable wie in compact_column
+        dtype = _nullable_dtype(base_part.dtype)
+        pad = pd.Series(index=pd.RangeIndex(n_delta), dtype=dtype)
+        merged = pd.concat([base_part.astype(dtype), pad], ignore_index=True)
+        if merged.dtype == dtype:
+            return merged
+        return core.compact_column(_densify(merged))
+
+    if delta_part is None:
+        delta_part = pd.Series([None] * n_delta, dtype=object)
+    delta_part = delta_part.reset_index(drop=True)
+
+    if isinstance(base_part.dtype, pd.CategoricalDtype):
+        merged = _merge_categorical(base_part, delta_part)
+        if merged is not None:
+            return merged
+
+    if isinstance(base_part.dtype, pd.StringDtype) and _all_text(delta_part.dropna()):
+        # viele verschiedene Texte (sonst wäre es Categorical): nur anhängen
+        return pd.concat([base_part, delta_part.astype(base_part.dtype)], ignore_index=True)
+
+    if isinstance(base_part.dtype, pd.SparseDtype) and _numeric(delta_part.dropna()):
+        # dünn belegte Zahlen bleiben Sparse, ohne die Spalte zu verdichten
+        delta_part = delta_part.astype("float64").astype(base_part.dtype)
+        return pd.concat([base_part, delta_part], ignore_index=True)
+
+    merged = pd.concat(
+        [_densify(base_part), _densify(delta_part.reset_index(drop=True))],
+        ignore_index=True
+    )
+    return core.compact_column(merged)
+
+
+def merge_delta(df, types, stats, delta, snapshot: bool = False):
+    """
+    Führt ein Delta (DataFrame aus core.load_metadata) in den geladenen
+    Bestand ein: Zeilen mit bekanntem SourceFile werden ersetzt, neue
+    angehängt, als gelöscht markierte entfernt. Im Snapshot-Modus gilt das
+    Delta als vollständiger neuer Stand (fehlende Dateien werden entfernt,
+    unveränderte Zeilen übersprungen).
+
+    Typen und Füllstände werden nur für betroffene Spalten neu bestimmt.
+    Liefert (df, types, stats, zusammenfassung).
+    """
+    parsers = dict(df.attrs.get("value_parsers", {}))
+    base_keys = normalize_key(core.source_files(df))
+    delta_keys = normalize_key(delta["SourceFile"]) if len(delta) else pd.Series([], dtype=object)
+
+    # bei doppelten Einträgen im Delta gilt der letzte
+    last = ~delta_keys.duplicated(keep="last").to_numpy()
+    delta, delta_keys = delta[last].reset_index(drop=True), delta_keys[last].reset_index(drop=True)
+
+    # Position der Bestandszeile je Delta-Zeile, -1 = neu
+    pos_of = pd.Series(np.arange(len(base_keys)), index=base_keys.to_numpy())
+    pos_of = pos_of[~pos_of.index.duplicated(keep="last")]
+    base_pos = pos_of.reindex(delta_keys.to_numpy()).fillna(-1).to_numpy(np.int64)
+
+    deleted = _deleted_mask(delta)
+    unchanged = _unchanged_mask(df, base_pos, delta) if snapshot else np.zeros(len(delta), dtype=bool)
+    upsert = ~deleted & ~unchanged
+
+    # zu entfernende Bestandszeilen: ersetzt, gelöscht oder (Snapshot) nicht mehr vorhanden
+    remove = np.zeros(len(df), dtype=bool)
+    remove[base_pos[(base_pos >= 0) & (deleted | upsert)]] = True
+    if snapshot:
+        remove |= ~base_keys.isin(set(delta_keys)).to_numpy()
+
+    upserts = delta[upsert].drop(columns=[DELETE_KEY], errors="ignore")
+    upserts = upserts.reset_index(drop=True)
+    updated = int((upsert & (base_pos >= 0)).sum())
+    summary = {
+        "added": int(upsert.sum()) - updated,
+        "updated": updated,
+        "removed": int(remove.sum()) - updated,
+        "unchanged": int(unchanged.sum()),
+    }
+
+    # formatierte Werte wie im Bestand umwandeln, neue Spalten erkennen
+    new_columns = [c for c in upserts.columns if c != "SourceFile" and c not in df.columns]
+    for col in upserts.columns:
+        # bisher reine Zahlen, im Delta formatiert (z.B. FNumber "1/2")
+        if (col in df.columns and col not in parsers and _numeric(df[col])
+                and not _numeric(upserts[col].dropna())):
+            kind = vp.detect_parser(upserts[col])
+            if kind:
+                parsers[col] = kind
+    for col, kind in parsers.items():
+        if col in upserts.columns:
+            upserts[col + vp.TEXT_SUFFIX] = upserts[col]
+            upserts[col] = vp.parse_values(upserts[col], kind)
+    upserts, new_parsers = vp.parse_formatted_columns(upserts, columns=new_columns)
+    parsers.update(new_parsers)
+    upserts = core.split_sourcefile(upserts)
+
+    # nur Spalten mit mindestens einem Wert im Delta; die übrigen werden für
+    # die neuen Zeilen bloß aufgefüllt und nicht neu typisiert
+    touched = [
+        c for c in upserts.columns
+        if c not in core.INTERNAL_COLUMNS and upserts[c].notna().any()
+    ]
+    touched_set = set(touched)
+
+    # Füllstände: entfernte Zeilen abziehen, neue addieren (nur Delta-Größe)
+    removed_rows = df[remove]
+    counts = {col: s["count"] for col, s in stats.items()}
+    for col in core.attribute_columns(df):
+        if col in removed_rows.columns and len(removed_rows):
+            counts[col] = counts.get(col, 0) - int(removed_rows[col].notna().sum())
+    for col in touched:
+        counts[col] = counts.get(col, 0) + int(upserts[col].notna().sum())
+
+    keep = ~remove
+    n_delta = len(upserts)
+    merged = {}
+    for col in df.columns:
+        merged[col] = _merge_column(
+            df[col][keep], upserts.get(col), n_delta, col in touched_set or col in core.INTERNAL_COLUMNS
+        )
+    for col in touched:
+        if col not in merged:
+            merged[col] = _merge_column(
+                pd.Series([None] * int(keep.sum()), dtype=object), upserts[col], n_delta, True
+            )
+
+    attrs = dict(df.attrs)
+    out = pd.DataFrame(merged)
+    out.attrs.update(attrs)
+    out.attrs["value_parsers"] = parsers
+
+    total = len(out)
+    stats = {
+        col: {"count": int(cnt), "percent": 100.0 * cnt / total if total else 0.0}
+        for col, cnt in counts.items()
+        if col in out.columns
+    }
+
+    # Typen nur für betroffene Spalten neu bestimmen
+    types = dict(types)
+    formats = dict(out.attrs.get("datetime_formats", {}))
+    if touched:
+        details = infer_all_attribute_details(out, columns=touched)
+        for col, d in details.items():
+            types[col] = d["type"]
+            formats.pop(col, None)
+        formats.update(datetime_formats(details))
+    out.attrs["datetime_formats"] = formats
+
+    # Speicherbedarf fortschreiben statt den ganzen Bestand zu vermessen
+    report = dict(out.attrs.get("memory_report") or {})
+    if report.get("after"):
+        report["after"] = int(
+            report["after"]
+            + upserts.memory_usage(index=False, deep=True).sum()
+            - removed_rows.memory_usage(index=False, deep=True).sum()
+        )
+    else:
+        report["after"] = int(out.memory_usage(index=False, deep=True).sum())
+    out.attrs["memory_report"] = report
+
+    summary["columns"] = len(touched)
+    return out, types, stats, summary
+
+# -------------------------------
+# Delta-Datei anwenden
+# -------------------------------
+
+def apply_delta_file(
+    meta_file,
+    delta_file,
+    snapshot: bool = False,
+    use_cache: bool = True,
+    base=None,
+    progress=None
+):
+    """
+    Spielt ein Delta-JSON in den Bestand ein und schreibt das Ergebnis in
+    den Cache zurück. base: bereits geladenes (df, types, stats), sonst wird
+    der Bestand (bevorzugt aus dem Cache) gelesen. Ein bereits angewandtes
+    Delta (gleicher Inhalt) wird übersprungen.
+    Liefert (df, types, stats, zusammenfassung).
+    """
+    meta_file, delta_file = Path(meta_file), Path(delta_file)
+    if base is None:
+        df, types, stats, _ = mc.load_metadata_cached(meta_file, use_cache=use_cache)
+    else:
+        df, types, stats = base
+
+    delta_source = mc.source_key(delta_file)
+    applied = list(df.attrs.get("applied_deltas", []))
+    if any(d.get("hash") == delta_source["hash"] for d in applied):
+        return df, types, stats, {"skipped": True}
+
+    delta = core.load_metadata(delta_file, progress=progress)
+    if "SourceFile" not in delta.columns:
+        delta = pd.DataFrame({"SourceFile": pd.Series([], dtype=object)})
+
+    # SourceFile ist wie im Bestand schon absolut (relativ zum jeweiligen JSON)
+    df, types, stats, summary = merge_delta(df, types, stats, delta, snapshot=snapshot)
+
+    applied.append(dict(delta_source, snapshot=snapshot))
+    df.attrs["applied_deltas"] = applied
+
+    if use_cache and mc.cache_available():
+        mc.save_cache(meta_file, df, types, stats, content_hash=mc.cached_content_hash(meta_file))
+
+    summary["skipped"] = False
+    return df, types, stats, summary
@@ -1,63 +1,305 @@
+import errno
+import json
 import os
 import shutil
 import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def open_in_explorer(file_paths, base_dir):
+SELECTION_DIR_NAME = "_metaExplorer_selection"
+
+# Merkt sich, welcher Eintrag im Sammelordner auf welche Datei zeigt
+MANIFEST_NAME = ".metaexplorer_manifest.json"
+
+# Einträge je Arbeitspaket; Windows bündelt ein Paket in einem PowerShell-Aufruf
+CHUNK_SIZE = 500
+WINDOWS_CHUNK_SIZE = 1000
+
+# -------------------------------
+# Backends
+# -------------------------------
+# Jedes Backend bekommt [(link_pfad, ziel), ...] und liefert
+# {"created": [...], "missing": [...], "failed": [...]} mit den Link-Namen.
+
+def _split_missing(pairs):
+    present, missing = [], []
+    for link_path, target in pairs:
+        (present if target.exists() else missing).append((link_path, target))
+    return present, [link.name for link, _ in missing]
+
+
+def create_symlinks(pairs):
+    present, missing = _split_missing(pairs)
+    created, failed = [], []
+    for link_path, target in present:
+        try:
+            # absolut: relative Ziele gälten sonst relativ zum Sammelordner
+            os.symlink(os.path.abspath(target), link_path)
+            created.append(link_path.name)
+        except OSError:
+            failed.append(link_path.name)
+    return {"created": created, "missing": missing, "failed": failed}
+
+
+def create_hardlinks(pairs):
+    present, missing = _split_missing(pairs)
+    created, failed = [], []
+    for link_path, target in present:
+        try:
+            os.link(target, link_path)
+            created.append(link_path.name)
+        except OSError as e:
+            # anderes Laufwerk/Dateisystem -> wenigstens ein Symlink
+            if e.errno != errno.EXDEV:
+                failed.append(link_path.name)
+                continue
+            try:
+                os.symlink(os.path.abspath(target), link_path)
+                created.append(link_path.name)
+            except OSError:
+                failed.append(link_path.name)
+    return {"created": created, "missing": missing, "failed": failed}
+
+
+# Liest die Paare als JSON von stdin, damit Pfade nie im Skripttext landen
+# (als UTF-8, sonst dekodiert PowerShell mit der OEM-Codepage: Umlaute!)
+_PS_SCRIPT = r"""
+[Console]::InputEncoding = [System.Text.Encoding]::UTF8
+[Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+$pairs = [Console]::In.ReadToEnd() | ConvertFrom-Json
+$WshShell = New-Object -ComObject WScript.Shell
+foreach ($p in $pairs) {
+    try {
+        $Shortcut = $WshShell.CreateShortcut($p.link)
+        $Shortcut.TargetPath = $p.target
+        $Shortcut.WorkingDirectory = $p.dir
+        $Shortcut.Save()
+    } catch {
+        [Console]::Out.WriteLine("FAILED`t" + $p.link)
+    }
+}
+"""
+
+
+def create_windows_shortcuts(pairs):
     """
-    Erstellt einen Sammelordner mit Windows-Shortcuts (.lnk)
-    zu allen übergebenen Dateien und öffnet ihn im Explorer.
+    Erstellt alle Windows-Verknüpfungen (.lnk) eines Pakets in einer
+    einzigen PowerShell-/COM-Sitzung statt einem Prozess pro Datei.
     """
+    present, missing = _split_missing(pairs)
+    if not present:
+        return {"created": [], "missing": missing, "failed": []}
 
-    base_dir = Path(base_dir)
-    explorer_dir = base_dir / "_metaExplorer_selection"
+    payload = json.dumps([
+        {"link": str(link), "target": str(target), "dir": str(target.parent)}
+        for link, target in present
+    ])
+    result = subprocess.run(
+        ["powershell", "-NoProfile", "-NonInteractive", "-Command", _PS_SCRIPT],
+        input=payload, capture_output=True, text=True, encoding="utf-8"
+    )
 
-    # Ordner neu aufbauen
-    if explorer_dir.exists():
-        shutil.rmtree(explorer_dir)
-    explorer_dir.mkdir(parents=True, exist_ok=True)
+    failed = {
+        Path(line.split("\t", 1)[1]).name
+        for line in result.stdout.splitlines()
+        if line.startswith("FAILED\t")
+    }
+    if result.returncode != 0:
+        failed |= {link.name for link, _ in present if not link.exists()}
 
-    name_counter = {}
+    created = [link.name for link, _ in present if link.name not in failed]
+    return {"created": created, "missing": missing, "failed": sorted(failed)}
+
+
+def create_windows_shortcut(link_path: Path, target_path: Path):
+    """
+    Erstellt eine einzelne Windows-Verknüpfung (.lnk) per PowerShell.
+    """
+    create_windows_shortcuts([(Path(link_path), Path(target_path))])
+
+
+# name -> (Endung der Einträge, Funktion, Paketgröße)
+BACKENDS = {
+    "windows": (".lnk", create_windows_shortcuts, WINDOWS_CHUNK_SIZE),
+    "symlink": ("", create_symlinks, CHUNK_SIZE),
+    "hardlink": ("", create_hardlinks, CHUNK_SIZE),
+}
 
-    for file_path in file_paths:
-        target = Path(file_path)
 
-        if not target.exists():
-            continue
+def default_backend() -> str:
+    return "windows" if os.name == "nt" else "symlink"
+
+
+def available_backends():
+    if os.name == "nt":
+        return ["windows", "hardlink", "symlink"]
+    return ["symlink", "hardlink"]
+
+# -------------------------------
+# Sammelordner abgleichen
+# -------------------------------
+
+def plan_links(file_paths, suffix: str = "") -> dict:
+    """
+    Gewünschter Inhalt des Sammelordners: {eintragsname: absoluter zielpfad}.
+    Gleiche Dateinamen bekommen wie bisher " (1)", " (2)", ... angehängt.
+    """
+    plan = {}
+    name_counter = {}
 
+    for file_path in file_paths:
+        target = Path(os.path.abspath(file_path))
         stem = target.stem
-        suffix = target.suffix
+        ext = target.suffix
 
         # Kollisionen vermeiden
         count = name_counter.get(stem, 0)
         name_counter[stem] = count + 1
 
         if count == 0:
-            link_name = f"{stem}{suffix}.lnk"
+            link_name = f"{stem}{ext}{suffix}"
         else:
-            link_name = f"{stem} ({count}){suffix}.lnk"
+            link_name = f"{stem} ({count}){ext}{suffix}"
 
-        link_path = explorer_dir / link_name
+        plan[link_name] = str(target)
 
-        create_windows_shortcut(link_path, target)
+    return plan
 
-    # Explorer öffnen
-    subprocess.Popen(["explorer", str(explorer_dir)])
 
-def create_windows_shortcut(link_path: Path, target_path: Path):
+def _read_manifest(explorer_dir: Path) -> dict:
+    try:
+        with open(explorer_dir / MANIFEST_NAME, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _write_manifest(explorer_dir: Path, manifest: dict):
+    tmp = explorer_dir / (MANIFEST_NAME + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, explorer_dir / MANIFEST_NAME)
+
+
+def _remove_entry(path: Path):
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
+
+def _points_to(entry: Path, target: str) -> bool:
+    # Symlinks über das aufgelöste Ziel prüfen (z.B. früher relativ angelegt)
+    if not entry.is_symlink():
+        return True
+    return os.path.realpath(entry) == os.path.realpath(target)
+
+
+def diff_selection(explorer_dir: Path, plan: dict, backend: str):
     """
-    Erstellt eine Windows-Verknüpfung (.lnk) per PowerShell.
+    Vergleicht den vorhandenen Sammelordner mit dem gewünschten Inhalt.
+    Liefert (behalten, zu_löschen, zu_erstellen) als Namenslisten.
+    Einträge ohne Manifest-Eintrag (alte Ordner, andere Backends) werden
+    neu erstellt.
     """
+    manifest = _read_manifest(explorer_dir)
+    if manifest.pop("__backend__", None) != backend:
+        manifest = {}
+
+    existing = {
+        p.name for p in explorer_dir.iterdir()
+        if not p.name.startswith(MANIFEST_NAME)
+    } if explorer_dir.is_dir() else set()
+
+    keep = [
+        name for name, target in plan.items()
+        if name in existing and manifest.get(name) == target
+        and _points_to(explorer_dir / name, target)
+    ]
+    keep_set = set(keep)
+    remove = sorted(existing - keep_set)
+    create = [name for name in plan if name not in keep_set]
+    return keep, remove, create
 
-    ps_script = f"""
-    $WshShell = New-Object -ComObject WScript.Shell
-    $Shortcut = $WshShell.CreateShortcut("{link_path}")
-    $Shortcut.TargetPath = "{target_path}"
-    $Shortcut.WorkingDirectory = "{target_path.parent}"
-    $Shortcut.Save()
+
+def materialize_selection(
+    file_paths,
+    base_dir,
+    backend=None,
+    workers=None,
+    progress=None
+) -> dict:
+    """
+    Baut den Sammelordner '_metaExplorer_selection' mit Verknüpfungen zu
+    allen übergebenen Dateien auf. Vorhandene, passende Einträge bleiben
+    stehen; nur Differenzen werden gelöscht bzw. paketweise parallel neu
+    erstellt. progress(fertig, gesamt) wird je Paket aufgerufen.
     """
+    backend = backend or default_backend()
+    suffix, create_links, chunk_size = BACKENDS[backend]
 
-    subprocess.run(
-        ["powershell", "-NoProfile", "-Command", ps_script],
-        capture_output=True
-    )
+    explorer_dir = Path(base_dir) / SELECTION_DIR_NAME
+    explorer_dir.mkdir(parents=True, exist_ok=True)
+
+    plan = plan_links(file_paths, suffix)
+    keep, remove, create = diff_selection(explorer_dir, plan, backend)
+
+    for name in remove:
+        try:
+            _remove_entry(explorer_dir / name)
+        except OSError:
+            pass
+
+    pairs = [(explorer_dir / name, Path(plan[name])) for name in create]
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+    stats = {"dir": explorer_dir, "kept": len(keep), "removed": len(remove),
+             "created": 0, "missing": 0, "failed": 0}
+    manifest = {name: plan[name] for name in keep}
+
+    if workers is None:
+        workers = min(os.cpu_count() or 1, 4 if backend == "windows" else 8)
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for chunk, result in zip(chunks, pool.map(create_links, chunks)):
+            for name in result["created"]:
+                manifest[name] = plan[name]
+            stats["created"] += len(result["created"])
+            stats["missing"] += len(result["missing"])
+            stats["failed"] += len(result["failed"])
+            done += len(chunk)
+            if progress is not None:
+                progress(done, len(pairs))
+
+    manifest["__backend__"] = backend
+    _write_manifest(explorer_dir, manifest)
+    return stats
+
+# -------------------------------
+# Öffnen
+# -------------------------------
+
+def open_folder(path):
+    """
+    Öffnet einen Ordner im Dateimanager des Systems.
+    """
+    path = str(path)
+    if os.name == "nt":
+        subprocess.Popen(["explorer", path])
+    elif sys.platform == "darwin":
+        subprocess.Popen(["open", path])
+    elif shutil.which("xdg-open"):
+        subprocess.Popen(["xdg-open", path])
+
+
+def open_in_explorer(file_paths, base_dir, backend=None, progress=None):
+    """
+    Erstellt einen Sammelordner mit Verknüpfungen (Windows: .lnk,
+    sonst Symlinks oder Hardlinks) zu allen übergebenen Dateien und
+    öffnet ihn im Dateimanager.
+    """
+    stats = materialize_selection(file_paths, base_dir, backend=backend, progress=progress)
+    open_folder(stats["dir"])
+    return stats
@@ -0,0 +1,213 @@
+# perf_spans.py
+#
+# Leichte Zeitmessung in benannten Abschnitten (Spans). Ein "Lauf" sammelt
+# alle Spans eines Streamlit-Reruns (oder eines CLI-Aufrufs); Spans ohne
+# aktiven Lauf kosten praktisch nichts.
+#
+#   run = perf.start_run("rerun")
+#   with perf.span("filter.cross", rows=len(df)):
+#       ...
+#   perf.finish_run(run)
+#
+# Je Span: Wandzeit, verarbeitete Zeilen und RSS-Differenz. Läufe lassen
+# sich als Chrome-Trace (chrome://tracing, Perfetto) speichern.
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:  # RSS dann über /proc (Linux) oder gar nicht
+    psutil = None
+
+# METAEXPLORER_PERF=0 schaltet die Messung ab
+ENABLED = os.environ.get("METAEXPLORER_PERF", "1") != "0"
+
+_local = threading.local()
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# -------------------------------
+# Speicher
+# -------------------------------
+
+def rss_bytes():
+    """
+    Aktueller Arbeitsspeicher des Prozesses in Bytes, None wenn unbekannt.
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+# -------------------------------
+# Läufe
+# -------------------------------
+
+def start_run(label: str = "") -> dict:
+    """
+    Beginnt einen neuen Lauf im aktuellen Thread und liefert ihn.
+    """
+    run = {
+        "label": label,
+        "started": time.time(),
+        "t0": time.perf_counter(),
+        "rss_start": rss_bytes(),
+        "spans": [],
+        "seconds": None,
+    }
+    _local.run = run
+    _local.stack = []
+    return run
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def finish_run(run=None) -> dict:
+    run = run or current_run()
+    if run is None:
+        return None
+    run["seconds"] = time.perf_counter() - run["t0"]
+    if current_run() is run:
+        _local.run = None
+    return run
+
+
+def bind(fn, run=None):
+    """
+    Bindet fn an einen Lauf, damit Spans aus Arbeits-Threads (z. B. der
+    Slideshow-Vorausladung) im Lauf des aufrufenden Threads landen.
+    """
+    run = run or current_run()
+    if run is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        previous, previous_stack = current_run(), getattr(_local, "stack", [])
+        _local.run, _local.stack = run, []
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.run, _local.stack = previous, previous_stack
+
+    return wrapper
+
+# -------------------------------
+# Spans
+# -------------------------------
+
+@contextmanager
+def span(name: str, rows=None, **args):
+    """
+    Misst den umschlossenen Block. Liefert den Span-Eintrag; rows kann
+    auch erst im Block gesetzt werden (rec["rows"] = ...).
+    """
+    run = current_run() if ENABLED else None
+    if run is None:
+        yield {}
+        return
+
+    stack = _local.stack
+    rec = {
+        "name": name,
+        "rows": rows,
+        "args": args,
+        "depth": len(stack),
+        "thread": threading.get_ident(),
+        "start": time.perf_counter() - run["t0"],
+    }
+    rss0 = rss_bytes()
+    stack.append(rec)
+    try:
+        yield rec
+    finally:
+        stack.pop()
+        rec["seconds"] = time.perf_counter() - run["t0"] - rec["start"]
+        rss1 = rss_bytes()
+        rec["rss_delta"] = None if rss0 is None or rss1 is None else rss1 - rss0
+        run["spans"].append(rec)
+
+
+def traced(name: str = None, rows=None):
+    """
+    Dekorator-Variante von span. rows: Funktion (args, kwargs) -> Zeilen.
+    """
+    def decorate(fn):
+        span_name = name or f"{fn.__module__}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current_run() is None:
+                return fn(*args, **kwargs)
+            with span(span_name, rows=rows(args, kwargs) if rows else None):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+# -------------------------------
+# Auswertung
+# -------------------------------
+
+def breakdown(run) -> list:
+    """
+    Spans eines Laufs nach Namen zusammengefasst, in Startreihenfolge:
+    [{"name", "calls", "seconds", "rows", "rss_delta", "depth"}, ...]
+    """
+    by_name = {}
+    for rec in sorted(run["spans"], key=lambda r: r["start"]):
+        entry = by_name.setdefault(rec["name"], {
+            "name": rec["name"], "calls": 0, "seconds": 0.0,
+            "rows": None, "rss_delta": None, "depth": rec["depth"],
+        })
+        entry["calls"] += 1
+        entry["seconds"] += rec["seconds"]
+        entry["depth"] = min(entry["depth"], rec["depth"])
+        if rec["rows"] is not None:
+            entry["rows"] = (entry["rows"] or 0) + rec["rows"]
+        if rec["rss_delta"] is not None:
+            entry["rss_delta"] = (entry["rss_delta"] or 0) + rec["rss_delta"]
+    return list(by_name.values())
+
+
+def chrome_trace(runs) -> dict:
+    """
+    Läufe im Chrome-Trace-Format (Complete Events, Zeiten in µs).
+    """
+    events = []
+    pid = os.getpid()
+    for run in runs:
+        base_us = run["started"] * 1e6
+        if run.get("seconds") is not None:
+            events.append({
+                "name": run["label"] or "run", "ph": "X", "pid": pid, "tid": 0,
+                "ts": base_us, "dur": run["seconds"] * 1e6, "cat": "run",
+            })
+        for rec in run["spans"]:
+            events.append({
+                "name": rec["name"],
+                "ph": "X",
+                "pid": pid,
+                "tid": rec["thread"],
+                "ts": base_us + rec["start"] * 1e6,
+                "dur": rec["seconds"] * 1e6,
+                "cat": rec["name"].split(".")[0],
+                "args": {"rows": rec["rows"], "rss_delta": rec["rss_delta"], **rec["args"]},
+            })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def dump_chrome_trace(path, runs):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(runs), f, default=str)
+    return path
@@ -0,0 +1,156 @@
+# slideshow.py
+
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import perf_spans as perf
+import ui_auxiliary as uia
+import video_duration as vd
+
+# Anzahl der Medien, die im Hintergrund schon vorbereitet werden
+DEFAULT_PREFETCH = 4
+
+# Anzeigedauer
+IMAGE_SECONDS = 2
+VIDEO_EXTRA_SECONDS = 5
+
+# -------------------------------
+# Vorbereitung (läuft im Hintergrund-Thread)
+# -------------------------------
+
+def prepare_slide(path, durations=None) -> dict:
+    """
+    Dekodiert und skaliert ein Bild bzw. ermittelt die Dauer eines Videos
+    (bevorzugt aus den Metadaten, siehe video_duration). Fehler werden
+    nicht geworfen, sondern im Ergebnis vermerkt.
+    """
+    started = time.perf_counter()
+    slide = {"path": path, "kind": uia.get_media_type(path),
+             "image": None, "duration": 0.0, "error": None}
+
+    try:
+        if slide["kind"] == "image":
+            with perf.span("slideshow.decode_image"):
+                slide["image"] = uia.load_and_scale_image(path)
+            slide["duration"] = IMAGE_SECONDS
+        elif slide["kind"] == "video":
+            if not Path(path).is_file():
+                raise FileNotFoundError(path)
+            with perf.span("slideshow.video_duration"):
+                slide["duration"] = vd.resolve_duration(path, durations) + VIDEO_EXTRA_SECONDS
+    except Exception as e:
+        slide["error"] = e
+
+    slide["decode_seconds"] = time.perf_counter() - started
+    return slide
+
+
+def new_stats() -> dict:
+    return {
+        "shown": 0,
+        "skipped": 0,
+        "failed": 0,
+        "decode_seconds": 0.0,   # Summe der Vorbereitung in den Threads
+        "display_seconds": 0.0,  # Zeit, in der ein Medium zu sehen war
+        "stall_seconds": 0.0,    # Wartezeit auf ein noch nicht fertiges Medium
+    }
+
+
+def format_stats(stats: dict) -> str:
+    shown = max(stats["shown"], 1)
+    return (
+        f"{stats['shown']:,} angezeigt, {stats['failed']:,} fehlerhaft, "
+        f"{stats['skipped']:,} übersprungen · "
+        f"Dekodieren {stats['decode_seconds']:.1f} s "
+        f"(Ø {stats['decode_seconds'] / shown * 1000:.0f} ms) · "
+        f"Anzeige {stats['display_seconds']:.1f} s · "
+        f"Wartezeit {stats['stall_seconds']:.2f} s"
+    )
+
+# -------------------------------
+# Pipeline
+# -------------------------------
+
+def iter_slides(paths, prefetch: int = DEFAULT_PREFETCH, stats=None, on_error=None, durations=None):
+    """
+    Liefert vorbereitete Medien in der Reihenfolge von paths. Ein Thread-Pool
+    bereitet bis zu 'prefetch' Medien voraus vor; der Ringpuffer der
+    Futures ist begrenzt, damit nicht die ganze Liste im Speicher landet.
+    Nicht lesbare Dateien werden übersprungen (on_error(path, fehler)).
+    durations: {pfad: sekunden} aus vd.durations_from_df.
+    """
+    stats = stats if stats is not None else new_stats()
+    prefetch = max(1, int(prefetch))
+    paths = iter(paths)
+    # Spans der Vorbereitung im Lauf des aufrufenden Threads sammeln
+    prepare = perf.bind(prepare_slide)
+
+    with ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix="slideshow") as pool:
+        pending = deque()
+
+        def fill():
+            while len(pending) < prefetch:
+                path = next(paths, None)
+                if path is None:
+                    return
+                pending.append(pool.submit(prepare, path, durations))
+
+        fill()
+        try:
+            while pending:
+                future = pending.popleft()
+                if not future.done():
+                    waited = time.perf_counter()
+                    future.result()
+                    stats["stall_seconds"] += time.perf_counter() - waited
+                slide = future.result()
+                fill()
+
+                stats["decode_seconds"] += slide["decode_seconds"]
+                if slide["error"] is not None:
+                    stats["failed"] += 1
+                    if on_error is not None:
+                        on_error(slide["path"], slide["error"])
+                    continue
+                if slide["kind"] == "other":
+                    stats["skipped"] += 1
+                    continue
+
+                yield slide
+        finally:
+            # bei Abbruch keine weiteren Dateien mehr anfassen
+            for future in pending:
+                future.cancel()
+
+
+def run_slideshow(
+    paths,
+    show,
+    prefetch: int = DEFAULT_PREFETCH,
+    on_error=None,
+    stats=None,
+    durations=None
+) -> dict:
+    """
+    Zeigt alle Medien nacheinander über show(slide) an. Die Wartezeit je
+    Medium zählt ab dem Anzeigen, die Vorbereitung des nächsten läuft
+    währenddessen im Hintergrund.
+    """
+    stats = stats if stats is not None else new_stats()
+    deadline = None
+
+    for slide in iter_slides(paths, prefetch, stats, on_error, durations):
+        if deadline is not None:
+            time.sleep(max(0.0, deadline - time.perf_counter()))
+
+        shown_at = time.perf_counter()
+        show(slide)
+        stats["shown"] += 1
+        deadline = shown_at + slide["duration"]
+        stats["display_seconds"] += slide["duration"]
+
+    if deadline is not None:
+        time.sleep(max(0.0, deadline - time.perf_counter()))
+    return stats
@@ -1,17 +1,40 @@
 import streamlit as st
 import ui_auxiliary as uia
 import open_in_explorer as oie
-from attribute_types import infer_all_attribute_types
-import time
+import metadata_cache as mc
+import filter_engine as fe
+import bitmap_index as bi
+import dataset_registry as dsr
+import metadata_delta as md
+import slideshow as ss
+import video_duration as vd
+import duckdb_backend as db
+import export as ex
+import attribute_catalog as ac
+import geo_index as geo
+import perf_spans as perf
 
 # ---------- Streamlit UI ----------
 
 st.set_page_config(layout="wide")
+
+# Zeitmessung dieses Reruns (Auswertung im Sidebar-Panel "Performance");
+# die letzten PERF_HISTORY Reruns lassen sich als Chrome-Trace speichern
+PERF_HISTORY = 20
+# so viele Attribute je Seite in der Attribut-Auswahl
+ATTRIBUTES_PER_PAGE = 50
+# höchstens so viele Punkte auf der Karte eines GPS-Filters
+MAP_POINTS = 2000
+perf_run = perf.start_run("rerun")
 st.title("📸 Medien-Metadaten Explorer")
 
+import json
 import os
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 # --- Dateiauswahl ---
 
 base_dir = st.text_input(
@@ -20,6 +43,7 @@ base_dir = st.text_input(
 )
 
 meta_path = None
+meta_paths = []
 
 if base_dir and os.path.isdir(base_dir):
     json_files = sorted(
@@ -27,12 +51,30 @@ if base_dir and os.path.isdir(base_dir):
         if f.lower().endswith(".json")
     )
 
-    if json_files:
+    multi_file = st.checkbox(
+        "Mehrere Metadatenfiles als ein Bestand laden",
+        value=False,
+        disabled=len(json_files) < 2,
+        help="Liest die ausgewählten JSONs parallel ein; die Herkunft steht "
+             "im Attribut 'MetaFile'."
+    )
+
+    if json_files and multi_file:
+        selected_files = st.multiselect(
+            "Metadatenfiles",
+            json_files,
+            default=json_files
+        )
+        meta_paths = [Path(base_dir) / f for f in selected_files]
+        meta_path = meta_paths[0] if meta_paths else None
+        st.caption(f"{len(meta_paths)} Dateien ausgewählt")
+    elif json_files:
         meta_file = st.selectbox(
             "Metadatenfile",
             json_files
         )
         meta_path = Path(base_dir) / meta_file
+        meta_paths = [meta_path]
         st.caption(f"Ausgewählte Datei: `{meta_path}`")
     else:
         st.warning("Keine JSON-Dateien im Verzeichnis gefunden.")
@@ -47,54 +89,181 @@ read_clicked = st.button(
     disabled=meta_path is None
 )
 
+use_cache = st.checkbox(
+    "Cache verwenden",
+    value=mc.cache_available(),
+    disabled=not mc.cache_available(),
+    help="Speichert die eingelesenen Metadaten als Parquet neben dem JSON "
+         "und liest sie beim nächsten Mal direkt daraus (benötigt pyarrow)."
+)
+
+lazy_load = st.checkbox(
+    "Nur benötigte Attribute laden",
+    value=False,
+    help="Liest zuerst nur den Attribut-Katalog. Die Spalten der ausgewählten "
+         "Attribute werden erst beim Anwenden nachgeladen."
+)
+
 # --- Laden nur bei Button-Klick ---
 
 if read_clicked:
-    if not meta_path.exists():
+    if not all(p.exists() for p in meta_paths):
         st.error("Datei existiert nicht.")
     else:
-        with st.spinner("Lese Metadaten (Streaming)…"):
-            df = uia.load_metadata(meta_path)
-            st.session_state.df = df
+        progress_text = st.empty()
+
+        def show_progress(records, bytes_read, elapsed):
+            progress_text.caption(uia.format_load_progress(records, bytes_read, elapsed))
+
+        load_target = meta_paths if len(meta_paths) > 1 else meta_path
+
+        # Auswahl und Filter der vorherigen Datei verwerfen
+        for key in ["attributes_all", "applied_attributes", "filters", "filtered_rows",
+                    "filtered_query", "dataset_key", "catalog"]:
+            st.session_state.pop(key, None)
+
+        if use_cache and db.should_use(load_target):
+            # Großer Bestand: nicht in den Speicher laden, sondern direkt auf
+            # dem Parquet-Cache abfragen
+            with perf.span("ui.open_catalog"):
+                st.session_state.catalog = db.open_catalog(*db.catalog_source(load_target))
+            st.session_state.mask_cache = {}
+            st.success(
+                f"{st.session_state.catalog['rows']:,} Mediendateien im Katalog "
+                f"(Abfragen direkt auf dem Parquet-Cache)"
+            )
+        else:
+            # Der Datensatz liegt prozessweit in der Registry; die Sitzung merkt
+            # sich nur den Schlüssel, andere Tabs mit derselben Datei teilen ihn.
+            with st.spinner("Lese Metadaten (Streaming)…"), perf.span("ui.load") as rec:
+                entry = dsr.get_dataset(
+                    load_target, use_cache=use_cache, lazy=lazy_load, progress=show_progress
+                )
+                rec["rows"] = len(entry["df"])
+            progress_text.empty()
+
+            df = entry["df"]
+            st.session_state.dataset_key = entry["key"]
+            st.session_state.dataset_args = {
+                "meta_file": [str(p) for p in meta_paths] if len(meta_paths) > 1 else str(meta_path),
+                "use_cache": use_cache,
+                "lazy": lazy_load
+            }
+            st.session_state.mask_cache = {}
 
-        st.success(f"{len(df):,} Mediendateien geladen")
+            source = "aus Cache" if entry["from_cache"] else "aus JSON"
+            st.success(f"{len(df):,} Mediendateien geladen ({source})")
 
-# --- Anzeige nach erfolgreichem Laden ---
+            report = df.attrs.get("memory_report")
+            if report:
+                st.caption(
+                    f"Speicherbedarf: {uia.format_bytes(report['before'])} → "
+                    f"{uia.format_bytes(report['after'])} (kompaktiert)"
+                )
 
-if "df" in st.session_state:
+# --- Anzeige nach erfolgreichem Laden ---
 
-    df = st.session_state.df
-    if "attribute_types" not in st.session_state:
-        with st.spinner("Bestimme Attribut-Typen…"):
-            st.session_state.attribute_types = infer_all_attribute_types(df)
+dataset = None
+catalog = st.session_state.get("catalog")
+if "dataset_key" in st.session_state:
+    dataset = dsr.lookup(st.session_state.dataset_key)
+    if dataset is None:
+        # inzwischen verdrängt (oder Datei geändert) -> neu laden
+        with st.spinner("Lade Metadaten erneut…"), perf.span("ui.reload"):
+            dataset = dsr.get_dataset(**st.session_state.dataset_args)
+            # im zweiphasigen Modus fehlen die per "Anwenden" nachgeladenen Spalten
+            dsr.ensure_columns(dataset, st.session_state.get("applied_attributes", []))
+        if dataset["key"] != st.session_state.dataset_key:
+            st.session_state.dataset_key = dataset["key"]
+            st.session_state.mask_cache = {}
+            st.session_state.pop("filtered_rows", None)
+
+with st.sidebar.expander("🗄 Geladene Datensätze"):
+    st.caption(
+        f"{uia.format_bytes(dsr.memory_in_use())} von "
+        f"{uia.format_bytes(dsr.MEMORY_BUDGET_BYTES)} belegt"
+    )
+    datasets = dsr.list_datasets()
+    if datasets:
+        st.dataframe(datasets, hide_index=True)
+
+if dataset is not None and st.session_state.get("dataset_version") != dataset["version"]:
+    # Bestand wurde (z.B. per Delta) geändert -> Masken und Ergebnis neu
+    st.session_state.dataset_version = dataset["version"]
+    st.session_state.mask_cache = {}
+    st.session_state.pop("filtered_rows", None)
+
+if dataset is not None or catalog is not None:
+
+    if dataset is not None:
+        df = dataset["df"]
+        attribute_types = dataset["types"]
+        dt_store = dataset["datetime_store"]
+        value_indexes = dataset["value_indexes"]
+    else:
+        # DuckDB-Modus: kein DataFrame im Speicher
+        df = dt_store = value_indexes = None
+        attribute_types = catalog["types"]
 
-    attributes = sorted(df.columns)
+    attributes = sorted(attribute_types)
     st.write(f"**{len(attributes)}** Attribute gefunden")
 
+    with st.expander("🔄 Inkrementell aktualisieren"):
+        if dataset is None or dataset["multi"]:
+            st.info("Nur beim Laden eines einzelnen Metadatenfiles in den Speicher verfügbar.")
+        else:
+            delta_dir = Path(dataset["meta_file"]).parent
+            delta_files = sorted(
+                f for f in os.listdir(delta_dir)
+                if f.lower().endswith(".json") and f != Path(dataset["meta_file"]).name
+            )
+            if dataset["lazy"]:
+                st.info("Nur im vollständigen Lademodus verfügbar.")
+            elif not delta_files:
+                st.caption("Keine weiteren JSON-Dateien im Verzeichnis.")
+            else:
+                delta_file = st.selectbox("Delta-JSON", delta_files, key="delta_file")
+                delta_snapshot = st.checkbox(
+                    "Vollständiger neuer Stand",
+                    key="delta_snapshot",
+                    help="Dateien, die im JSON fehlen, werden entfernt; unveränderte "
+                         "Einträge (FileModifyDate/FileSize) werden übersprungen."
+                )
+                if st.button("Delta einspielen"):
+                    with st.spinner("Führe Delta zusammen…"):
+                        new_df, new_types, new_stats, summary = md.apply_delta_file(
+                            dataset["meta_file"], delta_dir / delta_file,
+                            snapshot=delta_snapshot, use_cache=dataset["use_cache"],
+                            base=(df, attribute_types, dataset["stats"])
+                        )
+                    if summary["skipped"]:
+                        st.info("Dieses Delta wurde bereits eingespielt.")
+                    else:
+                        dsr.replace_dataset(dataset, new_df, new_types, new_stats)
+                        st.session_state.delta_summary = summary
+                        st.rerun()
+
+        summary = st.session_state.get("delta_summary")
+        if summary:
+            st.success(
+                f"{summary['added']:,} neu, {summary['updated']:,} aktualisiert, "
+                f"{summary['removed']:,} entfernt, {summary['unchanged']:,} unverändert "
+                f"({summary['columns']} Attribute neu bewertet)"
+            )
+
     st.subheader("Attribut-Auswahl")
 
     # --- Initialisierung ---
 
     if "attributes_all" not in st.session_state:
-        st.session_state.attributes_all = list(df.columns)
+        st.session_state.attributes_all = list(attribute_types)
         st.session_state.attributes_selected = set()
         st.session_state.attribute_filter_text = ""
 
-    if "attribute_stats" not in st.session_state:
-        total = len(df)
-        stats = {}
-        for col in df.columns:
-            cnt = df[col].notna().sum()
-            stats[col] = {
-                "count": int(cnt),
-                "percent": 100.0 * cnt / total
-            }
-        st.session_state.attribute_stats = stats
-
     if "attribute_sort_mode" not in st.session_state:
         st.session_state.attribute_sort_mode = "alphabetisch"
 
-    stats = st.session_state.attribute_stats
+    stats = dataset["stats"] if dataset is not None else catalog["stats"]
 
     # --- Layout ---
 
@@ -107,13 +276,10 @@ if "df" in st.session_state:
     with col_left:
         st.markdown("### 🔍 Attribute filtern")
 
-        types = st.session_state.attribute_types
-
         filter_text = st.text_input(
-            "Filter (Substring, z.B. 'gps', 'time', 'date')",
-            value=st.session_state.attribute_filter_text
+            "Suche (Teilstring oder ungefähr, z.B. 'gps', 'time', 'date')",
+            key="attribute_filter_text"
         )
-        st.session_state.attribute_filter_text = filter_text
 
         col_sort1, col_sort2 = st.columns(2)
         with col_sort1:
@@ -123,27 +289,39 @@ if "df" in st.session_state:
             if st.button("📊 Nach Häufigkeit"):
                 st.session_state.attribute_sort_mode = "häufigkeit"
 
-        filtered_attributes = [
-            a for a in st.session_state.attributes_all
-            if filter_text.lower() in a.lower()
-               and a not in st.session_state.attributes_selected
-        ]
+        # Vorberechneter Katalog (Gruppe, Typ, Füllstand, Trigramm-Index),
+        # einmal je Datenbestand
+        attr_catalog = ac.get_catalog(
+            dataset if dataset is not None else catalog, attribute_types, stats
+        )
 
-        if st.session_state.attribute_sort_mode == "alphabetisch":
-            filtered_attributes = sorted(filtered_attributes)
-        else:
-            filtered_attributes = sorted(
-                filtered_attributes,
-                key=lambda a: stats[a]["percent"],
-                reverse=True
+        group = None
+        if len(attr_catalog["group_names"]) > 1:
+            group = st.selectbox(
+                "Gruppe", [None] + attr_catalog["group_names"], key="attribute_group",
+                format_func=lambda g: "Alle Gruppen" if g is None else (g or "(ohne Gruppe)")
+            )
+
+        with perf.span("ui.attribute_search"):
+            filtered_attributes = ac.search(
+                attr_catalog, filter_text, st.session_state.attribute_sort_mode,
+                group=group, exclude=st.session_state.attributes_selected
             )
 
         st.caption(f"{len(filtered_attributes)} Attribute gefunden")
 
+        # Nur eine Seite der Treffer als Widgets, egal wie viele Tags es gibt
+        pages = max(1, (len(filtered_attributes) - 1) // ATTRIBUTES_PER_PAGE + 1)
+        page = 1
+        if pages > 1:
+            if st.session_state.get("attribute_page", 1) > pages:
+                st.session_state.attribute_page = 1  # weniger Treffer als zuvor
+            page = st.number_input(f"Seite (von {pages:,})", 1, pages, 1, key="attribute_page")
+        page_attributes = filtered_attributes[(page - 1) * ATTRIBUTES_PER_PAGE:page * ATTRIBUTES_PER_PAGE]
+
         with st.container(height=400):
-            for attr in filtered_attributes:
-                label = f"{attr} ({types[attr]} / {stats[attr]['count']:,} / {stats[attr]['percent']:.1f}%)"
-                if st.checkbox(label, key=f"attr_check_{attr}"):
+            for attr in page_attributes:
+                if st.checkbox(ac.describe(attr_catalog, attr), key=f"attr_check_{attr}"):
                     st.session_state.attributes_selected.add(attr)
 
     # =========================
@@ -167,25 +345,47 @@ if "df" in st.session_state:
             selected_attrs = list(st.session_state.attributes_selected)
             st.session_state.applied_attributes = selected_attrs
             st.session_state.filters = {}  # reset Filterzustand
-            # filtered_df löschen, damit die neue Auswahl auf dem ganzen Datensatz startet
-            if "filtered_df" in st.session_state:
-                del st.session_state["filtered_df"]
+            # Ergebnis löschen, damit die neue Auswahl auf dem ganzen Datensatz startet
+            st.session_state.pop("filtered_rows", None)
+            st.session_state.pop("filtered_query", None)
+
+            # Noch nicht geladene Spalten nachladen (zweiphasiger Modus)
+            missing = [a for a in selected_attrs if df is not None and a not in df.columns]
+            if missing:
+                with st.spinner(f"Lade {len(missing)} Attribut(e) nach…"):
+                    dsr.ensure_columns(dataset, missing)
+                df = dataset["df"]  # mit den neuen Spalten
 
             # NEU: Vor-Initialisierung mit ALLEN Werten
             for attr in selected_attrs:
-                attr_type = st.session_state.attribute_types[attr]
-                if attr_type == "datetime":
-                    comps = uia.get_datetime_components(df[attr])
+                attr_type = attribute_types[attr]
+                if catalog is not None:
+                    if attr_type == "datetime":
+                        comps = db.facet_options(catalog, attr, {}, attribute_types, "Alle Medien")
+                        for part in uia.DATETIME_PARTS:
+                            st.session_state[f"{attr}_{part}"] = comps[part]
+                    elif attr_type == "categorical":
+                        # vollständige Werteliste wie im pandas-Modus, nie die
+                        # für das Widget gekürzte
+                        st.session_state[f"{attr}_cat"] = db.facet_options(
+                            catalog, attr, {}, attribute_types, "Alle Medien", limit=None
+                        )
+                elif attr_type == "datetime":
+                    comps = uia.datetime_components(dt_store, df, attr)["unique"]
                     st.session_state[f"{attr}_year"] = comps["year"]
                     st.session_state[f"{attr}_month"] = comps["month"]
                     st.session_state[f"{attr}_weekday"] = comps["weekday"]
                     st.session_state[f"{attr}_hour"] = comps["hour"]
                 elif attr_type == "categorical":
-                    st.session_state[f"{attr}_cat"] = sorted(df[attr].dropna().unique().tolist())
+                    index = bi.get_value_index(value_indexes, df, attr)
+                    if index is not None:
+                        st.session_state[f"{attr}_cat"] = list(index["values"])
+                    else:
+                        st.session_state[f"{attr}_cat"] = uia.option_values(df[attr])
                 # numeric Slider initialisieren sich meist von selbst über min/max
             st.rerun()
 
-if "applied_attributes" in st.session_state:
+if (dataset is not None or catalog is not None) and "applied_attributes" in st.session_state:
     # 1. Kopfbereich mit Reset und dem neuen globalen Apply-Button
     st.divider()
     col_h, col_reset, col_apply = st.columns([2, 1, 4])
@@ -199,29 +399,58 @@ if "applied_attributes" in st.session_state:
     media_filter = st.radio("Medientyp", ["Alle Medien", "Nur Bilder", "Nur Videos"],
                             horizontal=True, key="media_type_filter")
 
-    types = st.session_state.attribute_types
-
-    # 1. Sicherstellen, dass die Filter-Struktur existiert
-    if "filters" not in st.session_state:
-        st.session_state.filters = {}
+    types = attribute_types
 
-    # Bestimme die Basis für die Kreuzfilter-Optionen (Snapshot des letzten Klicks)
-    current_base_df = st.session_state.get("filtered_df", df)
-
-    for attr in st.session_state.applied_attributes:
-        attr_type = types[attr]
+    # 1. Filterzustand direkt aus den aktuellen Widget-Werten lesen
+    st.session_state.filters = fe.filters_from_state(
+        st.session_state, st.session_state.applied_attributes, types
+    )
 
-        # 2. Kontext berechnen
-        # Wir nutzen das Original-df als Basis für die Kreuzfilterung der Optionen,
-        # damit wir nicht in eine "Leere-Menge-Sackgasse" geraten.
-        context_df = uia.apply_filters_except(
+    # 2. Kontext berechnen
+    # Wir nutzen das Original-df als Basis für die Kreuzfilterung der Optionen,
+    # damit wir nicht in eine "Leere-Menge-Sackgasse" geraten. Alle Kontextmasken
+    # entstehen in einem Durchgang aus gecachten Einzelmasken; neu gerechnet wird
+    # nur das Attribut, dessen Widget sich geändert hat.
+    # Im DuckDB-Modus liefert jede Abfrage direkt die Optionen unter den
+    # übrigen Filtern.
+    if catalog is None:
+        total_mask, context_masks = fe.cross_filter_masks(
+            st.session_state.mask_cache,
             df,
             st.session_state.filters,
             types,
             st.session_state.media_type_filter,
-            exclude_attr=attr
+            dt_store=dt_store,
+            indexes=value_indexes
         )
 
+    def catalog_facet(attr, query):
+        # SQL-Zählung im DuckDB-Modus, gecacht wie im pandas-Modus
+        def run():
+            with perf.span("ui.facets_sql", attr=attr):
+                return query(catalog, attr, st.session_state.filters, types,
+                             st.session_state.media_type_filter)
+        return fe.cached_facet(st.session_state.mask_cache, attr, st.session_state.filters,
+                               st.session_state.media_type_filter, run)
+
+    def facet_counts(attr):
+        # Trefferzahlen je Auswahlwert unter den übrigen Filtern, gecacht,
+        # bis sich einer der anderen Filter ändert
+        if catalog is not None:
+            return catalog_facet(attr, db.facet_counts)
+        with perf.span("ui.facets", attr=attr):
+            return fe.facet_counts(
+                st.session_state.mask_cache, df, attr, st.session_state.filters, types,
+                st.session_state.media_type_filter, context_masks[attr],
+                dt_store=dt_store, indexes=value_indexes
+            )
+
+    def with_count(counts):
+        return lambda v: f"{v} ({counts.get(v, 0):,})"
+
+    for attr in st.session_state.applied_attributes:
+        attr_type = types[attr]
+
         # --- CATEGORICAL FILTER ---
         if attr_type == "categorical":
             st.markdown(f"#### 📦 {attr}")
@@ -229,62 +458,149 @@ if "applied_attributes" in st.session_state:
 
             # Werte aus dem Kontext und der aktuellen Auswahl
             current_sel = st.session_state.get(key, [])
-            available_vals = context_df[attr].dropna().unique().tolist()
-
-            # WICHTIG: Wenn der Kontext leer ist (z.B. beim ersten Start),
-            # nehmen wir alle Werte des Attributs aus dem Original-Datensatz.
-            all_opts = sorted(list(set(current_sel) | set(available_vals)))
-            if not all_opts:
-                all_opts = sorted(df[attr].dropna().unique().tolist())
-
-            # Widget anzeigen und Wert im Filter-Dict speichern
-            selected = st.multiselect("Werte auswählen", options=all_opts, key=key)
-            st.session_state.filters[attr] = selected
+            truncated = False
+            if catalog is not None:
+                counts, truncated = catalog_facet(attr, db.value_counts)
+            else:
+                counts = facet_counts(attr)
+
+            index = bi.get_value_index(value_indexes, df, attr) if catalog is None else None
+            if index is not None:
+                # Index-Werte sind bereits sortiert
+                keep = set(counts) | set(current_sel)
+                all_opts = [v for v in index["values"] if v in keep]
+                if not all_opts:
+                    all_opts = list(index["values"])
+            elif catalog is not None:
+                all_opts = list(counts) + [v for v in current_sel if v not in counts]
+            else:
+                # WICHTIG: Wenn der Kontext leer ist (z.B. beim ersten Start),
+                # nehmen wir alle Werte des Attributs aus dem Original-Datensatz.
+                all_opts = uia.sorted_values(set(current_sel) | set(counts))
+                if not all_opts:
+                    all_opts = uia.option_values(df[attr])
+
+            # Widget anzeigen; der Wert landet über den Key im Filterzustand
+            st.multiselect("Werte auswählen", options=all_opts, key=key,
+                           format_func=with_count(counts))
+            if truncated:
+                st.caption(
+                    f"Liste gekürzt: nur die ersten {db.MAX_FACET_VALUES:,} Werte "
+                    f"(plus die aktuelle Auswahl) werden angeboten."
+                )
 
         # --- DATETIME FILTER ---
         elif attr_type == "datetime":
             st.markdown(f"#### 🕒 {attr}")
-            comps = uia.get_datetime_components(context_df[attr])
-            full_comps = uia.get_datetime_components(df[attr])
+            counts = facet_counts(attr)
+            if catalog is not None:
+                full_comps = {part: list(c) for part, c in counts.items()}
+            else:
+                full_comps = uia.datetime_components(dt_store, df, attr)["unique"]
 
             col1, col2, col3, col4 = st.columns(4)
             time_parts = [("year", "Jahr", col1), ("month", "Monat", col2),
                           ("weekday", "Wochentag", col3), ("hour", "Stunde", col4)]
 
-            if attr not in st.session_state.filters:
-                st.session_state.filters[attr] = {}
-
             for p_key, label, col in time_parts:
                 key = f"{attr}_{p_key}"
                 current_sel = st.session_state.get(key, [])
 
                 # Auch hier: Auswahl + Kontext-Optionen
-                opts = sorted(list(set(current_sel) | set(comps[p_key])))
+                opts = sorted(list(set(current_sel) | set(counts[p_key])))
                 if not opts:
                     opts = full_comps[p_key]
 
-                col.multiselect(label, options=opts, key=key)
-                st.session_state.filters[attr][p_key] = st.session_state.get(key, [])
+                col.multiselect(label, options=opts, key=key, format_func=with_count(counts[p_key]))
 
         # --- NUMERIC FILTER ---
         elif attr_type == "numeric":
             st.markdown(f"#### 🔢 {attr}")
-            series = df[attr].dropna()
-            if not series.empty:
-                lo, hi = float(series.min()), float(series.max())
-                st.session_state.filters[attr] = st.slider(attr, lo, hi, key=f"{attr}_range")
+            hist = facet_counts(attr)
+            if hist is not None:
+                lo, hi = hist["range"]
+                edges = hist["edges"]
+                st.bar_chart(
+                    pd.DataFrame(
+                        {"Anzahl": hist["counts"]},
+                        index=[f"{(a + b) / 2:.4g}" for a, b in zip(edges, edges[1:])]
+                    ),
+                    height=120,
+                )
+                st.slider(attr, lo, hi, value=(lo, hi), key=f"{attr}_range")
+
+        # --- GPS FILTER ---
+        elif attr_type == "gps":
+            st.markdown(f"#### 🌍 {attr}")
+            facet = facet_counts(attr)
+            st.caption(f"{facet['count']:,} Dateien mit Koordinaten unter den übrigen Filtern")
+            mode = st.radio("Bereich", fe.GEO_MODES, horizontal=True, key=f"{attr}_geo_mode")
+
+            # Startwerte aus den vorhandenen Koordinaten
+            south, west, north, east = facet["bounds"] or (-90.0, -180.0, 90.0, 180.0)
+            defaults = {
+                "south": south, "west": west, "north": north, "east": east,
+                "lat": (south + north) / 2, "lon": (west + east) / 2, "radius": 25.0,
+            }
+            for field, value in defaults.items():
+                st.session_state.setdefault(f"{attr}_geo_{field}", round(value, 5))
+
+            if mode == fe.GEO_BBOX:
+                fields = [("south", "Süd", 90.0), ("west", "West", 180.0),
+                          ("north", "Nord", 90.0), ("east", "Ost", 180.0)]
+                for col, (field, label, limit) in zip(st.columns(4), fields):
+                    col.number_input(label, -limit, limit, step=0.01, format="%.5f",
+                                     key=f"{attr}_geo_{field}")
+            elif mode == fe.GEO_RADIUS:
+                col1, col2, col3 = st.columns(3)
+                col1.number_input("Breite", -90.0, 90.0, step=0.01, format="%.5f", key=f"{attr}_geo_lat")
+                col2.number_input("Länge", -180.0, 180.0, step=0.01, format="%.5f", key=f"{attr}_geo_lon")
+                col3.number_input("Radius (km)", 0.1, 20000.0, step=1.0, key=f"{attr}_geo_radius")
+
+            if catalog is None and facet["count"]:
+                with st.expander("🗺 Karte"):
+                    # Punkte unter allen Filtern, auch dem eigenen
+                    index = geo.get_geo_index(value_indexes, df, attr)
+                    lat, lon = geo.sample_points(index, total_mask, MAP_POINTS)
+                    st.map(pd.DataFrame({"lat": lat, "lon": lon}), size=20)
 
     # 3. Der zentrale Trigger-Button
     st.divider()
     if st.button("🚀 Filter auf Medienbestand anwenden", type="primary", use_container_width=True):
-        st.session_state.filtered_df = uia.apply_filters(
-            df, st.session_state.filters, types, st.session_state.media_type_filter
-        )
+        if catalog is not None:
+            filters = dict(st.session_state.filters)
+            media = st.session_state.media_type_filter
+            with perf.span("ui.apply"):
+                count = db.count_matches(catalog, filters, types, media)
+            st.session_state.filtered_query = {"filters": filters, "media": media, "count": count}
+        else:
+            # nur die Zeilenpositionen merken, keine gefilterte Kopie je Sitzung
+            with perf.span("ui.apply", rows=len(df)):
+                st.session_state.filtered_rows = np.flatnonzero(total_mask)
         st.rerun()
 
     # 4. Anzeige des Ergebnisses (nur wenn bereits gefiltert wurde)
-    if "filtered_df" in st.session_state:
-        f_df = st.session_state.filtered_df
+    if "filtered_rows" in st.session_state or "filtered_query" in st.session_state:
+        if catalog is not None:
+            query = st.session_state.filtered_query
+            n_results = query["count"]
+
+            def result_paths():
+                for chunk in db.iter_source_files(catalog, query["filters"], types, query["media"]):
+                    yield from chunk
+
+            def result_frames(columns):
+                return db.iter_frames(catalog, query["filters"], types, query["media"], columns)
+        else:
+            rows = st.session_state.filtered_rows
+            n_results = len(rows)
+
+            def result_paths():
+                for frame in ex.iter_frames(df, rows):
+                    yield from frame["SourceFile"]
+
+            def result_frames(columns):
+                return ex.iter_frames(df, rows, columns)
 
         st.divider()
         col_a, col_b = st.columns(2)
@@ -295,57 +611,207 @@ if "applied_attributes" in st.session_state:
         with col_a:
             st.metric(
                 "🎯 Anzahl Mediendateien, die den Filterkriterien entsprechen",
-                f"{len(f_df):,}"
+                f"{n_results:,}"
             )
             st.caption(f"Medientyp: {st.session_state.media_type_filter}")
 
+            if catalog is not None and n_results:
+                # Ergebnis seitenweise aus dem Parquet-Katalog
+                pages = (n_results - 1) // db.PAGE_SIZE + 1
+                page = st.number_input(f"Seite (von {pages:,})", 1, pages, 1, key="result_page")
+                st.dataframe(
+                    {"SourceFile": db.query_source_files(
+                        catalog, query["filters"], types, query["media"], page=page - 1
+                    )},
+                    hide_index=True, height=250
+                )
+
         # -----------------
         # ▶️ Slideshow
         # -----------------
         with viewer_container:
-            if st.button("▶️ Slideshow", disabled=len(f_df) == 0):
-                media_files = f_df["SourceFile"].tolist()
+            prefetch = st.number_input(
+                "Vorausladen (Medien)", min_value=1, max_value=32,
+                value=ss.DEFAULT_PREFETCH, key="slideshow_prefetch",
+                help="So viele Medien werden im Hintergrund schon dekodiert, "
+                     "während das aktuelle angezeigt wird."
+            )
 
-                placeholder = st.empty()
+            if st.button("▶️ Slideshow", disabled=n_results == 0):
+                media_files = result_paths()
 
-                for path in media_files:
-                    ext = Path(path).suffix.lower()
+                placeholder = st.empty()
+                stats_text = st.empty()
 
+                def show_slide(slide):
                     placeholder.empty()
-
                     try:
-                        if ext in uia.IMAGE_EXTS:
-                            img = uia.load_and_scale_image(path)
-                            placeholder.image(img)
-                            time.sleep(2)
-                        elif ext in uia.VIDEO_EXTS:
-                            placeholder.video(path)
-                            duration = uia.get_video_duration(path)
-                            time.sleep(duration + 5)
+                        if slide["kind"] == "image":
+                            placeholder.image(slide["image"])
                         else:
-                            continue
+                            placeholder.video(slide["path"])
+                    except Exception as e:
+                        st.warning(f"Fehler beim Anzeigen von {slide['path']}: {e}")
 
+                def show_error(path, e):
+                    st.warning(f"Fehler beim Anzeigen von {path}: {e}")
 
-                    except Exception as e:
-                        st.warning(f"Fehler beim Anzeigen von {path}: {e}")
+                with perf.span("ui.slideshow"):
+                    stats = ss.run_slideshow(
+                        media_files, show_slide, prefetch=prefetch, on_error=show_error,
+                        durations=(
+                            vd.durations_from_df(pd.concat(result_frames(vd.DURATION_COLUMNS)))
+                            if catalog is None else None
+                        )
+                    )
+                stats_text.caption(ss.format_stats(stats))
 
     # -----------------
     # 📄 Export
     # -----------------
         with col_b:
-            if st.button("📄 Export", disabled=len(f_df) == 0):
-                export_path = meta_path.parent / "filelist.csv"
+            with st.expander("📄 Export"):
+                export_fmt = st.selectbox("Format", list(ex.FORMATS), key="export_format")
+                export_cols = st.multiselect(
+                    "Zusätzliche Spalten", sorted(types),
+                    default=[a for a in st.session_state.applied_attributes if a in types],
+                    key="export_columns"
+                )
+                export_path = st.text_input(
+                    "Zieldatei",
+                    value=str(meta_path.parent / f"filelist{ex.FORMATS[export_fmt]}"),
+                    key=f"export_path_{export_fmt}"
+                )
+
+                if st.button("📄 Exportieren", disabled=n_results == 0):
+                    bar = st.progress(0.0, text="Exportiere…")
 
-                f_df[["SourceFile"]].to_csv(
-                    export_path,
-                    index=False,
-                    encoding="utf-8"
+                    def show_export_progress(done):
+                        bar.progress(min(done / n_results, 1.0), text=f"{done:,} / {n_results:,} Zeilen")
+
+                    columns = ex.export_columns(set(types), export_cols, export_fmt)
+                    try:
+                        with perf.span("ui.export", rows=n_results, format=export_fmt):
+                            n = ex.write_export(
+                                result_frames(columns), export_path, export_fmt,
+                                progress=show_export_progress
+                            )
+                        st.success(f"{n:,} Zeilen exportiert nach: {export_path}")
+                    except (OSError, RuntimeError) as e:
+                        st.error(f"Export fehlgeschlagen: {e}")
+                    bar.empty()
+
+            with st.expander("📦 Dateien kopieren"):
+                copy_dir = st.text_input(
+                    "Zielordner", value=str(meta_path.parent / "_metaExplorer_export"), key="copy_dir"
+                )
+                copy_mode = st.radio(
+                    "Art", ["copy", "hardlink"], horizontal=True, key="copy_mode",
+                    format_func={"copy": "Kopieren", "hardlink": "Hardlinks"}.get
+                )
+                copy_workers = st.number_input(
+                    "Gleichzeitige Vorgänge", 1, 32, ex.COPY_WORKERS, key="copy_workers",
+                    help="Bereits aktuelle Dateien im Ziel werden übersprungen; "
+                         "ein abgebrochener Lauf setzt beim nächsten Mal fort."
                 )
 
-                st.success(f"Exportiert nach: {export_path}")
+                if st.button("📦 Kopieren", disabled=n_results == 0):
+                    bar = st.progress(0.0, text="Kopiere…")
+
+                    def show_copy_progress(stats):
+                        done = sum(stats[k] for k in ("copied", "linked", "skipped", "missing", "failed"))
+                        if done % 25 == 0 or done == n_results:
+                            bar.progress(
+                                min(done / n_results, 1.0),
+                                text=f"{done:,} / {n_results:,} – {ex.format_copy_stats(stats)}"
+                            )
+
+                    with perf.span("ui.copy", rows=n_results, mode=copy_mode):
+                        copy_stats = ex.copy_files(
+                            result_paths(), copy_dir, mode=copy_mode, base_dir=meta_path.parent,
+                            workers=copy_workers, progress=show_copy_progress
+                        )
+                    bar.empty()
+                    (st.warning if copy_stats["failed"] else st.success)(ex.format_copy_stats(copy_stats))
+                    for error in copy_stats["errors"]:
+                        st.caption(error)
+
+            if st.button("🖼 Vorschaubilder erzeugen", disabled=n_results == 0):
+                import thumbnail_cache as tc
+
+                image_files = [
+                    p for p in result_paths()
+                    if uia.get_media_type(p) == "image"
+                ]
+                bar = st.progress(0.0, text="Erzeuge Vorschaubilder…")
+
+                def show_thumb_progress(done, total):
+                    bar.progress(done / total, text=f"{done:,} / {total:,} Vorschaubilder")
+
+                with perf.span("ui.thumbnails", rows=len(image_files)):
+                    counts = tc.pregenerate_thumbnails(image_files, progress=show_thumb_progress)
+                bar.empty()
+                st.success(
+                    f"{counts['created']:,} erzeugt, {counts['cached']:,} bereits vorhanden, "
+                    f"{counts['failed']:,} fehlgeschlagen"
+                )
+
+            link_backend = st.selectbox(
+                "Verknüpfungsart", oie.available_backends(), key="link_backend",
+                help="windows: .lnk-Verknüpfungen, symlink/hardlink: Dateisystem-Links"
+            )
 
-            if st.button("🗂 Im Explorer öffnen", disabled=len(f_df) == 0):
-                oie.open_in_explorer(
-                    f_df["SourceFile"].tolist(),
-                    meta_path.parent
+            if st.button("🗂 Im Explorer öffnen", disabled=n_results == 0):
+                bar = st.progress(0.0, text="Erstelle Sammelordner…")
+
+                def show_link_progress(done, total):
+                    bar.progress(done / total, text=f"{done:,} / {total:,} Verknüpfungen")
+
+                with perf.span("ui.explorer", rows=n_results, backend=link_backend):
+                    link_stats = oie.open_in_explorer(
+                        list(result_paths()),
+                        meta_path.parent,
+                        backend=link_backend,
+                        progress=show_link_progress
+                    )
+                bar.empty()
+                st.success(
+                    f"{link_stats['created']:,} neu, {link_stats['kept']:,} unverändert, "
+                    f"{link_stats['removed']:,} entfernt"
+                    + (f", {link_stats['missing']:,} Dateien nicht gefunden" if link_stats["missing"] else "")
+                    + (f", {link_stats['failed']:,} fehlgeschlagen" if link_stats["failed"] else "")
                 )
+
+# -----------------
+# ⏱ Performance
+# -----------------
+perf.finish_run(perf_run)
+perf_history = st.session_state.setdefault("perf_history", [])
+perf_history.append(perf_run)
+del perf_history[:-PERF_HISTORY]
+
+with st.sidebar.expander("⏱ Performance"):
+    st.caption(f"Letzter Rerun: {perf_run['seconds'] * 1000:,.0f} ms")
+    rows = perf.breakdown(perf_run)
+    if rows:
+        st.dataframe(
+            {
+                "Abschnitt": ["  " * r["depth"] + r["name"] for r in rows],
+                "Aufrufe": [r["calls"] for r in rows],
+                "ms": [round(r["seconds"] * 1000, 1) for r in rows],
+                "Zeilen": [r["rows"] for r in rows],
+                "RSS Δ": [uia.format_bytes(r["rss_delta"]) if r["rss_delta"] and r["rss_delta"] > 0
+                          else "" for r in rows],
+            },
+            hide_index=True
+        )
+    else:
+        st.caption("Keine gemessenen Abschnitte.")
+
+    st.download_button(
+        f"Chrome-Trace ({len(perf_history)} Reruns)",
+        data=json.dumps(perf.chrome_trace(perf_history), default=str),
+        file_name="metaexplorer_trace.json",
+        mime="application/json",
+        help="In chrome://tracing oder ui.perfetto.dev öffnen"
+    )
@@ -0,0 +1,264 @@
+# synthetic_catalog.py
+#
+# Erzeugt ein künstliches ExifTool-JSON (wie "exiftool -json -r") für
+# Messungen, ohne echte Mediendateien:
+#
+#   python synthetic_catalog.py bench/meta_100k.json --rows 100000
+#   python synthetic_catalog.py bench/meta_5m.json --rows 5000000 --tail-tags 2000
+#
+# Enthalten sind u. a. Verzeichnisbäume nach Jahr/Ereignis, Kamera-Tags
+# mit gemischten Zahl-/Textwerten, Datumsangaben in mehreren Formaten (mit
+# und ohne Zeitzone bzw. Sekundenbruchteile), Videos mit Dauer, GPS bei
+# einem Teil der Bilder und ein langer Schwanz seltener Tags. Bei gleichem
+# Seed entsteht byte-genau dieselbe Datei.
+
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+
+DEFAULT_ROWS = 10_000
+DEFAULT_TAIL_TAGS = 500
+
+# Im Mittel so viele seltene Tags je Datei; welche, ist Zipf-verteilt
+# (Tag i kommt etwa mit Gewicht 1/(i+1) vor)
+TAIL_TAGS_PER_ROW = 3.0
+
+CAMERAS = [
+    ("Canon", ["Canon EOS 5D Mark IV", "Canon EOS R6", "Canon EOS 80D", "Canon PowerShot G7 X"]),
+    ("NIKON CORPORATION", ["NIKON D750", "NIKON Z 6", "NIKON D3500"]),
+    ("SONY", ["ILCE-7M3", "ILCE-6400", "DSC-RX100M5"]),
+    ("Apple", ["iPhone 8", "iPhone 12 Pro", "iPhone 14", "iPhone SE (2nd generation)"]),
+    ("samsung", ["SM-G991B", "SM-A525F"]),
+    ("FUJIFILM", ["X-T3", "X100V"]),
+    ("GoPro", ["HERO9 Black"]),
+    ("DJI", ["FC3170"]),
+]
+CAMERA_WEIGHTS = [18, 12, 10, 25, 12, 6, 4, 2]
+
+EVENTS = ["Urlaub", "Weihnachten", "Geburtstag", "Wandern", "Hochzeit", "Garten",
+          "Städtereise", "Sommer", "Zoo", "Konzert", "Sonstiges"]
+
+IMAGE_EXTS = [(".jpg", 70), (".JPG", 10), (".heic", 8), (".png", 3), (".jpeg", 2)]
+VIDEO_EXTS = [(".mp4", 60), (".mov", 30), (".MOV", 5), (".mkv", 3), (".webm", 2)]
+VIDEO_SHARE = 0.15
+
+ISO_VALUES = [50, 64, 100, 125, 160, 200, 250, 320, 400, 500, 640, 800, 1000, 1600, 3200, 6400, 12800]
+EXPOSURES = ["1/8000", "1/4000", "1/2000", "1/1000", "1/500", "1/250", "1/125", "1/60", "1/30",
+             "1/15", "1/8", "1/4", 0.5, 1, 2, 4, 15, 30]
+APERTURES = [1.4, 1.8, 2.0, 2.2, 2.8, 3.5, 4.0, 5.6, 8.0, 11.0, 16.0]
+FOCALS = [4.2, 5.1, 14.0, 16.0, 18.0, 24.0, 28.0, 35.0, 50.0, 70.0, 85.0, 105.0, 200.0]
+KEYWORDS = ["Familie", "Natur", "Berge", "Meer", "Stadt", "Tiere", "Essen", "Freunde",
+            "Sonnenuntergang", "Architektur", "Party", "Kinder"]
+
+# -------------------------------
+# Einzelwerte
+# -------------------------------
+
+def _weighted(rng, items):
+    values, weights = zip(*items)
+    return rng.choices(values, weights)[0]
+
+
+def _exif_datetime(rng, ts: datetime) -> str:
+    """
+    Gemischte Schreibweisen, wie sie in echten Beständen vorkommen.
+    """
+    base = ts.strftime("%Y:%m:%d %H:%M:%S")
+    style = rng.random()
+    if style < 0.55:
+        return base
+    if style < 0.80:
+        return base + rng.choice(["+01:00", "+02:00", "-05:00", "+09:00"])
+    if style < 0.90:
+        return f"{base}.{rng.randrange(1000):03d}"
+    if style < 0.95:
+        return f"{base}.{rng.randrange(100):02d}+02:00"
+    if style < 0.98:
+        return base + "Z"
+    return ts.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _gps(rng):
+    lat, lon = rng.uniform(35.0, 60.0), rng.uniform(-10.0, 30.0)
+
+    def dms(value, pos, neg):
+        ref = pos if value >= 0 else neg
+        value = abs(value)
+        deg = int(value)
+        minutes = int((value - deg) * 60)
+        seconds = (value - deg - minutes / 60) * 3600
+        return f"{deg} deg {minutes}' {seconds:.2f}\" {ref}"
+
+    lat_s, lon_s = dms(lat, "N", "S"), dms(lon, "E", "W")
+    return {
+        "GPSLatitude": lat_s,
+        "GPSLongitude": lon_s,
+        "GPSPosition": f"{lat_s}, {lon_s}",
+        "GPSAltitude": f"{rng.uniform(0, 2500):.1f} m Above Sea Level",
+    }
+
+
+def _file_size(rng, video: bool) -> str:
+    size = rng.lognormvariate(17.5 if video else 15.0, 1.0)
+    for unit in ("bytes", "kB", "MB", "GB"):
+        if size < 1000:
+            return f"{size:.0f} {unit}" if unit == "bytes" else f"{size:.1f} {unit}"
+        size /= 1000
+    return f"{size:.1f} TB"
+
+
+def _duration(rng) -> str:
+    seconds = rng.lognormvariate(3.0, 1.2)
+    if seconds < 30:
+        return f"{seconds:.2f} s"
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+def _tail_value(rng, idx: int):
+    # je Tag eine feste Art: Zahl, Text mit Zahl oder Aufzählung; jedes
+    # siebte Tag gemischt (Zahl oder Text), wie bei manchen MakerNotes
+    kind = idx % 7
+    if kind in (0, 1, 2):
+        return rng.randrange(1000)
+    if kind in (3, 4):
+        return f"{rng.random() * 100:.2f}"
+    if kind == 5:
+        return rng.choice(["Unknown", "On", "Off", "Auto"])
+    return rng.choice([rng.randrange(10), "n/a"])
+
+# -------------------------------
+# Datensätze
+# -------------------------------
+
+def tail_tag_names(n: int):
+    groups = ["MakerNotes", "XMP", "IPTC", "Composite", "ICC_Profile", "QuickTime"]
+    return [f"{groups[i % len(groups)]}Tag{i:04d}" for i in range(n)]
+
+
+def generate_records(
+    rows: int = DEFAULT_ROWS,
+    seed: int = 1,
+    tail_tags: int = DEFAULT_TAIL_TAGS,
+    first_year: int = 2005,
+    last_year: int = 2024
+):
+    """
+    Liefert rows Datensätze (dicts) nacheinander; nichts wird gesammelt.
+    """
+    rng = random.Random(seed)
+    tail_names = tail_tag_names(tail_tags)
+    tail_weights = list(accumulate(1.0 / (i + 1) for i in range(tail_tags)))
+
+    start = datetime(first_year, 1, 1)
+    span = (datetime(last_year + 1, 1, 1) - start).total_seconds()
+    # Ereignisse: zusammenhängende Serien im selben Ordner
+    event_dir, event_left, event_time = None, 0, start
+
+    for i in range(rows):
+        if event_left <= 0:
+            event_time = start + timedelta(seconds=rng.random() * span)
+            event = rng.choice(EVENTS)
+            event_dir = f"./{event_time.year}/{event_time:%Y-%m-%d} {event}"
+            event_left = int(rng.expovariate(1 / 80)) + 1
+        event_left -= 1
+        event_time += timedelta(seconds=rng.expovariate(1 / 120))
+
+        video = rng.random() < VIDEO_SHARE
+        ext = _weighted(rng, VIDEO_EXTS if video else IMAGE_EXTS)
+        prefix = "VID" if video else rng.choice(["IMG", "DSC", "PXL"])
+        make_idx = rng.choices(range(len(CAMERAS)), CAMERA_WEIGHTS)[0]
+        make, models = CAMERAS[make_idx]
+
+        rec = {
+            "SourceFile": f"{event_dir}/{prefix}_{i:07d}{ext}",
+            "FileName": f"{prefix}_{i:07d}{ext}",
+            "FileSize": _file_size(rng, video),
+            "FileModifyDate": f"{event_time + timedelta(days=rng.randrange(30)):%Y:%m:%d %H:%M:%S}+01:00",
+            "FileType": ext.lstrip(".").upper(),
+            "MIMEType": ("video/" if video else "image/") + ext.lstrip(".").lower(),
+            "Make": make,
+            "Model": rng.choice(models),
+        }
+
+        if rng.random() < 0.92:
+            rec["DateTimeOriginal"] = _exif_datetime(rng, event_time)
+        if rng.random() < 0.85:
+            rec["CreateDate"] = _exif_datetime(rng, event_time)
+
+        if video:
+            rec["Duration"] = _duration(rng)
+            rec["VideoFrameRate"] = rng.choice([23.976, 25, 29.97, 30, 50, 59.94, 60])
+            rec["ImageWidth"], rec["ImageHeight"] = rng.choice([(1920, 1080), (3840, 2160), (1280, 720)])
+        else:
+            rec["ISO"] = rng.choice(ISO_VALUES)
+            rec["ExposureTime"] = rng.choice(EXPOSURES)
+            rec["FNumber"] = rng.choice(APERTURES)
+            rec["FocalLength"] = f"{rng.choice(FOCALS):.1f} mm"
+            rec["ImageWidth"], rec["ImageHeight"] = rng.choice([(6000, 4000), (4032, 3024), (5472, 3648)])
+            rec["Orientation"] = rng.choice(["Horizontal (normal)", "Rotate 90 CW", "Rotate 270 CW"])
+            if rng.random() < 0.3:
+                rec["LensModel"] = f"{rng.choice(FOCALS):.0f}mm F{rng.choice(APERTURES)}"
+
+        if rng.random() < 0.35:
+            rec.update(_gps(rng))
+
+        if rng.random() < 0.2:
+            # einzeln als Text, mehrere als Liste – wie bei ExifTool
+            k = rng.choices([1, 2, 3, 4], [50, 30, 15, 5])[0]
+            words = rng.sample(KEYWORDS, k)
+            rec["Keywords"] = words[0] if k == 1 else words
+
+        if tail_names:
+            k = int(rng.expovariate(1 / TAIL_TAGS_PER_ROW))
+            for idx in rng.choices(range(tail_tags), cum_weights=tail_weights, k=k):
+                rec[tail_names[idx]] = _tail_value(rng, idx)
+
+        yield rec
+
+
+def write_catalog(path, rows: int = DEFAULT_ROWS, seed: int = 1, tail_tags: int = DEFAULT_TAIL_TAGS,
+                  progress=None) -> Path:
+    """
+    Schreibt den Katalog als JSON-Array, Datensatz für Datensatz.
+    progress(geschrieben) alle 100.000 Zeilen.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, rec in enumerate(generate_records(rows, seed, tail_tags)):
+            f.write(",\n" if i else "\n")
+            f.write(json.dumps(rec, ensure_ascii=False))
+            if progress is not None and (i + 1) % 100_000 == 0:
+                progress(i + 1)
+        f.write("\n]\n")
+
+    tmp.replace(path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Künstliches ExifTool-JSON erzeugen")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tail-tags", type=int, default=DEFAULT_TAIL_TAGS,
+                        help="Anzahl seltener Tags im langen Schwanz")
+    args = parser.parse_args(argv)
+
+    write_catalog(
+        args.output, args.rows, args.seed, args.tail_tags,
+        progress=lambda n: print(f"{n:,} Zeilen…", file=sys.stderr)
+    )
+    print(f"{args.rows:,} Datensätze nach {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
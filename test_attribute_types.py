@@ -0,0 +1,23 @@
+# test_attribute_types.py
+
+from decimal import Decimal
+
+import attribute_types as at
+import metadata_cache as mc
+from conftest import make_records
+
+F_NUMBERS = [1.4, 1.8, 2.0, 2.8, 3.5, 4.0, 5.6, 6.3, 7.1, 8.0, 11.0, 16.0, 22.0]
+
+
+def test_decimal_samples_are_numeric():
+    samples = {"FNumber": [Decimal(str(v)) for v in F_NUMBERS] + [None]}
+    assert at.infer_types_from_samples(samples) == {"FNumber": "numeric"}
+
+
+def test_lazy_and_full_load_agree(write_meta):
+    path = write_meta(make_records(200, lambda i: {"FNumber": F_NUMBERS[i % len(F_NUMBERS)]}))
+    _, lazy_types, _, _ = mc.load_catalog_cached(path, use_cache=False)
+    _, full_types, _, _ = mc.load_metadata_cached(path, use_cache=False)
+
+    assert lazy_types["FNumber"] == full_types["FNumber"] == "numeric"
+    assert lazy_types == full_types
@@ -0,0 +1,41 @@
+# test_dataset_registry.py
+
+import dataset_registry as dsr
+from conftest import apply_attributes, apply_filters, make_records
+
+
+def test_ensure_columns_loads_missing(write_meta):
+    path = write_meta(make_records(300))
+    entry = dsr.get_dataset(path, use_cache=False, lazy=True)
+    assert "Make" not in entry["df"].columns
+
+    assert dsr.ensure_columns(entry, ["Make"]) == ["Make"]
+    assert entry["df"]["Make"].iloc[1] == "Nikon"
+    assert dsr.ensure_columns(entry, ["Make"]) == []
+
+
+def test_lazy_reload_after_eviction(write_meta, open_app):
+    path = write_meta(make_records(300))
+    at = open_app(path.parent, lazy=True, cache=False)
+    apply_attributes(at, ["Make"])
+
+    # Eintrag verdrängt (z.B. durch eine andere Sitzung)
+    dsr._registry()["entries"].clear()
+    at.run()
+    assert not at.exception, [e.value for e in at.exception]
+    assert apply_filters(at) == 300
+
+
+def test_add_columns_swaps_the_shared_frame(write_meta):
+    path = write_meta(make_records(300))
+    entry = dsr.get_dataset(path, use_cache=False, lazy=True)
+    old, version = entry["df"], entry["version"]
+    old_columns = list(old.columns)
+
+    dsr.ensure_columns(entry, ["Make", "ISO"])
+
+    assert list(old.columns) == old_columns  # Leser des alten Frames unberührt
+    assert entry["df"] is not old
+    assert entry["df"]["ISO"].iloc[2] == 400
+    assert entry["version"] == version + 1
+    assert entry["df"]._mgr.nblocks <= old._mgr.nblocks + 2
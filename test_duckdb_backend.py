@@ -0,0 +1,77 @@
+# test_duckdb_backend.py
+
+import pytest
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+import duckdb_backend as db
+import metadata_cache as mc
+import metadata_core as core
+from conftest import apply_attributes, apply_filters, make_records
+
+ROWS = 2500  # mehr verschiedene FileNames als MAX_FACET_VALUES
+
+
+@pytest.fixture
+def catalog(write_meta):
+    path = write_meta(make_records(ROWS))
+    df, types, _, _ = mc.load_metadata_cached(path, use_cache=True)
+    return path, df, types, db.open_catalog(*db.catalog_source(path))
+
+
+def test_value_counts_reports_truncation(catalog):
+    _, _, types, cat = catalog
+    counts, truncated = db.value_counts(cat, "FileName", {}, types, "Alle Medien")
+    assert truncated
+    assert len(counts) == db.MAX_FACET_VALUES
+
+    counts, truncated = db.value_counts(cat, "FileName", {}, types, "Alle Medien", limit=None)
+    assert not truncated
+    assert len(counts) == ROWS
+
+
+def test_full_option_list_matches_pandas(catalog):
+    _, df, types, cat = catalog
+    values = db.facet_options(cat, "FileName", {}, types, "Alle Medien", limit=None)
+    filters = {"FileName": values}
+
+    in_memory = int(core.filter_mask(df, filters, types, "Alle Medien").sum())
+    assert db.count_matches(cat, filters, types, "Alle Medien") == in_memory == ROWS
+
+
+def test_app_preselection_keeps_all_rows(catalog, open_app, monkeypatch):
+    path = catalog[0]
+    monkeypatch.setattr(db, "OUT_OF_CORE_MIN_ROWS", 1)
+
+    at = open_app(path.parent)
+    assert "catalog" in at.session_state
+    apply_attributes(at, ["FileName"])
+    assert len(at.session_state["FileName_cat"]) == ROWS
+    assert any("Liste gekürzt" in c.value for c in at.caption)
+    assert apply_filters(at) == ROWS
+
+
+def test_list_column_matches_pandas(write_meta):
+    keywords = [["Urlaub", "Meer"], ["Meer"], "Berg", None, ["Familie", "Berg"]]
+    path = write_meta(make_records(500, lambda i: {"Keywords": keywords[i % 5]} if keywords[i % 5] else {}))
+    df, types, _, _ = mc.load_metadata_cached(path, use_cache=True)
+    cat = db.open_catalog(*db.catalog_source(path))
+
+    for selected in (["Meer"], ["Berg"], ["Urlaub", "Familie"]):
+        filters = {"Keywords": selected}
+        in_memory = int(core.filter_mask(df, filters, types, "Alle Medien").sum())
+        assert db.count_matches(cat, filters, types, "Alle Medien") == in_memory
+    assert in_memory == 200
+
+
+def test_export_chunks_keep_their_types(write_meta):
+    # erste Blöcke ohne Werte: Typ darf nicht vom NULL-Anteil abhängen
+    path = write_meta(make_records(300, lambda i: {"HDR": i % 2 == 0, "Count": i} if i >= 150 else {}))
+    _, types, _, _ = mc.load_metadata_cached(path, use_cache=True)
+    cat = db.open_catalog(*db.catalog_source(path))
+
+    frames = list(db.iter_frames(cat, {}, types, "Alle Medien", ["HDR", "Count"], chunk_size=100))
+
+    assert len({tuple(map(str, f.dtypes)) for f in frames}) == 1
+    assert frames[-1]["Count"].tolist() == list(range(200, 300))
@@ -0,0 +1,41 @@
+# test_export.py
+
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+import export as ex
+
+
+def test_parquet_schema_survives_type_drift_between_chunks(tmp_path):
+    # erster Block: ISO ohne Lücken, Lens/Flash komplett leer
+    df = pd.DataFrame({
+        "SourceFile": [f"./IMG_{i:05d}.jpg" for i in range(6)],
+        "ISO": pd.array([100, 200, 400, None, 800, None], dtype="Int16"),
+        "Lens": [None, None, None, "EF 50mm", None, {"a": 1}],
+        "Flash": pd.array([None, None, None, True, False, None], dtype="boolean"),
+    })
+    path = tmp_path / "out.parquet"
+
+    n = ex.write_export(ex.iter_frames(df, None, ["ISO", "Lens", "Flash"], chunk_size=3), path)
+
+    table = pq.read_table(path)
+    assert n == 6
+    assert table.schema.field("ISO").type == pa.int16()
+    assert table.column("ISO").to_pylist() == [100, 200, 400, None, 800, None]
+    assert table.column("Lens").to_pylist()[3:] == ["EF 50mm", None, '{"a": 1}']
+    assert table.column("Flash").to_pylist()[3:5] == [True, False]
+
+
+def test_incompatible_chunks_are_a_write_error(tmp_path):
+    frames = [
+        pd.DataFrame({"SourceFile": ["a"], "ISO": [100]}),
+        pd.DataFrame({"SourceFile": ["b"], "ISO": ["hoch"]}),
+    ]
+    path = tmp_path / "out.parquet"
+
+    with pytest.raises(RuntimeError):
+        ex.write_export(iter(frames), path)
+    assert not path.exists()
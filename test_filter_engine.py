@@ -0,0 +1,20 @@
+# test_filter_engine.py
+
+import filter_engine as fe
+
+
+def test_cached_facet_depends_on_other_filters_only():
+    cache, calls = {}, []
+
+    def count():
+        calls.append(1)
+        return {"Canon": 1}
+
+    filters = {"Make": ["Canon"], "ISO": (100, 400)}
+    fe.cached_facet(cache, "Make", filters, "Alle Medien", count)
+    fe.cached_facet(cache, "Make", dict(filters, Make=["Nikon"]), "Alle Medien", count)
+    assert len(calls) == 1
+
+    fe.cached_facet(cache, "Make", dict(filters, ISO=(100, 800)), "Alle Medien", count)
+    fe.cached_facet(cache, "Make", filters, "Nur Bilder", count)
+    assert len(calls) == 3
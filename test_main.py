@@ -0,0 +1,39 @@
+# test_main.py
+
+import json
+
+import pytest
+
+import main
+from conftest import make_records
+
+
+@pytest.fixture
+def meta_file(write_meta):
+    return write_meta(make_records(100))
+
+
+def run(meta_file, spec, *args):
+    spec_file = meta_file.parent / "filter.json"
+    spec_file.write_text(json.dumps(spec), encoding="utf-8")
+    return main.main([str(meta_file), "-f", str(spec_file), "--backend", "pandas", *args])
+
+
+@pytest.mark.parametrize("spec", [
+    {"DateTimeOriginal": {"year": ["abc"]}},
+    {"ISO": [100, "viel"]},
+    {"ISO": [None, 400]},
+])
+def test_malformed_value_is_a_usage_error(meta_file, spec, capsys):
+    assert run(meta_file, spec) == main.EXIT_USAGE == 2
+    err = capsys.readouterr().err
+    assert "Fehler im Filter" in err
+    assert next(iter(spec)) in err
+
+
+def test_empty_result_has_its_own_exit_code(meta_file, capsys):
+    assert run(meta_file, {"Make": ["Leica"]}, "--fail-empty") == main.EXIT_EMPTY
+    assert main.EXIT_EMPTY not in (0, 1, main.EXIT_USAGE, main.EXIT_LOAD)
+    capsys.readouterr()
+    assert run(meta_file, {"DateTimeOriginal": {"year": [2021]}}) == main.EXIT_OK
+    assert len(capsys.readouterr().out.splitlines()) == 1 + 33  # Kopfzeile + Treffer
@@ -0,0 +1,51 @@
+# test_metadata_core.py
+
+import pandas as pd
+
+import metadata_core as core
+
+KEYWORDS = pd.Series([["Urlaub", "Meer"], None, ["Meer"], "Berg", 7, ["Familie", 7]], dtype=object)
+
+
+def test_option_values_flattens_lists():
+    assert core.option_values(KEYWORDS) == [7, "Berg", "Familie", "Meer", "Urlaub"]
+
+
+def test_categorical_mask_matches_list_elements():
+    assert core.categorical_mask(KEYWORDS, ["Meer"]).tolist() == [True, False, True, False, False, False]
+    assert core.categorical_mask(KEYWORDS, ["Berg", 7]).tolist() == [False, False, False, True, True, True]
+
+
+def test_categorical_mask_ignores_index():
+    series = KEYWORDS.set_axis(range(10, 16))
+    assert core.categorical_mask(series, ["Familie"]).tolist() == [False] * 5 + [True]
+
+
+def test_option_counts_counts_rows_once():
+    series = pd.Series([["Meer", "Meer"], ["Meer", "Berg"], "Berg", None], dtype=object)
+    assert core.option_counts(series) == {"Meer": 2, "Berg": 2}
+    assert core.option_counts(series, [False, True, False, True]) == {"Meer": 1, "Berg": 1}
+
+
+def test_wide_multi_file_load_is_not_fragmented(write_meta, recwarn):
+    import metadata_cache as mc
+    from conftest import make_records
+
+    def wide(file_no):
+        # viele Attribute, je Datei mal Zahl, mal Text (wie bei gemischten
+        # Kameras), dazu formatierte Werte mit Textspalte
+        def fields(i):
+            out = {
+                f"Tag{k:03d}": (i * k) % 17 if (k + file_no) % 2 else f"v{i % 3}"
+                for k in range(150) if (i + k) % 3
+            }
+            out.update({f"Exposure{k:03d}": f"1/{i % 9 + 2}" for k in range(5)})
+            return out
+        return fields
+
+    files = [write_meta(make_records(50, wide(j)), name=f"{name}.json") for j, name in enumerate("ab")]
+    df, _, _, _ = mc.load_metadata_files_cached(files, use_cache=False)
+
+    assert df.shape[1] > 150
+    assert not [w for w in recwarn if issubclass(w.category, pd.errors.PerformanceWarning)]
+    assert df[core.META_FILE_COL].tolist() == ["a.json"] * 50 + ["b.json"] * 50
@@ -0,0 +1,66 @@
+# test_metadata_delta.py
+
+import pandas as pd
+import pytest
+
+import metadata_cache as mc
+import metadata_core as core
+import metadata_delta as md
+from conftest import make_records
+
+F_NUMBERS = [1.4, 1.8, 2.0, 2.8, 3.5, 4.0, 5.6, 6.3, 7.1, 8.0, 11.0, 16.0, 22.0]
+
+
+@pytest.fixture
+def base(write_meta):
+    return write_meta(make_records(200, lambda i: {"FNumber": F_NUMBERS[i % len(F_NUMBERS)]}))
+
+
+def test_formatted_delta_keeps_numeric_column(base, write_meta):
+    delta = write_meta([{"SourceFile": "./2020/IMG_00003.jpg", "FNumber": "1/2"}], name="delta.json")
+    df, types, _, summary = md.apply_delta_file(base, delta, use_cache=False)
+
+    assert summary["updated"] == 1
+    assert types["FNumber"] == "numeric"
+    assert pd.api.types.is_float_dtype(df["FNumber"])
+    assert df["FNumber"].iloc[-1] == 0.5
+
+
+def test_cache_write_reuses_stored_hash(base, write_meta, monkeypatch):
+    pytest.importorskip("pyarrow")
+    mc.load_metadata_cached(base, use_cache=True)
+    delta = write_meta([{"SourceFile": "./2020/IMG_00003.jpg", "FNumber": 2.2}], name="delta.json")
+
+    hashed = []
+    file_hash = mc.file_hash
+    monkeypatch.setattr(mc, "file_hash", lambda path: hashed.append(path) or file_hash(path))
+    md.apply_delta_file(base, delta, use_cache=True)
+
+    assert hashed == [delta]
+    assert mc.cached_content_hash(base) == file_hash(base)
+
+
+def test_only_filled_columns_are_merged_and_reinferred(base, write_meta, monkeypatch):
+    df, types, stats, _ = mc.load_metadata_cached(base, use_cache=False)
+    assert isinstance(df["Make"].dtype, pd.CategoricalDtype)
+
+    inferred = []
+    infer = md.infer_all_attribute_details
+    monkeypatch.setattr(md, "infer_all_attribute_details",
+                        lambda frame, columns: inferred.extend(columns) or infer(frame, columns=columns))
+
+    delta = write_meta([
+        {"SourceFile": "./2020/IMG_00003.jpg", "Make": "Leica", "ISO": None, "FNumber": None},
+        {"SourceFile": "./2021/IMG_09999.jpg", "Make": None, "ISO": None, "FNumber": None},
+    ], name="delta.json")
+    out, new_types, _, summary = md.apply_delta_file(base, delta, use_cache=False, base=(df, types, stats))
+
+    assert summary["columns"] == 1
+    assert inferred == ["Make"]
+    assert new_types == types
+    # neue Zeile ohne Wert: ISO wird nullable, FNumber bleibt float
+    for col in ("FNumber", core.SOURCE_DIR_COL):
+        assert out[col].dtype == df[col].dtype, col
+    assert isinstance(out["Make"].dtype, pd.CategoricalDtype)
+    assert out["Make"].iloc[-2] == "Leica" and pd.isna(out["Make"].iloc[-1])
+    assert out["Make"].iloc[:-2].tolist() == df["Make"].drop(index=3).tolist()
@@ -0,0 +1,74 @@
+# test_open_in_explorer.py
+
+import os
+
+import pytest
+
+import open_in_explorer as oie
+
+
+@pytest.fixture
+def files(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    paths = []
+    for i in range(6):
+        p = src / f"IMG_{i:05d}.jpg"
+        p.write_text(f"bild {i}")
+        paths.append(str(p))
+    return paths
+
+
+def entries(stats):
+    return sorted(p.name for p in stats["dir"].iterdir() if p.name != oie.MANIFEST_NAME)
+
+
+@pytest.mark.parametrize("backend", ["symlink", "hardlink"])
+def test_backend_links_all_files(files, tmp_path, backend):
+    stats = oie.materialize_selection(files, tmp_path, backend=backend)
+
+    assert stats["created"] == 6 and stats["failed"] == 0
+    assert entries(stats) == sorted(os.path.basename(p) for p in files)
+    for p in files:
+        link = stats["dir"] / os.path.basename(p)
+        assert link.is_symlink() == (backend == "symlink")
+        assert os.path.samefile(link, p)
+
+
+@pytest.mark.parametrize("backend", ["symlink", "hardlink"])
+def test_second_run_only_applies_differences(files, tmp_path, backend):
+    oie.materialize_selection(files[:4], tmp_path, backend=backend)
+    stats = oie.materialize_selection(files[2:], tmp_path, backend=backend)
+
+    assert (stats["kept"], stats["removed"], stats["created"]) == (2, 2, 2)
+    assert entries(stats) == sorted(os.path.basename(p) for p in files[2:])
+
+
+def test_relative_paths_do_not_dangle(files, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    relative = [os.path.relpath(p) for p in files]
+
+    stats = oie.materialize_selection(relative, "out", backend="symlink")
+
+    for p in files:
+        link = stats["dir"] / os.path.basename(p)
+        assert os.path.isabs(os.readlink(link))
+        assert link.read_text() == open(p).read()
+
+
+def test_dangling_link_is_recreated(files, tmp_path):
+    stats = oie.materialize_selection(files[:1], tmp_path, backend="symlink")
+    link = stats["dir"] / os.path.basename(files[0])
+    link.unlink()
+    os.symlink(os.path.basename(files[0]), link)  # relativ, wie frühere Läufe
+
+    stats = oie.materialize_selection(files[:1], tmp_path, backend="symlink")
+
+    assert (stats["kept"], stats["created"]) == (0, 1)
+    assert os.path.samefile(link, files[0])
+
+
+def test_missing_files_are_counted(files, tmp_path):
+    stats = oie.materialize_selection(files[:2] + [str(tmp_path / "weg.jpg")], tmp_path, backend="symlink")
+
+    assert (stats["created"], stats["missing"]) == (2, 1)
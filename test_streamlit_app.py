@@ -0,0 +1,73 @@
+# test_streamlit_app.py
+
+import pytest
+
+import duckdb_backend as db
+import metadata_cache as mc
+from conftest import apply_attributes, apply_filters, make_records
+
+KEYWORDS = [["Urlaub", "Meer"], ["Meer"], "Berg", None, ["Familie", "Berg"]]
+
+
+def use_catalog(monkeypatch, path):
+    # DuckDB-Modus braucht einen gültigen Parquet-Cache
+    pytest.importorskip("duckdb")
+    monkeypatch.setattr(db, "OUT_OF_CORE_MIN_ROWS", 1)
+    mc.load_metadata_cached(path, use_cache=True)
+
+
+def keyword_records(n):
+    return make_records(n, lambda i: {"Keywords": KEYWORDS[i % 5]} if KEYWORDS[i % 5] else {})
+
+
+@pytest.mark.parametrize("catalog_mode", [False, True])
+def test_list_column_apply(write_meta, open_app, monkeypatch, catalog_mode):
+    path = write_meta(keyword_records(500))
+    if catalog_mode:
+        use_catalog(monkeypatch, path)
+
+    at = open_app(path.parent)
+    assert ("catalog" in at.session_state) == catalog_mode
+    apply_attributes(at, ["Keywords"])
+    assert not at.exception, [e.value for e in at.exception]
+    assert at.session_state["Keywords_cat"] == ["Berg", "Familie", "Meer", "Urlaub"]
+
+    widget = next(m for m in at.multiselect if m.key == "Keywords_cat")
+    assert widget.format_func("Meer") == "Meer (200)"
+    widget.set_value(["Meer"]).run()
+    assert apply_filters(at) == 200
+
+
+def test_catalog_counts_are_cached(write_meta, open_app, monkeypatch):
+    path = write_meta(make_records(300))
+    use_catalog(monkeypatch, path)
+    calls = []
+    value_counts = db.value_counts
+    monkeypatch.setattr(db, "value_counts", lambda *a, **k: calls.append(a[1]) or value_counts(*a, **k))
+
+    at = open_app(path.parent)
+    assert "catalog" in at.session_state
+    apply_attributes(at, ["Make", "FileName"])
+    queried = len(calls)
+
+    at.run()
+    assert len(calls) == queried
+
+    # Auswahl in Make ändert nur die Zählung der übrigen Attribute
+    next(m for m in at.multiselect if m.key == "Make_cat").set_value(["Canon"]).run()
+    assert calls[queried:] == ["FileName"]
+
+
+def test_result_keeps_rows_not_a_copy(write_meta, open_app):
+    import numpy as np
+    import pandas as pd
+
+    at = open_app(write_meta(make_records(300)).parent)
+    apply_attributes(at, ["Make"])
+    next(m for m in at.multiselect if m.key == "Make_cat").set_value(["Canon"]).run()
+    assert apply_filters(at) == 100
+
+    rows = at.session_state["filtered_rows"]
+    assert isinstance(rows, np.ndarray) and rows.tolist() == list(range(0, 300, 3))
+    assert "filtered_rows" in list(at.session_state)
+    assert not any(isinstance(at.session_state[k], pd.DataFrame) for k in at.session_state)
@@ -0,0 +1,221 @@
+# thumbnail_cache.py
+
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+# Ablageort und Größenrahmen des Vorschaubild-Caches
+CACHE_DIR = Path(os.environ.get(
+    "METAEXPLORER_THUMB_DIR",
+    Path.home() / ".cache" / "metaexplorer" / "thumbnails"
+))
+CACHE_BUDGET_BYTES = int(os.environ.get("METAEXPLORER_THUMB_BUDGET_MB", "1024")) * 1024 ** 2
+
+# Nach so vielen neu geschriebenen Vorschaubildern wird aufgeräumt
+EVICT_EVERY = 200
+
+JPEG_QUALITY = 85
+
+_writes_since_evict = 0
+
+# -------------------------------
+# Schlüssel und Ablage
+# -------------------------------
+
+def thumbnail_key(path, max_width: int, max_height: int) -> str:
+    """
+    Schlüssel aus Pfad, Änderungszeit, Dateigröße und Zielgröße:
+    ändert sich das Original, wird automatisch neu erzeugt.
+    """
+    st_ = os.stat(path)
+    raw = f"{Path(path).resolve()}|{st_.st_size}|{st_.st_mtime_ns}|{max_width}x{max_height}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _entry_paths(cache_dir: Path, key: str):
+    # zweistufig, damit kein Verzeichnis zehntausende Einträge hat
+    folder = cache_dir / key[:2]
+    return folder / f"{key}.jpg", folder / f"{key}.png"
+
+
+def _find_entry(cache_dir: Path, key: str):
+    for candidate in _entry_paths(cache_dir, key):
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def _write_entry(cache_dir: Path, key: str, img: Image.Image) -> Path:
+    jpg, png = _entry_paths(cache_dir, key)
+    has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+    target = png if has_alpha else jpg
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if has_alpha:
+                img.save(f, format="PNG", optimize=False)
+            else:
+                img.convert("RGB").save(f, format="JPEG", quality=JPEG_QUALITY)
+        # atomar ersetzen, parallele Erzeuger stören sich nicht
+        os.replace(tmp, target)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return target
+
+# -------------------------------
+# Vorschaubild erzeugen / laden
+# -------------------------------
+
+def make_thumbnail(path, max_width: int = 600, max_height: int = 400) -> Image.Image:
+    """
+    Verkleinert ein Bild. Bei JPEG dekodiert PIL im Draft-Modus direkt in
+    einer reduzierten Auflösung (1/2, 1/4, 1/8), das spart den Großteil der
+    Dekodierzeit; LANCZOS läuft danach nur noch auf dem kleinen Bild.
+    """
+    img = Image.open(path)
+    if img.format == "JPEG":
+        img.draft("RGB", (max_width, max_height))
+    img.thumbnail((max_width, max_height), Image.LANCZOS)
+    return img
+
+
+def get_thumbnail(path, max_width: int = 600, max_height: int = 400, cache_dir=None) -> Image.Image:
+    """
+    Vorschaubild aus dem Cache, bei Bedarf erzeugen und ablegen.
+    Ist der Cache nicht beschreibbar, wird nur erzeugt.
+    """
+    global _writes_since_evict
+    cache_dir = Path(cache_dir or CACHE_DIR)
+
+    try:
+        key = thumbnail_key(path, max_width, max_height)
+    except OSError:
+        return make_thumbnail(path, max_width, max_height)
+
+    entry = _find_entry(cache_dir, key)
+    if entry is not None:
+        try:
+            img = Image.open(entry)
+            img.load()
+            # Zugriffszeit für die LRU-Verdrängung auffrischen
+            os.utime(entry)
+            return img
+        except OSError:
+            pass  # beschädigt -> neu erzeugen
+
+    img = make_thumbnail(path, max_width, max_height)
+    try:
+        _write_entry(cache_dir, key, img)
+        _writes_since_evict += 1
+        if _writes_since_evict >= EVICT_EVERY:
+            _writes_since_evict = 0
+            evict(cache_dir)
+    except OSError:
+        pass
+    return img
+
+# -------------------------------
+# Aufräumen
+# -------------------------------
+
+def cache_usage(cache_dir=None):
+    """
+    Liefert [(pfad, größe, mtime), ...] aller Cache-Einträge.
+    """
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    entries = []
+    if not cache_dir.is_dir():
+        return entries
+    for folder in cache_dir.iterdir():
+        if not folder.is_dir():
+            continue
+        for f in folder.iterdir():
+            if f.suffix not in (".jpg", ".png"):
+                continue
+            try:
+                st_ = f.stat()
+            except OSError:
+                continue
+            entries.append((f, st_.st_size, st_.st_mtime))
+    return entries
+
+
+def evict(cache_dir=None, budget: int = CACHE_BUDGET_BYTES) -> int:
+    """
+    Löscht die am längsten nicht benutzten Vorschaubilder, bis der Cache
+    wieder ins Budget passt. Liefert die Zahl der gelöschten Einträge.
+    """
+    entries = cache_usage(cache_dir)
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+
+    for f, size, _ in sorted(entries, key=lambda e: e[2]):
+        if total <= budget:
+            break
+        try:
+            f.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+# -------------------------------
+# Vorab erzeugen
+# -------------------------------
+
+def _pregenerate_one(args):
+    # Läuft im Worker-Prozess, muss daher auf Modulebene stehen
+    path, max_width, max_height, cache_dir = args
+    try:
+        key = thumbnail_key(path, max_width, max_height)
+        if _find_entry(Path(cache_dir), key) is not None:
+            return "cached"
+        img = make_thumbnail(path, max_width, max_height)
+        _write_entry(Path(cache_dir), key, img)
+        return "created"
+    except Exception:
+        return "failed"
+
+
+def pregenerate_thumbnails(
+    paths,
+    max_width: int = 600,
+    max_height: int = 400,
+    cache_dir=None,
+    workers=None,
+    progress=None
+) -> dict:
+    """
+    Erzeugt die Vorschaubilder für eine Liste von Bilddateien auf einem
+    Prozess-Pool. progress(fertig, gesamt) wird laufend aufgerufen.
+    Liefert {"created", "cached", "failed"}.
+    """
+    cache_dir = str(cache_dir or CACHE_DIR)
+    paths = list(paths)
+    counts = {"created": 0, "cached": 0, "failed": 0}
+    if not paths:
+        return counts
+
+    if workers is None:
+        workers = min(os.cpu_count() or 1, 8)
+
+    jobs = [(p, max_width, max_height, cache_dir) for p in paths]
+    chunksize = max(1, min(32, len(jobs) // (workers * 4)))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for done, status in enumerate(pool.map(_pregenerate_one, jobs, chunksize=chunksize), 1):
+            counts[status] += 1
+            if progress is not None:
+                progress(done, len(jobs))
+
+    evict(cache_dir)
+    return counts
@@ -0,0 +1,278 @@
+# value_parsers.py
+
+import re
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Originaltext einer umgewandelten Spalte bleibt unter diesem Namen erhalten
+TEXT_SUFFIX = " (Text)"
+
+# Anteil der Textwerte, die ein Parser erkennen muss
+MIN_MATCH_RATIO = 0.9
+
+_NUM = r"[+\-]?\d+(?:\.\d+)?(?:[eE][+\-]?\d+)?"
+
+_SIZE_FACTORS = {
+    "bytes": 1, "b": 1,
+    "kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3, "tb": 1024 ** 4,
+}
+
+_UNITS = r"(?:mm|cm|m|km|s|ms|%|dpi|px|fps|Hz|kHz|kbps|Mbps|bits?)"
+
+# Vorfilter für Koordinaten: DMS oder Breite mit Himmelsrichtung vor dem Komma
+_COORD_HINT = re.compile(r"deg|\d[\"\s]*[NS]\s*,")
+
+# -------------------------------
+# Einzelne Parser
+# -------------------------------
+# Jeder Parser bekommt eindeutige Textwerte und liefert (werte, formatiert):
+# werte = float (NaN = nicht erkannt), formatiert = Wert hatte wirklich
+# eine Formatierung (Bruch, Einheit, ...) und war nicht nur eine Zahl.
+
+def _to_float(s: pd.Series) -> pd.Series:
+    return pd.to_numeric(s, errors="coerce").astype("float64")
+
+
+def parse_rational(text: pd.Series):
+    # "1/200", "0.5"
+    parts = text.str.extract(rf"^\s*(?P<num>{_NUM})\s*(?:/\s*(?P<den>{_NUM}))?\s*$")
+    num, den = _to_float(parts["num"]), _to_float(parts["den"])
+    values = num / den.where(den.notna() & (den != 0), np.nan)
+    values = values.where(parts["den"].notna(), num)
+    return values, parts["den"].notna()
+
+
+def parse_dms(text: pd.Series):
+    # "48 deg 12' 3.00\" N", "11 deg 34' 5.12\"", "48.2 deg"
+    parts = text.str.extract(
+        rf"^\s*(?P<deg>{_NUM})\s*deg"
+        rf"(?:\s*(?P<min>{_NUM})')?(?:\s*(?P<sec>{_NUM})\")?"
+        r"\s*(?P<ref>[NSEW])?\s*$"
+    )
+    values = (
+        _to_float(parts["deg"])
+        + _to_float(parts["min"]).fillna(0) / 60
+        + _to_float(parts["sec"]).fillna(0) / 3600
+    )
+    values = values.where(~parts["ref"].isin(["S", "W"]), -values)
+    return values, parts["deg"].notna()
+
+
+def parse_duration(text: pd.Series):
+    # "0:01:23", "1:23.5", "12.5 s", "12.50 s (approx)"
+    clock = text.str.extract(
+        r"^\s*(?:(?P<h>\d+):)?(?P<m>\d+):(?P<s>\d+(?:\.\d+)?)\s*(?:\(approx\))?\s*$"
+    )
+    seconds = text.str.extract(rf"^\s*(?P<s>{_NUM})\s*s\s*(?:\(approx\))?\s*$")
+
+    from_clock = (
+        _to_float(clock["h"]).fillna(0) * 3600
+        + _to_float(clock["m"]) * 60
+        + _to_float(clock["s"])
+    )
+    values = from_clock.where(clock["m"].notna(), _to_float(seconds["s"]))
+    return values, clock["m"].notna() | seconds["s"].notna()
+
+
+def parse_filesize(text: pd.Series):
+    # "3.2 MB", "512 kB", "123 bytes"
+    parts = text.str.extract(rf"^\s*(?P<num>{_NUM})\s*(?P<unit>bytes|[kKMGT]?B)\s*$")
+    factor = parts["unit"].str.lower().map(_SIZE_FACTORS)
+    values = _to_float(parts["num"]) * factor.astype("float64")
+    return values, parts["unit"].notna()
+
+
+def parse_unit(text: pd.Series):
+    # "24.0 mm", "24.0 mm (35 mm equivalent: 38.0 mm)", "520 m Above Sea Level"
+    parts = text.str.extract(rf"^\s*(?P<num>{_NUM})\s*(?P<unit>{_UNITS})(?:\s.*)?$")
+    values = _to_float(parts["num"])
+    below = text.str.contains("Below Sea Level", regex=False, na=False)
+    values = values.where(~below, -values)
+    return values, parts["unit"].notna()
+
+
+def _dms_pattern(prefix: str) -> str:
+    return (
+        rf"(?P<{prefix}deg>{_NUM})(?![\d.])(?:\s*deg)?"
+        rf"(?:\s*(?P<{prefix}min>{_NUM})')?(?:\s*(?P<{prefix}sec>{_NUM})\")?"
+        rf"\s*(?P<{prefix}ref>[NSEW])?"
+    )
+
+
+def _dms_value(parts, prefix: str) -> pd.Series:
+    values = (
+        _to_float(parts[prefix + "deg"])
+        + _to_float(parts[prefix + "min"]).fillna(0) / 60
+        + _to_float(parts[prefix + "sec"]).fillna(0) / 3600
+    )
+    return values.where(~parts[prefix + "ref"].isin(["S", "W"]), -values)
+
+
+def parse_coordinates(text: pd.Series):
+    """
+    Koordinatenpaare wie GPSPosition/GPSCoordinates:
+    "48 deg 8' 22.32\" N, 11 deg 34' 31.04\" E", "48.1395 11.5753"
+    (optional mit Höhe "…, 520 m Above Sea Level").
+    Liefert (breite, länge, formatiert); außerhalb von ±90/±180 -> NaN.
+    """
+    parts = text.str.extract(
+        rf"^\s*{_dms_pattern('lat_')}\s*[,\s]\s*{_dms_pattern('lon_')}"
+        rf"(?:\s*,\s*{_NUM}\s*m\b.*)?\s*$"
+    )
+    lat, lon = _dms_value(parts, "lat_"), _dms_value(parts, "lon_")
+    valid = (lat.abs() <= 90) & (lon.abs() <= 180)
+    formatted = text.str.contains("deg", regex=False, na=False) | parts["lat_ref"].notna()
+    return lat.where(valid), lon.where(valid), formatted & valid
+
+
+def coordinate_values(series: pd.Series):
+    """
+    (breite, länge) als float64-Arrays für eine Koordinatenspalte; wie
+    parse_values werden nur die eindeutigen Werte geparst.
+    """
+    codes, uniques = _unique_values(series)
+
+    lat = np.full(len(uniques) + 1, np.nan)
+    lon = np.full(len(uniques) + 1, np.nan)
+    text = _string_values(uniques)
+    if text is not None and not text.empty:
+        t_lat, t_lon, _ = parse_coordinates(text)
+        lat[text.index] = t_lat.to_numpy("float64")
+        lon[text.index] = t_lon.to_numpy("float64")
+
+    # letzter Eintrag für Code -1 (fehlender Wert)
+    return lat[codes], lon[codes]
+
+
+def coordinate_ratio(values: pd.Series) -> float:
+    """
+    Anteil der Werte, die Koordinatenpaare sind (0, wenn kein Wert als
+    DMS/mit Himmelsrichtung formatiert ist – "8 8" ist kein Ort).
+    """
+    non_null = values.dropna()
+    strings = [v for v in non_null if isinstance(v, str)]
+    # billiger Vorfilter, die meisten Spalten scheiden hier aus
+    if not any(_COORD_HINT.search(v) for v in strings):
+        return 0.0
+    lat, _, formatted = parse_coordinates(pd.Series(strings, dtype=object))
+    if not formatted.any():
+        return 0.0
+    return float(lat.notna().sum()) / len(non_null)
+
+
+# Reihenfolge = Priorität bei der Erkennung
+PARSERS = {
+    "dms": parse_dms,
+    "duration": parse_duration,
+    "filesize": parse_filesize,
+    "rational": parse_rational,
+    "unit": parse_unit,
+}
+
+# -------------------------------
+# Erkennung und Umwandlung
+# -------------------------------
+
+def _unique_values(series: pd.Series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), pd.Series(series.cat.categories, dtype=object)
+    codes, uniques = pd.factorize(series)
+    return codes, pd.Series(uniques, dtype=object)
+
+
+def _string_values(uniques: pd.Series) -> Optional[pd.Series]:
+    try:
+        is_str = uniques.str.len().notna()
+    except AttributeError:  # gar keine Strings
+        return None
+    return uniques[is_str]
+
+
+def detect_parser(values: pd.Series, min_ratio: float = MIN_MATCH_RATIO) -> Optional[str]:
+    """
+    Bestimmt den passenden Parser für eine Spalte (oder Stichprobe).
+    Reine Zahlen-Texte wie "0232" werden nicht umgewandelt: mindestens ein
+    Wert muss tatsächlich formatiert sein.
+    """
+    non_null = values.dropna()
+    if non_null.empty or pd.api.types.is_numeric_dtype(non_null):
+        return None
+
+    _, uniques = _unique_values(non_null)
+    text = _string_values(uniques)
+    if text is None or text.empty:
+        return None
+
+    for kind, parser in PARSERS.items():
+        parsed, formatted = parser(text)
+        if formatted.any() and parsed.notna().mean() >= min_ratio:
+            return kind
+    return None
+
+
+def parse_values(series: pd.Series, kind: str) -> pd.Series:
+    """
+    Wandelt eine Spalte mit dem angegebenen Parser in float64 um.
+    Geparst werden nur die eindeutigen Werte; echte Zahlen bleiben erhalten.
+    """
+    codes, uniques = _unique_values(series)
+
+    per_value = pd.to_numeric(uniques, errors="coerce").astype("float64")
+    text = _string_values(uniques)
+    if text is not None and not text.empty:
+        parsed, _ = PARSERS[kind](text)
+        per_value[text.index] = parsed
+
+    # letzter Eintrag für Code -1 (fehlender Wert)
+    per_value = np.append(per_value.to_numpy("float64"), np.nan)
+    return pd.Series(per_value[codes], index=series.index, name=series.name)
+
+
+def parse_formatted_columns(df: pd.DataFrame, columns=None):
+    """
+    Wandelt formatierte ExifTool-Werte (Brüche, Einheiten, DMS, Dauern,
+    Dateigrößen) in float-Spalten um. Der Originaltext bleibt als
+    '<attribut> (Text)' erhalten.
+    Liefert (df, {attribut: parser}).
+    """
+    parsed, texts = {}, {}
+
+    for col in (df.columns if columns is None else columns):
+        if col.endswith(TEXT_SUFFIX):
+            continue
+        try:
+            kind = detect_parser(df[col])
+        except Exception:
+            kind = None
+        if kind is None:
+            continue
+
+        texts[col + TEXT_SUFFIX] = df[col]
+        df[col] = parse_values(df[col], kind)
+        parsed[col] = kind
+
+    if texts:
+        # Textspalten in einem Schritt anhängen; einzeln eingefügt
+        # zerstückeln sie breite Frames (PerformanceWarning)
+        attrs = dict(df.attrs)
+        df = pd.concat([df, pd.DataFrame(texts, index=df.index)], axis=1)
+        df.attrs.update(attrs)
+
+    return df, parsed
+
+
+def detect_parsers_from_samples(samples: Dict[str, list]) -> Dict[str, str]:
+    """
+    Parser-Erkennung auf den Stichproben des Attribut-Katalogs.
+    """
+    parsers = {}
+    for col, values in samples.items():
+        try:
+            kind = detect_parser(pd.Series(values, dtype=object))
+        except Exception:
+            kind = None
+        if kind:
+            parsers[col] = kind
+    return parsers
@@ -0,0 +1,214 @@
+# video_duration.py
+
+import os
+import struct
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import metadata_core as core
+import ui_auxiliary as uia
+import value_parsers as vp
+
+# ExifTool-Attribute mit der Dauer, in dieser Reihenfolge bevorzugt
+DURATION_COLUMNS = [
+    "Duration",
+    "QuickTime:Duration",
+    "Matroska:Duration",
+    "Composite:Duration",
+    "MediaDuration",
+    "QuickTime:MediaDuration",
+    "TrackDuration",
+    "QuickTime:TrackDuration",
+]
+
+MP4_EXTS = {".mp4", ".mov", ".m4v", ".3gp", ".3g2"}
+MATROSKA_EXTS = {".mkv", ".webm"}
+
+# So weit wird im Matroska-Header nach dem Info-Element gesucht
+MATROSKA_SCAN_BYTES = 4 * 1024 * 1024
+
+# -------------------------------
+# 1. Aus den geladenen Metadaten
+# -------------------------------
+
+def _duration_seconds(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype("float64")
+    return vp.parse_values(series, "duration")
+
+
+def durations_from_df(df: pd.DataFrame) -> dict:
+    """
+    {pfad: sekunden} aus den Duration-Spalten des DataFrames.
+    Die erste vorhandene Spalte mit einem Wert > 0 gewinnt.
+    """
+    seconds = pd.Series(np.nan, index=df.index, dtype="float64")
+    for col in DURATION_COLUMNS:
+        if col not in df.columns:
+            continue
+        try:
+            values = _duration_seconds(df[col])
+        except Exception:
+            continue
+        seconds = seconds.fillna(values.where(values > 0))
+
+    valid = seconds.notna()
+    if not valid.any():
+        return {}
+    paths = core.source_files(df)[valid]
+    return dict(zip(paths.tolist(), seconds[valid].tolist()))
+
+# -------------------------------
+# 2. Aus dem Container-Header
+# -------------------------------
+
+def _mp4_boxes(f, start, end):
+    # liefert (typ, nutzdaten-start, box-ende)
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack(">I4s", header)
+        offset = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            offset = 16
+        elif size == 0:
+            size = end - pos
+        if size < offset:
+            return
+        yield kind, pos + offset, pos + size
+        pos += size
+
+
+def mp4_duration(path) -> float:
+    """
+    Dauer aus dem 'mvhd'-Atom (MP4/MOV). Gelesen werden nur die
+    Box-Header, 'mdat' wird übersprungen.
+    """
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        for kind, data, box_end in _mp4_boxes(f, 0, end):
+            if kind != b"moov":
+                continue
+            for child, cdata, _ in _mp4_boxes(f, data, box_end):
+                if child != b"mvhd":
+                    continue
+                f.seek(cdata)
+                version = f.read(4)[0]
+                if version == 1:
+                    _, _, timescale, duration = struct.unpack(">QQIQ", f.read(28))
+                else:
+                    _, _, timescale, duration = struct.unpack(">IIII", f.read(16))
+                return duration / timescale if timescale else 0.0
+    return 0.0
+
+
+def _read_vint(buf, pos, keep_marker=False):
+    first = buf[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("ungültige EBML-Länge")
+    value = first if keep_marker else first & (mask - 1)
+    all_ones = (first & (mask - 1)) == mask - 1
+    for b in buf[pos + 1:pos + length]:
+        value = (value << 8) | b
+        all_ones = all_ones and b == 0xFF
+    return value, pos + length, all_ones
+
+
+_EBML_SEGMENT = 0x18538067
+_EBML_INFO = 0x1549A966
+_EBML_CLUSTER = 0x1F43B675
+_EBML_TIMECODE_SCALE = 0x2AD7B1
+_EBML_DURATION = 0x4489
+
+
+def matroska_duration(path) -> float:
+    """
+    Dauer aus Segment/Info (Matroska/WebM): Duration in Einheiten von
+    TimecodeScale (Standard 1 ms).
+    """
+    with open(path, "rb") as f:
+        buf = f.read(MATROSKA_SCAN_BYTES)
+
+    pos = 0
+    end = len(buf)
+    while pos < end:
+        elem, pos, _ = _read_vint(buf, pos, keep_marker=True)
+        size, pos, unknown = _read_vint(buf, pos)
+
+        if elem == _EBML_SEGMENT:
+            end = len(buf) if unknown else min(len(buf), pos + size)
+            continue  # in das Segment hinabsteigen
+        if elem == _EBML_CLUSTER:
+            break
+
+        if elem == _EBML_INFO:
+            scale, duration = 1_000_000, None
+            info_pos, info_end = pos, min(len(buf), pos + size)
+            while info_pos < info_end:
+                child, info_pos, _ = _read_vint(buf, info_pos, keep_marker=True)
+                csize, info_pos, _ = _read_vint(buf, info_pos)
+                raw = buf[info_pos:info_pos + csize]
+                if child == _EBML_TIMECODE_SCALE:
+                    scale = int.from_bytes(raw, "big")
+                elif child == _EBML_DURATION:
+                    duration = struct.unpack(">f" if csize == 4 else ">d", raw)[0]
+                info_pos += csize
+            return duration * scale / 1e9 if duration else 0.0
+
+        pos += size
+    return 0.0
+
+
+@lru_cache(maxsize=4096)
+def _container_duration(path, size, mtime_ns) -> float:
+    # size/mtime nur als Teil des Schlüssels: geänderte Dateien neu lesen
+    ext = Path(path).suffix.lower()
+    try:
+        if ext in MP4_EXTS:
+            return mp4_duration(path)
+        if ext in MATROSKA_EXTS:
+            return matroska_duration(path)
+    except (OSError, ValueError, IndexError, struct.error):
+        pass
+    return 0.0
+
+
+def container_duration(path) -> float:
+    try:
+        st_ = os.stat(path)
+    except OSError:
+        return 0.0
+    return _container_duration(str(path), st_.st_size, st_.st_mtime_ns)
+
+# -------------------------------
+# Auflösen
+# -------------------------------
+
+def resolve_duration(path, durations=None) -> float:
+    """
+    Dauer eines Videos in Sekunden: zuerst aus den Metadaten
+    (durations_from_df), dann aus dem Container-Header, erst zuletzt
+    über moviepy/ffmpeg. 0, wenn nichts davon klappt.
+    """
+    if durations:
+        seconds = durations.get(path)
+        if seconds:
+            return float(seconds)
+
+    seconds = container_duration(path)
+    if seconds > 0:
+        return seconds
+
+    return uia.get_video_duration(path)